@@ -0,0 +1,272 @@
+"""Module for an LRU cache of availability search results with date-range invalidation."""
+
+import sys
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from availability_refresh import CALENDAR_FIELDS
+from booking import Booking
+from booking_modification import BookingModifier
+from compact_date import Day
+from room import Room
+
+# Room fields a cached search result depends on.
+ROOM_FIELDS = frozenset({"room_type", "price_per_night", "amenities"})
+
+# Estimated bytes per entry on top of its key and result: the LRU link,
+# the day index slot and the entry tuple.
+ENTRY_OVERHEAD_BYTES = 240
+
+# (room type, check-in, check-out, max price, amenities) of a search.
+SearchKey = Tuple[str, str, str, Optional[float], FrozenSet[str]]
+
+# (result, estimated bytes, check-in day, check-out day) of a cached search.
+Entry = Tuple[Tuple[int, ...], int, int, int]
+
+
+class AvailabilityCache:
+    """
+    Caches availability searches: the free rooms of a type for a stay,
+    optionally under a nightly price cap and with required amenities.
+
+    Results are kept in least-recently-used order and evicted once there
+    are more than `max_entries` of them or their estimated size passes
+    `max_bytes`. Misses are answered from a BookingModifier index.
+
+    Bookings and rooms are followed through change notification. A new,
+    cancelled or changed booking drops only the cached searches for its
+    room's type whose stay overlaps the nights it took or freed, old and
+    new; a room whose type, price or amenities change drops the searches
+    for its type. Entries are indexed by room type and check-in day, and
+    the longest cached stay per type bounds the days to look at. As in
+    BookingModifier, rooms keep their numbers while followed.
+    """
+
+    def __init__(self, rooms: Iterable[Room], bookings: Iterable[Booking] = (),
+                 max_entries: int = 10_000, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Initializes the cache.
+        - rooms, bookings: Rooms searched and their existing bookings.
+        - max_entries: Most searches kept.
+        - max_bytes: Most estimated memory used by the kept searches.
+        """
+        if max_entries <= 0 or max_bytes <= 0:
+            raise ValueError("Cache limits must be positive")
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._rooms: Dict[int, Room] = {}
+        self._room_types: Dict[int, str] = {}  # room number -> lowercase type
+        self._rooms_by_type: Dict[str, List[int]] = {}
+        for room in rooms:
+            self._rooms[room.get_room_number()] = room
+            self._add_room_type(room.get_room_number(), room.get_room_type().lower())
+            room.subscribe(self._on_room_change)
+        self._modifier = BookingModifier(self._rooms.values())
+        self._entries: "OrderedDict[SearchKey, Entry]" = OrderedDict()
+        self._by_day: Dict[str, Dict[int, Set[SearchKey]]] = {}  # type -> check-in -> keys
+        self._longest: Dict[str, int] = {}  # type -> longest cached stay in nights
+        self._bytes = 0
+        self._stays: Dict[int, Optional[Tuple[int, int, int]]] = {}  # id(booking) -> stay
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+        self._published: Dict[str, int] = {}
+        for booking in bookings:
+            self.add_booking(booking)
+
+    def _add_room_type(self, room_number: int, room_type: str) -> None:
+        """Files a room under its type."""
+        self._room_types[room_number] = room_type
+        numbers = self._rooms_by_type.setdefault(room_type, [])
+        numbers.append(room_number)
+        numbers.sort()
+
+    # Searches
+    def search(self, room_type: str, check_in: str, check_out: str,
+               max_price: Optional[float] = None, amenities: Iterable[str] = ()
+               ) -> Tuple[int, ...]:
+        """
+        Returns the numbers of rooms of a type free for [check_in, check_out),
+        priced at most `max_price` per night and having all `amenities`.
+        """
+        key = (room_type.lower(), check_in, check_out, max_price, frozenset(amenities))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+        self._misses += 1
+        start, stop = Day.parse(check_in), Day.parse(check_out)
+        if stop <= start:
+            raise ValueError("Check-out date must be after check-in date")
+        candidates = self._rooms_by_type.get(key[0], [])
+        if max_price is not None or key[4]:
+            candidates = [number for number in candidates
+                          if (max_price is None
+                              or self._rooms[number].get_price_per_night() <= max_price)
+                          and key[4].issubset(self._rooms[number].get_amenities())]
+        result = tuple(self._modifier.free_rooms(candidates, check_in, check_out))
+        self._store(key, result, start, stop)
+        return result
+
+    def is_available(self, room_number: int, check_in: str, check_out: str) -> bool:
+        """Checks if a room has no active booking overlapping a stay; not cached."""
+        return self._modifier.is_available(room_number, check_in, check_out)
+
+    def _store(self, key: SearchKey, result: Tuple[int, ...], start: int, stop: int) -> None:
+        """Caches a search result and evicts the least recently used ones over the limits."""
+        size = sys.getsizeof(result) + sys.getsizeof(key) + ENTRY_OVERHEAD_BYTES
+        self._entries[key] = (result, size, start, stop)
+        self._bytes += size
+        self._by_day.setdefault(key[0], {}).setdefault(start, set()).add(key)
+        if stop - start > self._longest.get(key[0], 0):
+            self._longest[key[0]] = stop - start
+        while self._entries and (len(self._entries) > self._max_entries
+                                 or self._bytes > self._max_bytes):
+            self._drop(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _drop(self, key: SearchKey) -> None:
+        """Removes one cached search."""
+        _, size, start, _ = self._entries.pop(key)
+        self._bytes -= size
+        days = self._by_day[key[0]]
+        keys = days[start]
+        keys.discard(key)
+        if not keys:
+            del days[start]
+
+    # Invalidation
+    def invalidate(self, room_type: str, start: int, stop: int) -> int:
+        """
+        Drops cached searches of a room type whose stay overlaps the days
+        [start, stop) (day numbers); returns how many were dropped.
+        """
+        days = self._by_day.get(room_type)
+        if not days:
+            return 0
+        stale = []
+        if stop - start + self._longest[room_type] < len(days):
+            for day in range(start - self._longest[room_type] + 1, stop):
+                for key in days.get(day, ()):
+                    if self._entries[key][3] > start:
+                        stale.append(key)
+        else:
+            for day, keys in days.items():
+                if day < stop:
+                    stale.extend(key for key in keys if self._entries[key][3] > start)
+        for key in stale:
+            self._drop(key)
+        self._invalidations += len(stale)
+        return len(stale)
+
+    def invalidate_type(self, room_type: str) -> int:
+        """Drops every cached search of a room type; returns how many were dropped."""
+        days = self._by_day.pop(room_type, {})
+        self._longest.pop(room_type, None)
+        dropped = 0
+        for keys in days.values():
+            for key in keys:
+                self._bytes -= self._entries.pop(key)[1]
+                dropped += 1
+        self._invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        """Drops every cached search."""
+        for room_type in list(self._by_day):
+            self.invalidate_type(room_type)
+
+    # Bookings and rooms
+    def add_booking(self, booking: Booking) -> None:
+        """Starts following a booking and drops the searches its stay affects."""
+        self._modifier.add_booking(booking)
+        self._stays[id(booking)] = None
+        self._restay(booking)
+        booking.subscribe(self._on_booking_change)
+
+    def _stay(self, booking: Booking) -> Optional[Tuple[int, int, int]]:
+        """Returns (room, check-in day, check-out day) of an active booking in a cached room."""
+        if booking.is_cancelled() or booking.get_room_number() not in self._rooms:
+            return None
+        return (booking.get_room_number(), booking.get_check_in_day(),
+                booking.get_check_out_day())
+
+    def _restay(self, booking: Booking) -> None:
+        """Drops the searches affected by the nights a booking took or freed."""
+        old = self._stays[id(booking)]
+        new = self._stay(booking)
+        if old == new:
+            return
+        self._stays[id(booking)] = new
+        for stay in (old, new):
+            if stay is not None:
+                self.invalidate(self._room_types[stay[0]], stay[1], stay[2])
+
+    def _on_booking_change(self, changes: list) -> None:
+        """Invalidates searches when a booking's room, dates or cancellation change."""
+        if any(field in CALENDAR_FIELDS for _, field, _, _ in changes):
+            self._restay(changes[0][0])
+
+    def _on_room_change(self, changes: list) -> None:
+        """Refiles a room whose type changed and drops the searches of its types."""
+        room = changes[0][0]
+        if not any(field in ROOM_FIELDS for _, field, _, _ in changes):
+            return
+        number = room.get_room_number()
+        old_type, new_type = self._room_types[number], room.get_room_type().lower()
+        if new_type != old_type:
+            self._rooms_by_type[old_type].remove(number)
+            self._add_room_type(number, new_type)
+            self.invalidate_type(new_type)
+        self.invalidate_type(old_type)
+
+    # Metrics
+    def get_hits(self) -> int:
+        """Returns the number of searches answered from the cache."""
+        return self._hits
+
+    def get_misses(self) -> int:
+        """Returns the number of searches computed."""
+        return self._misses
+
+    def get_hit_rate(self) -> float:
+        """Returns the fraction of searches answered from the cache."""
+        total = self._hits + self._misses
+        return self._hits / total if total else 0.0
+
+    def get_invalidations(self) -> int:
+        """Returns the number of searches dropped by booking or room changes."""
+        return self._invalidations
+
+    def get_evictions(self) -> int:
+        """Returns the number of searches evicted by the limits."""
+        return self._evictions
+
+    def get_size(self) -> int:
+        """Returns the number of cached searches."""
+        return len(self._entries)
+
+    def get_bytes(self) -> int:
+        """Returns the estimated memory held by cached searches."""
+        return self._bytes
+
+    def publish_metrics(self, registry=None) -> None:
+        """
+        Adds the counts since the last call to the cache counters of a
+        MetricsRegistry (metrics.REGISTRY by default) and sets its size gauges.
+        """
+        if registry is None:
+            from metrics import REGISTRY as registry
+        counts = {"hits": self._hits, "misses": self._misses,
+                  "invalidations": self._invalidations, "evictions": self._evictions}
+        for name, count in counts.items():
+            registry.counter(f"royalstay_availability_cache_{name}_total",
+                             f"Availability cache {name}").inc(
+                count - self._published.get(name, 0))
+            self._published[name] = count
+        registry.gauge("royalstay_availability_cache_entries",
+                       "Cached availability searches").set(len(self._entries))
+        registry.gauge("royalstay_availability_cache_bytes",
+                       "Estimated bytes held by cached searches").set(self._bytes)
@@ -0,0 +1,210 @@
+"""Module for keeping room availability flags in step with the booking calendar."""
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from booking import Booking
+from room import Room
+
+# (date, room number, id(booking)); sorts by date first.
+CalendarEvent = Tuple[str, int, int]
+
+# Booking fields that move a booking's events in the calendar.
+CALENDAR_FIELDS = frozenset({"room_number", "check_in_date", "check_out_date", "is_cancelled"})
+
+_LAST = float("inf")  # sorts after every room number for a given date
+
+
+class AvailabilityRefresher:
+    """
+    Sets Room availability flags from the bookings as of a given date.
+
+    Active bookings are kept as two date-sorted event lists, arrivals and
+    departures, plus an occupancy count per room for the current date.
+    A booking occupies its room on the nights from check-in up to, not
+    including, check-out, so a room is free again on the check-out date
+    (is_booking_active also counts the check-out day).
+
+    Moving to another date only sweeps the events between the old and the
+    new date, so rolling forward one day touches that day's arrivals and
+    departures, and a refresh on the same date does almost nothing. Only
+    rooms whose occupancy changed get their flag set. Bookings are
+    followed through change notification, so new dates, room moves and
+    cancellations update the counts as they happen; their rooms are
+    flagged on the next refresh.
+    """
+
+    def __init__(self, rooms: Iterable[Room] = (), bookings: Iterable[Booking] = ()):
+        """Initializes the refresher with the rooms to maintain and the bookings to follow."""
+        self._rooms: Dict[int, Room] = {}
+        self._bookings: Dict[int, Booking] = {}  # id(booking) -> booking
+        self._indexed: Dict[int, Optional[Tuple[int, str, str]]] = {}
+        self._arrivals: List[CalendarEvent] = []
+        self._departures: List[CalendarEvent] = []
+        self._occupancy: Dict[int, int] = {}
+        self._current = ""  # before every date, so nothing is occupied yet
+        self._dirty: Set[int] = set()
+        for room in rooms:
+            self.add_room(room)
+        self.add_bookings(bookings)
+
+    def add_room(self, room: Room) -> None:
+        """Adds a room whose flag is maintained from the next refresh on."""
+        number = room.get_room_number()
+        if number in self._rooms:
+            raise ValueError(f"Room {number} already added")
+        self._rooms[number] = room
+        self._dirty.add(number)
+
+    def add_booking(self, booking: Booking) -> None:
+        """Adds a booking to the calendar and follows its changes."""
+        self.add_bookings([booking])
+
+    def add_bookings(self, bookings: Iterable[Booking]) -> None:
+        """Adds many bookings, sorting the calendar once instead of per booking."""
+        bookings = list(bookings)
+        keys = {id(booking) for booking in bookings}
+        if len(keys) != len(bookings) or not keys.isdisjoint(self._bookings):
+            raise ValueError("Booking already added")
+        single = len(bookings) == 1
+        for booking in bookings:
+            self._bookings[id(booking)] = booking
+            self._index(booking, single)
+            booking.subscribe(self._on_booking_change)
+        if not single:
+            self._arrivals.sort()
+            self._departures.sort()
+
+    def remove_booking(self, booking: Booking) -> None:
+        """Removes a booking from the calendar."""
+        key = id(booking)
+        if key not in self._bookings:
+            raise ValueError(f"Booking {booking.get_booking_id()} not found")
+        booking.unsubscribe(self._on_booking_change)
+        self._unindex(key)
+        del self._bookings[key]
+
+    def _index(self, booking: Booking, keep_sorted: bool = True) -> None:
+        """
+        Adds the events of an active booking and counts it if it covers the
+        current date. Without `keep_sorted` the events are only appended.
+        """
+        key = id(booking)
+        if booking.is_cancelled():
+            self._indexed[key] = None
+            return
+        entry = (booking.get_room_number(), booking.get_check_in_date(),
+                 booking.get_check_out_date())
+        self._indexed[key] = entry
+        room, check_in, check_out = entry
+        if keep_sorted:
+            insort(self._arrivals, (check_in, room, key))
+            insort(self._departures, (check_out, room, key))
+        else:
+            self._arrivals.append((check_in, room, key))
+            self._departures.append((check_out, room, key))
+        if check_in <= self._current < check_out:
+            self._count(room, 1)
+
+    def _unindex(self, key: int) -> None:
+        """Removes the events recorded for a booking and uncounts it."""
+        entry = self._indexed.pop(key)
+        if entry is None:
+            return
+        room, check_in, check_out = entry
+        for events, event in ((self._arrivals, (check_in, room, key)),
+                              (self._departures, (check_out, room, key))):
+            del events[bisect_left(events, event)]
+        if check_in <= self._current < check_out:
+            self._count(room, -1)
+
+    def _on_booking_change(self, changes: list) -> None:
+        """Moves a booking's events when its room, dates or cancellation change."""
+        if any(field in CALENDAR_FIELDS for _, field, _, _ in changes):
+            booking = changes[0][0]
+            self._unindex(id(booking))
+            self._index(booking)
+
+    def _count(self, room: int, delta: int) -> None:
+        """Adjusts the occupancy of a room, noting a flag change when it empties or fills."""
+        before = self._occupancy.get(room, 0)
+        after = before + delta
+        if after:
+            self._occupancy[room] = after
+        else:
+            del self._occupancy[room]
+        if (before == 0) != (after == 0):
+            self._dirty.add(room)
+
+    def _sweep(self, events: List[CalendarEvent], after: str, through: str, delta: int) -> None:
+        """Applies `delta` for every event dated after `after` up to and including `through`."""
+        start = bisect_right(events, (after, _LAST))
+        stop = bisect_right(events, (through, _LAST))
+        for _, room, _ in events[start:stop]:
+            self._count(room, delta)
+
+    def refresh(self, as_of: str) -> int:
+        """
+        Moves the calendar to `as_of` (YYYY-MM-DD), forwards or backwards,
+        and updates the flags of rooms whose occupancy changed.
+        Returns the number of room flags that were changed.
+        """
+        try:
+            date.fromisoformat(as_of)
+        except ValueError:
+            raise ValueError("Date must be in YYYY-MM-DD format")
+        if as_of > self._current:
+            self._sweep(self._arrivals, self._current, as_of, 1)
+            self._sweep(self._departures, self._current, as_of, -1)
+        elif as_of < self._current:
+            self._sweep(self._departures, as_of, self._current, 1)
+            self._sweep(self._arrivals, as_of, self._current, -1)
+        self._current = as_of
+        dirty, self._dirty = self._dirty, set()
+        return self._apply(dirty)
+
+    def advance(self, days: int = 1) -> int:
+        """
+        Rolls the calendar forward by whole days.
+        Returns the number of room flags that were changed.
+        """
+        if not self._current:
+            raise ValueError("Refresh to a start date before advancing")
+        return self.refresh((date.fromisoformat(self._current) + timedelta(days=days)).isoformat())
+
+    def resync(self) -> int:
+        """
+        Rewrites the flag of every room from the current occupancy, fixing
+        flags that were changed by hand.
+        Returns the number of room flags that were changed.
+        """
+        if not self._current:
+            raise ValueError("Refresh to a start date before resyncing")
+        self._dirty = set()
+        return self._apply(self._rooms)
+
+    def _apply(self, room_numbers: Iterable[int]) -> int:
+        """Sets the flags of the given rooms; returns how many changed."""
+        changed = 0
+        for number in room_numbers:
+            room = self._rooms.get(number)
+            if room is None:
+                continue
+            available = number not in self._occupancy
+            if room.is_available() != available:
+                room.set_availability(available)
+                changed += 1
+        return changed
+
+    def get_date(self) -> str:
+        """Returns the date the calendar is at, or an empty string before the first refresh."""
+        return self._current
+
+    def is_occupied(self, room_number: int) -> bool:
+        """Checks if an active booking covers the room on the current date."""
+        return room_number in self._occupancy
+
+    def get_occupied_count(self) -> int:
+        """Returns the number of rooms occupied on the current date."""
+        return len(self._occupancy)
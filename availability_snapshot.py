@@ -0,0 +1,315 @@
+"""Module for immutable availability snapshots that readers use without locking."""
+
+import threading
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from availability_refresh import CALENDAR_FIELDS
+from booking import Booking
+from compact_date import Day
+from observable import batch_notifications
+from room import Room
+
+# Rooms per chunk; a write copies one chunk plus the chunk directory.
+CHUNK_SIZE = 64
+
+# Room fields stored in a snapshot.
+ROOM_FIELDS = frozenset({"room_number", "room_type", "price_per_night"})
+
+# (lower-case room type, price per night, check-in days, check-out days, booking IDs,
+# latest check-out day so far); the stay tuples are sorted by check-in day. Stays
+# may overlap, so the last one before a day need not be the one reaching furthest.
+RoomEntry = Tuple[str, float, Tuple[int, ...], Tuple[int, ...], Tuple[int, ...],
+                  Tuple[int, ...]]
+Chunk = Dict[int, RoomEntry]  # room number -> entry
+
+# (room number, check-in day, check-out day, booking ID) of an indexed stay.
+Span = Tuple[int, int, int, int]
+
+
+def _stay(check_in: str, check_out: str) -> Tuple[int, int]:
+    """Returns the day numbers of a stay, checking their order."""
+    start, stop = Day.parse(check_in), Day.parse(check_out)
+    if stop <= start:
+        raise ValueError("Check-out date must be after check-in date")
+    return start, stop
+
+
+class AvailabilitySnapshot:
+    """
+    Represents one immutable version of the rooms and their active stays.
+
+    Nothing in a snapshot changes after it is published, so any number of
+    threads can read it without locks and always see one consistent state.
+    A snapshot shares every chunk of rooms that a later write did not
+    touch with the versions before and after it.
+    """
+
+    def __init__(self, version: int, chunks: Dict[int, Chunk],
+                 rooms_by_type: Dict[str, Tuple[int, ...]]):
+        """
+        Initializes an AvailabilitySnapshot with:
+        - version: Publication number, increasing by one per write.
+        - chunks: Room entries by chunk (room number // CHUNK_SIZE).
+        - rooms_by_type: Sorted room numbers per lower-case room type.
+        """
+        self._version = version
+        self._chunks = chunks
+        self._rooms_by_type = rooms_by_type
+
+    def _entry(self, room_number: int) -> RoomEntry:
+        """Returns a room's entry."""
+        entry = self._chunks.get(room_number // CHUNK_SIZE, {}).get(room_number)
+        if entry is None:
+            raise ValueError(f"Room {room_number} not found")
+        return entry
+
+    @staticmethod
+    def _entry_is_free(entry: RoomEntry, check_in: int, check_out: int) -> bool:
+        """Checks if an entry has no stay overlapping [check_in, check_out)."""
+        starts, reach = entry[2], entry[5]
+        position = bisect_left(starts, check_in)
+        if position < len(starts) and starts[position] < check_out:
+            return False
+        return position == 0 or reach[position - 1] <= check_in
+
+    def get_version(self) -> int:
+        """Returns the publication number of this snapshot."""
+        return self._version
+
+    def get_room_numbers(self) -> List[int]:
+        """Returns every room number, sorted."""
+        return sorted(number for chunk in self._chunks.values() for number in chunk)
+
+    def get_room_type(self, room_number: int) -> str:
+        """Returns a room's type, in lower case."""
+        return self._entry(room_number)[0]
+
+    def get_price(self, room_number: int) -> float:
+        """Returns a room's price per night."""
+        return self._entry(room_number)[1]
+
+    def get_stays(self, room_number: int) -> List[Tuple[int, str, str]]:
+        """Returns (booking ID, check-in, check-out) for a room's active stays."""
+        _, _, starts, ends, booking_ids, _ = self._entry(room_number)
+        return [(booking_id, Day(start).isoformat(), Day(end).isoformat())
+                for start, end, booking_id in zip(starts, ends, booking_ids)]
+
+    def is_free(self, room_number: int, check_in: str, check_out: str) -> bool:
+        """Checks if a room has no active booking overlapping a stay."""
+        return self._entry_is_free(self._entry(room_number), *_stay(check_in, check_out))
+
+    def free_rooms(self, room_type: str, check_in: str, check_out: str) -> List[int]:
+        """Returns the rooms of a type that are free for a whole stay."""
+        start, stop = _stay(check_in, check_out)
+        chunks = self._chunks
+        return [number for number in self._rooms_by_type.get(room_type.lower(), ())
+                if self._entry_is_free(chunks[number // CHUNK_SIZE][number], start, stop)]
+
+    def occupied_rooms(self, day: str) -> int:
+        """Returns the number of rooms with a stay covering the night of a date."""
+        night = Day.parse(day)
+        occupied = 0
+        for chunk in self._chunks.values():
+            for _, _, starts, _, _, reach in chunk.values():
+                position = bisect_right(starts, night)
+                if position and reach[position - 1] > night:
+                    occupied += 1
+        return occupied
+
+    def __str__(self) -> str:
+        """Returns a string representation of the AvailabilitySnapshot object."""
+        rooms = sum(len(chunk) for chunk in self._chunks.values())
+        return f"Availability Snapshot v{self._version}: {rooms} rooms"
+
+
+class SnapshotPublisher:
+    """
+    Publishes a new AvailabilitySnapshot after every change to the rooms
+    and bookings it follows.
+
+    Readers call snapshot() and keep using what it returns for as long as
+    they need a consistent view; taking a snapshot is a single attribute
+    read, with no lock. Writers go through the objects' setters as usual:
+    change notification reaches the publisher, which builds the next
+    version under a writer lock by copying only what changed (the
+    touched room's stay tuples, its chunk of CHUNK_SIZE rooms and the
+    chunk directory) and sharing everything else, then swaps it in.
+    Versions no reader holds any more are freed by reference counting.
+
+    Inside batch() a burst of writes is published once, at the end, so a
+    group booking produces one new version instead of one per booking.
+    """
+
+    def __init__(self, rooms: Iterable[Room] = (), bookings: Iterable[Booking] = ()):
+        """Initializes the publisher with the rooms and bookings to follow."""
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._chunks: Dict[int, Chunk] = {}
+        self._rooms_by_type: Dict[str, Tuple[int, ...]] = {}
+        self._copied: set = set()  # chunk keys already copied for the next version
+        self._types_copied = False
+        self._rooms: Dict[int, Room] = {}  # id(room) -> room
+        self._bookings: Dict[int, Booking] = {}  # id(booking) -> booking
+        self._spans: Dict[int, Optional[Span]] = {}  # id(booking) -> indexed stay
+        self._current = AvailabilitySnapshot(0, {}, {})
+        with self.batch():
+            for room in rooms:
+                self.add_room(room)
+            for booking in bookings:
+                self.add_booking(booking)
+
+    def snapshot(self) -> AvailabilitySnapshot:
+        """Returns the latest published snapshot."""
+        return self._current
+
+    @contextmanager
+    def batch(self):
+        """Publishes all writes made inside the block as one new version."""
+        with self._lock:
+            self._depth += 1
+            try:
+                with batch_notifications():
+                    yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._publish()
+
+    def _publish(self) -> None:
+        """Swaps in the next version if anything changed since the last one."""
+        if not self._copied and not self._types_copied:
+            return
+        self._current = AvailabilitySnapshot(self._current.get_version() + 1,
+                                             self._chunks, self._rooms_by_type)
+        self._copied = set()
+        self._types_copied = False
+
+    @contextmanager
+    def _write(self):
+        """Holds the writer lock and publishes afterwards unless inside batch()."""
+        with self._lock:
+            yield
+            if self._depth == 0:
+                self._publish()
+
+    # Copy-on-write helpers; only ever called under the writer lock.
+    def _chunk_for_write(self, room_number: int) -> Chunk:
+        """Returns a private copy of the chunk holding a room."""
+        key = room_number // CHUNK_SIZE
+        if key not in self._copied:
+            if not self._copied:
+                self._chunks = dict(self._chunks)  # new directory for the next version
+            self._chunks[key] = dict(self._chunks.get(key, {}))
+            self._copied.add(key)
+        return self._chunks[key]
+
+    def _set_room_type(self, room_number: int, old_type: Optional[str],
+                       new_type: Optional[str]) -> None:
+        """Moves a room between the per-type room lists."""
+        if not self._types_copied:
+            self._rooms_by_type = dict(self._rooms_by_type)
+            self._types_copied = True
+        if old_type is not None:
+            numbers = self._rooms_by_type[old_type]
+            position = bisect_left(numbers, room_number)
+            self._rooms_by_type[old_type] = numbers[:position] + numbers[position + 1:]
+        if new_type is not None:
+            numbers = self._rooms_by_type.get(new_type, ())
+            position = bisect_left(numbers, room_number)
+            self._rooms_by_type[new_type] = numbers[:position] + (room_number,) + numbers[position:]
+
+    def _add_stay(self, span: Span) -> None:
+        """Inserts a stay into its room's entry."""
+        room_number, check_in, check_out, booking_id = span
+        chunk = self._chunk_for_write(room_number)
+        room_type, price, starts, ends, booking_ids, _ = chunk[room_number]
+        position = bisect_left(starts, check_in)
+        ends = ends[:position] + (check_out,) + ends[position:]
+        chunk[room_number] = (room_type, price,
+                              starts[:position] + (check_in,) + starts[position:], ends,
+                              booking_ids[:position] + (booking_id,) + booking_ids[position:],
+                              tuple(accumulate(ends, max)))
+
+    def _remove_stay(self, span: Span) -> None:
+        """Removes a stay from its room's entry."""
+        room_number, check_in, _, booking_id = span
+        chunk = self._chunk_for_write(room_number)
+        room_type, price, starts, ends, booking_ids, _ = chunk[room_number]
+        position = bisect_left(starts, check_in)
+        while booking_ids[position] != booking_id:
+            position += 1
+        ends = ends[:position] + ends[position + 1:]
+        chunk[room_number] = (room_type, price,
+                              starts[:position] + starts[position + 1:], ends,
+                              booking_ids[:position] + booking_ids[position + 1:],
+                              tuple(accumulate(ends, max)))
+
+    # Rooms
+    def add_room(self, room: Room) -> None:
+        """Adds a room and follows its changes."""
+        with self._write():
+            number = room.get_room_number()
+            if id(room) in self._rooms or number in self._chunks.get(number // CHUNK_SIZE, {}):
+                raise ValueError(f"Room {number} already added")
+            self._rooms[id(room)] = room
+            room_type = room.get_room_type().lower()
+            self._chunk_for_write(number)[number] = (room_type, room.get_price_per_night(),
+                                                     (), (), (), ())
+            self._set_room_type(number, None, room_type)
+            room.subscribe(self._on_room_change)
+
+    def _on_room_change(self, changes: list) -> None:
+        """Copies a room's new number, type or price into the next version."""
+        if not any(field in ROOM_FIELDS for _, field, _, _ in changes):
+            return
+        room = changes[0][0]
+        old_number = next((old for _, field, old, _ in changes if field == "room_number"),
+                          room.get_room_number())
+        with self._write():
+            old_chunk = self._chunk_for_write(old_number)
+            old_type, _, *stays = old_chunk.pop(old_number)
+            number = room.get_room_number()
+            room_type = room.get_room_type().lower()
+            self._chunk_for_write(number)[number] = (room_type, room.get_price_per_night(),
+                                                     *stays)
+            if (old_number, old_type) != (number, room_type):
+                self._set_room_type(old_number, old_type, None)
+                self._set_room_type(number, None, room_type)
+            if number != old_number:
+                for key, span in self._spans.items():
+                    if span is not None and span[0] == old_number:
+                        self._spans[key] = (number, *span[1:])
+
+    # Bookings
+    def add_booking(self, booking: Booking) -> None:
+        """Adds a booking and follows its changes."""
+        with self._write():
+            key = id(booking)
+            if key in self._bookings:
+                raise ValueError(f"Booking {booking.get_booking_id()} already added")
+            self._bookings[key] = booking
+            self._index(booking)
+            booking.subscribe(self._on_booking_change)
+
+    def _index(self, booking: Booking) -> None:
+        """Adds a booking's current stay, if active and for a known room."""
+        number = booking.get_room_number()
+        span = None
+        if not booking.is_cancelled() and number in self._chunks.get(number // CHUNK_SIZE, {}):
+            span = (number, booking.get_check_in_day(),
+                    booking.get_check_out_day(), booking.get_booking_id())
+            self._add_stay(span)
+        self._spans[id(booking)] = span
+
+    def _on_booking_change(self, changes: list) -> None:
+        """Moves a booking's stay in the next version."""
+        if any(field in CALENDAR_FIELDS or field == "booking_id" for _, field, _, _ in changes):
+            booking = changes[0][0]
+            with self._write():
+                span = self._spans.pop(id(booking))
+                if span is not None:
+                    self._remove_stay(span)
+                self._index(booking)
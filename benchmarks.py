@@ -0,0 +1,154 @@
+"""
+Micro-benchmarks for the Royal Stay Hotel Management System.
+Run with: python benchmarks.py
+"""
+
+import os
+import tempfile
+import time
+import timeit
+from typing import Dict
+
+from booking import Booking
+from change_log import EventLog, recover, replay
+from feedback import Feedback
+from invoice import Invoice
+from observable import batch_notifications
+from render_cache import RenderCache
+from room import Room
+
+
+class _PlainRoom:
+    """Room setter exactly as it was before change notification, for comparison."""
+
+    def __init__(self, price_per_night: float):
+        self._price_per_night = price_per_night
+
+    def set_price_per_night(self, price: float) -> None:
+        self._price_per_night = price
+
+
+def bench_setter_overhead(calls: int = 1_000_000) -> Dict[str, float]:
+    """
+    Times Room.set_price_per_night with no listeners, one listener and one
+    listener inside a batch, against a plain setter.
+    Returns nanoseconds per call for each case.
+    """
+    plain = _PlainRoom(99.99)
+    unobserved = Room(101, "Standard", 99.99)
+    observed = Room(102, "Standard", 99.99)
+    observed.subscribe(lambda changes: None)
+
+    def batched():
+        with batch_notifications():
+            for _ in range(calls):
+                observed.set_price_per_night(120.0)
+
+    results = {
+        "plain setter": timeit.timeit(lambda: plain.set_price_per_night(120.0), number=calls),
+        "no listeners": timeit.timeit(lambda: unobserved.set_price_per_night(120.0), number=calls),
+        "one listener": timeit.timeit(lambda: observed.set_price_per_night(120.0), number=calls),
+        "one listener, batched": timeit.timeit(batched, number=1),
+    }
+    return {name: seconds / calls * 1e9 for name, seconds in results.items()}
+
+
+def bench_report_rendering(objects: int = 1_000_000, passes: int = 3) -> Dict[str, float]:
+    """
+    Renders a report over `objects` bookings, invoices, feedback entries and
+    rooms `passes` times, with and without a RenderCache. Between passes one
+    field changes on every tenth invoice, so those are rendered again.
+    Returns seconds per pass for each case; the first cached pass fills the
+    cache and is reported separately.
+    """
+    quarter = objects // 4
+    rows = []
+    for i in range(quarter):
+        rows.append((Booking(i, i, 100 + i % 400, "2025-05-01", "2025-05-04"), "generate_booking_summary"))
+        rows.append((Invoice(i, 599.97, 50.0, "Credit Card", i, "Pending"), "__str__"))
+        rows.append((Feedback(i, 4.5, "Great stay!", i, "2025-05-04"), "generate_feedback_summary"))
+        room = Room(100 + i, "Standard", 99.99)
+        room.add_amenity("Wi-Fi")
+        room.add_amenity("TV")
+        rows.append((room, "__str__"))
+    invoices = [obj for obj, _ in rows[1::4]]
+
+    def run(render) -> list:
+        timings = []
+        for number in range(passes):
+            start = time.perf_counter()
+            for obj, method in rows:
+                render(obj, method)
+            timings.append(time.perf_counter() - start)
+            for invoice in invoices[number::10]:
+                invoice.set_payment_status("Paid")
+        return timings
+
+    uncached = run(lambda obj, method: getattr(obj, method)())
+    cache = RenderCache(max_objects=len(rows))
+    cached = run(cache.render)
+    cache.clear()
+    return {
+        "uncached": sum(uncached) / passes,
+        "cached, first pass": cached[0],
+        "cached, later passes": sum(cached[1:]) / max(passes - 1, 1),
+    }
+
+
+def bench_log_replay(events: int = 1_000_000, rooms: int = 1000) -> Dict[str, float]:
+    """
+    Logs `events` price changes over `rooms` rooms, then times replaying the
+    whole log and recovering again after a snapshot, which only reads the
+    events logged since.
+    Returns events per second for the replay and seconds for each recovery.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        log_path = os.path.join(folder, "changes.log")
+        snapshot_path = os.path.join(folder, "state.snapshot")
+        tracked = [Room(100 + i, "Standard", 99.99) for i in range(rooms)]
+        with EventLog(log_path, snapshot_path, snapshot_every=0) as log:
+            for room in tracked:
+                log.track(room)
+            for i in range(events):
+                tracked[i % rooms].set_price_per_night(float(i % 500))
+
+        start = time.perf_counter()
+        _, _, last = replay(log_path, snapshot_path)
+        replay_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        recover(log_path, snapshot_path)
+        full_recovery = time.perf_counter() - start
+
+        with EventLog(log_path, snapshot_path) as log:
+            log.snapshot()
+        start = time.perf_counter()
+        recover(log_path, snapshot_path)
+        snapshot_recovery = time.perf_counter() - start
+    return {
+        "replay (events/s)": last / replay_seconds,
+        "recover, no snapshot (s)": full_recovery,
+        "recover after snapshot (s)": snapshot_recovery,
+    }
+
+
+def main():
+    """Runs all benchmarks and prints the results."""
+    print("=== SETTER OVERHEAD (ns/call) ===")
+    results = bench_setter_overhead()
+    baseline = results["plain setter"]
+    for name, nanoseconds in results.items():
+        print(f"  {name:<24} {nanoseconds:8.1f}  ({nanoseconds / baseline:.2f}x)")
+
+    print("\n=== REPORT RENDERING, 1M OBJECTS (s/pass) ===")
+    results = bench_report_rendering()
+    for name, seconds in results.items():
+        print(f"  {name:<24} {seconds:8.2f}")
+
+    print("\n=== CHANGE LOG, 1M EVENTS (target: replay >= 1M events/s) ===")
+    results = bench_log_replay()
+    for name, value in results.items():
+        print(f"  {name:<28} {value:12,.3f}")
+
+
+if __name__ == "__main__":
+    main()
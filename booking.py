@@ -2,10 +2,11 @@
 Handles hotel room bookings including reservations, cancellations, and date management
 """
 
-from datetime import datetime
+from compact_date import Day
 from invoice import Invoice
+from observable import Observable
 
-class Booking:
+class Booking(Observable):
     """Manages booking information and operations"""
 
     def __init__(self, booking_id: int, guest_id: int, room_number: int,
@@ -14,8 +15,8 @@ class Booking:
         self._booking_id = booking_id
         self._guest_id = guest_id
         self._room_number = room_number
-        self._check_in_date = check_in_date
-        self._check_out_date = check_out_date
+        self._check_in_date = Day.of(check_in_date)
+        self._check_out_date = Day.of(check_out_date)
         self._invoice = None
         self._is_cancelled = False
 
@@ -34,10 +35,18 @@ class Booking:
 
     def get_check_in_date(self) -> str:
         """Return scheduled check-in date (YYYY-MM-DD)"""
-        return self._check_in_date
+        return self._check_in_date.isoformat()
 
     def get_check_out_date(self) -> str:
         """Return scheduled check-out date (YYYY-MM-DD)"""
+        return self._check_out_date.isoformat()
+
+    def get_check_in_day(self) -> Day:
+        """Return check-in date as a Day, for comparisons without parsing"""
+        return self._check_in_date
+
+    def get_check_out_day(self) -> Day:
+        """Return check-out date as a Day, for comparisons without parsing"""
         return self._check_out_date
 
     def is_cancelled(self) -> bool:
@@ -46,34 +55,64 @@ class Booking:
 
     def set_cancelled(self, cancelled: bool) -> None:
         """Set booking cancellation status"""
+        old = self._is_cancelled
         self._is_cancelled = cancelled
+        if self._observers:
+            self._notify("is_cancelled", old, cancelled)
 
     # Property mutators
     def set_booking_id(self, booking_id: int) -> None:
         """Update booking identifier"""
+        old = self._booking_id
         self._booking_id = booking_id
+        if self._observers:
+            self._notify("booking_id", old, booking_id)
 
     def set_guest_id(self, guest_id: int) -> None:
         """Update guest identifier"""
+        old = self._guest_id
         self._guest_id = guest_id
+        if self._observers:
+            self._notify("guest_id", old, guest_id)
 
     def set_room_number(self, room_number: int) -> None:
         """Update assigned room number"""
+        old = self._room_number
         self._room_number = room_number
+        if self._observers:
+            self._notify("room_number", old, room_number)
 
     def set_check_in_date(self, date: str) -> None:
         """Update check-in date after validation"""
-        self._validate_date(date)
-        if hasattr(self, '_check_out_date'):
-            self.validate_dates(date, self._check_out_date)
-        self._check_in_date = date
+        day = Day.of(date)
+        if hasattr(self, '_check_out_date') and self._check_out_date <= day:
+            raise ValueError("Check-out date must be after check-in date")
+        old = self._check_in_date
+        self._check_in_date = day
+        if self._observers:
+            self._notify("check_in_date", str(old), str(day))
 
     def set_check_out_date(self, date: str) -> None:
         """Update check-out date after validation"""
-        self._validate_date(date)
-        if hasattr(self, '_check_in_date'):
-            self.validate_dates(self._check_in_date, date)
-        self._check_out_date = date
+        day = Day.of(date)
+        if hasattr(self, '_check_in_date') and day <= self._check_in_date:
+            raise ValueError("Check-out date must be after check-in date")
+        old = self._check_out_date
+        self._check_out_date = day
+        if self._observers:
+            self._notify("check_out_date", str(old), str(day))
+
+    def set_dates(self, check_in: str, check_out: str) -> None:
+        """Update both stay dates at once, validating each date only once"""
+        first, last = Day.of(check_in), Day.of(check_out)
+        if last <= first:
+            raise ValueError("Check-out date must be after check-in date")
+        old_in, old_out = self._check_in_date, self._check_out_date
+        self._check_in_date = first
+        self._check_out_date = last
+        if self._observers:
+            self._notify("check_in_date", str(old_in), str(first))
+            self._notify("check_out_date", str(old_out), str(last))
 
     # Invoice management
     def get_invoice(self) -> Invoice:
@@ -82,23 +121,34 @@ class Booking:
 
     def set_invoice(self, invoice: Invoice) -> None:
         """Set associated invoice object"""
+        old = self._invoice
         self._invoice = invoice
+        if self._observers:
+            self._notify("invoice", old, invoice)
 
     # Business logic methods
     def calculate_booking_duration(self) -> int:
         """Calculate total nights between check-in and check-out"""
-        fmt = "%Y-%m-%d"
-        delta = (datetime.strptime(self._check_out_date, fmt) -
-                 datetime.strptime(self._check_in_date, fmt))
-        return delta.days
+        return self._check_out_date - self._check_in_date
+
+    def calculate_stay_cost(self, rate_calendar) -> float:
+        """Calculate stay cost from the nightly rates of a RateCalendar"""
+        if rate_calendar.get_room_number() != self._room_number:
+            raise ValueError("Rate calendar is for a different room")
+        return rate_calendar.stay_cost(str(self._check_in_date), str(self._check_out_date))
+
+    def generate_invoice(self, invoice_id: int, rate_calendar, discounts: float = 0.0,
+                         payment_method: str = "Credit Card") -> Invoice:
+        """Create a pending invoice priced from a RateCalendar and attach it"""
+        invoice = Invoice(invoice_id, self.calculate_stay_cost(rate_calendar), discounts,
+                          payment_method, self._booking_id, "Pending")
+        self.set_invoice(invoice)
+        return invoice
 
     def is_booking_active(self, current_date: str) -> bool:
         """Check if booking is active on given date"""
-        fmt = "%Y-%m-%d"
-        current = datetime.strptime(current_date, fmt)
-        check_in = datetime.strptime(self._check_in_date, fmt)
-        check_out = datetime.strptime(self._check_out_date, fmt)
-        return check_in <= current <= check_out and not self._is_cancelled
+        current = Day.of(current_date)
+        return self._check_in_date <= current <= self._check_out_date and not self._is_cancelled
 
     def generate_booking_summary(self) -> str:
         """Generate formatted booking details string"""
@@ -112,20 +162,17 @@ class Booking:
         if self._is_cancelled:
             raise ValueError("Booking already cancelled")
         self._is_cancelled = True
+        if self._observers:
+            self._notify("is_cancelled", False, True)
 
     def validate_dates(self, check_in: str, check_out: str) -> None:
         """Verify check-out date is after check-in date"""
-        check_in_date = datetime.strptime(check_in, "%Y-%m-%d")
-        check_out_date = datetime.strptime(check_out, "%Y-%m-%d")
-        if check_out_date <= check_in_date:
+        if Day.of(check_out) <= Day.of(check_in):
             raise ValueError("Check-out date must be after check-in date")
 
     def _validate_date(self, date_str: str) -> None:
         """Verify date string format is YYYY-MM-DD"""
-        try:
-            datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            raise ValueError("Date must be in YYYY-MM-DD format")
+        Day.of(date_str)
 
     def __str__(self) -> str:
         """Return string representation of booking"""
@@ -0,0 +1,324 @@
+"""Module for changing booked stays with conflict checks against a per-room index."""
+
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from availability_refresh import CALENDAR_FIELDS
+from booking import Booking
+from compact_date import Day
+from invoice import Invoice
+from observable import batch_notifications
+from rate_calendar import RateCalendar
+from room import Room
+
+# (room number, check-in day, check-out day) of an indexed stay.
+Span = Tuple[int, int, int]
+
+
+def _overlap(stays: List[Tuple[int, int, int]]) -> bool:
+    """Checks if any two of a room's stays, sorted by check-in, overlap."""
+    reach = 0  # latest check-out so far; day numbers start at 1
+    for check_in, check_out, _ in stays:
+        if check_in < reach:
+            return True
+        reach = max(reach, check_out)
+    return False
+
+
+class BookingChange:
+    """
+    Represents one requested change to a booking; fields left as None keep
+    their current value.
+    """
+
+    def __init__(self, booking_id: int, check_in_date: Optional[str] = None,
+                 check_out_date: Optional[str] = None, room_number: Optional[int] = None):
+        """
+        Initializes a BookingChange with:
+        - booking_id: Booking to change.
+        - check_in_date, check_out_date: New stay dates (YYYY-MM-DD).
+        - room_number: New room.
+        """
+        self._booking_id = booking_id
+        self._check_in_date = check_in_date
+        self._check_out_date = check_out_date
+        self._room_number = room_number
+
+    def get_booking_id(self) -> int:
+        """Returns the ID of the booking to change."""
+        return self._booking_id
+
+    def get_check_in_date(self) -> Optional[str]:
+        """Returns the new check-in date, if it changes."""
+        return self._check_in_date
+
+    def get_check_out_date(self) -> Optional[str]:
+        """Returns the new check-out date, if it changes."""
+        return self._check_out_date
+
+    def get_room_number(self) -> Optional[int]:
+        """Returns the new room number, if it changes."""
+        return self._room_number
+
+    def __str__(self) -> str:
+        """Returns a string representation of the BookingChange object."""
+        return (f"Change for Booking #{self._booking_id}: Room {self._room_number}, "
+                f"Dates: {self._check_in_date} to {self._check_out_date}")
+
+
+class BookingModifier:
+    """
+    Changes booking dates and rooms without double-booking a room.
+
+    Active bookings are indexed per room as (check-in, check-out) day
+    numbers sorted by check-in. While a room's stays do not overlap each
+    other, whether it is free for a stay depends only on the two indexed
+    stays around its check-in day: one binary search, with no date
+    parsing. Rooms whose stays do overlap (bookings added or moved that
+    way) are checked against every earlier stay instead. A change takes the booking's old stay out of the index,
+    checks and inserts the new one, and only then touches the Booking,
+    in one notification batch; if the check fails the index is restored
+    and the booking is left as it was.
+
+    modify_many() does the same for a group of changes, all or nothing.
+    The old stays of every booking in the group are taken out first, so
+    guests in a group may swap rooms or dates with each other.
+
+    Invoices attached to changed bookings are re-priced: from the room's
+    RateCalendar if one was given, otherwise at the room's price per night.
+    Bookings are followed through change notification, so changes made
+    directly through their setters keep the index current.
+    """
+
+    def __init__(self, rooms: Iterable[Room], bookings: Iterable[Booking] = (),
+                 rate_calendars: Optional[Mapping[int, RateCalendar]] = None):
+        """
+        Initializes the modifier.
+        - rooms: Rooms bookings may be moved between.
+        - bookings: Existing bookings for those rooms.
+        - rate_calendars: Nightly rates per room number, used to re-price invoices.
+        """
+        self._rooms: Dict[int, Room] = {room.get_room_number(): room for room in rooms}
+        self._rate_calendars = dict(rate_calendars or {})
+        self._calendar: Dict[int, List[Tuple[int, int, int]]] = {
+            number: [] for number in self._rooms}  # room -> sorted (in, out, id(booking))
+        self._spans: Dict[int, Optional[Span]] = {}  # id(booking) -> indexed stay
+        self._overlapping: Set[int] = set()  # rooms with stays that overlap each other
+        self._bookings: Dict[int, Booking] = {}  # booking ID -> booking
+        for booking in bookings:
+            self.add_booking(booking)
+
+    # Index
+    def add_booking(self, booking: Booking) -> None:
+        """Indexes a booking and follows its changes."""
+        booking_id = booking.get_booking_id()
+        if booking_id in self._bookings:
+            raise ValueError(f"Booking {booking_id} already added")
+        self._bookings[booking_id] = booking
+        self._index(booking, self._current_span(booking))
+        booking.subscribe(self._on_booking_change)
+
+    def _current_span(self, booking: Booking) -> Optional[Span]:
+        """Returns the stay a booking occupies now, or None if it occupies no managed room."""
+        room = booking.get_room_number()
+        if booking.is_cancelled() or room not in self._calendar:
+            return None
+        return (room, booking.get_check_in_day(),
+                booking.get_check_out_day())
+
+    def _index(self, booking: Booking, span: Optional[Span]) -> None:
+        """Records a booking's stay in its room's calendar."""
+        self._spans[id(booking)] = span
+        if span is not None:
+            room, check_in, check_out = span
+            if room not in self._overlapping and not self._is_free(room, check_in, check_out):
+                self._overlapping.add(room)
+            insort(self._calendar[room], (check_in, check_out, id(booking)))
+
+    def _unindex(self, booking: Booking) -> Optional[Span]:
+        """Removes a booking's stay from the index; returns it."""
+        span = self._spans.pop(id(booking))
+        if span is not None:
+            room, check_in, check_out = span
+            stays = self._calendar[room]
+            del stays[bisect_left(stays, (check_in, check_out, id(booking)))]
+            if room in self._overlapping and not _overlap(stays):
+                self._overlapping.discard(room)
+        return span
+
+    def _on_booking_change(self, changes: list) -> None:
+        """Re-indexes a booking whose stay was changed directly."""
+        if any(field in CALENDAR_FIELDS for _, field, _, _ in changes):
+            booking = changes[0][0]
+            span = self._current_span(booking)
+            if span != self._spans.get(id(booking)):
+                self._unindex(booking)
+                self._index(booking, span)
+
+    def _is_free(self, room: int, check_in: int, check_out: int) -> bool:
+        """Checks if no indexed stay on a room overlaps [check_in, check_out)."""
+        stays = self._calendar[room]
+        position = bisect_left(stays, (check_in,))
+        if position < len(stays) and stays[position][0] < check_out:
+            return False
+        if room in self._overlapping:
+            # Any earlier stay may reach past the latest one's check-out.
+            return all(stay[1] <= check_in for stay in stays[:position])
+        return position == 0 or stays[position - 1][1] <= check_in
+
+    def is_available(self, room_number: int, check_in: str, check_out: str) -> bool:
+        """Checks if a room has no active booking overlapping a stay."""
+        if room_number not in self._calendar:
+            raise ValueError(f"Room {room_number} is not managed by this modifier")
+        start, stop = Day.parse(check_in), Day.parse(check_out)
+        if stop <= start:
+            raise ValueError("Check-out date must be after check-in date")
+        return self._is_free(room_number, start, stop)
+
+    def free_rooms(self, room_numbers: Iterable[int], check_in: str, check_out: str) -> List[int]:
+        """Returns the given rooms that have no active booking overlapping a stay."""
+        start, stop = Day.parse(check_in), Day.parse(check_out)
+        if stop <= start:
+            raise ValueError("Check-out date must be after check-in date")
+        for room_number in room_numbers:
+            if room_number not in self._calendar:
+                raise ValueError(f"Room {room_number} is not managed by this modifier")
+        return [room_number for room_number in room_numbers
+                if self._is_free(room_number, start, stop)]
+
+    def get_booking(self, booking_id: int) -> Booking:
+        """Returns a followed booking by ID."""
+        booking = self._bookings.get(booking_id)
+        if booking is None:
+            raise ValueError(f"Booking {booking_id} not found")
+        return booking
+
+    # Modifications
+    def change_dates(self, booking_id: int, check_in: str, check_out: str) -> None:
+        """Moves a booking to new dates in the same room."""
+        self.modify_many([BookingChange(booking_id, check_in, check_out)])
+
+    def change_room(self, booking_id: int, room_number: int) -> None:
+        """Moves a booking to another room for the same dates."""
+        self.modify_many([BookingChange(booking_id, room_number=room_number)])
+
+    def extend_stay(self, booking_id: int, nights: int) -> None:
+        """Adds nights to the end of a stay (negative to shorten it)."""
+        booking = self.get_booking(booking_id)
+        check_out = booking.get_check_out_day().shift(nights)
+        self.modify_many([BookingChange(booking_id, check_out_date=check_out.isoformat())])
+
+    def modify_many(self, changes: Iterable[BookingChange]) -> None:
+        """
+        Applies a group of changes, all or nothing. Raises ValueError, with
+        no booking changed, if any booking is unknown, cancelled, or would
+        overlap another stay in its new room.
+        """
+        plan: List[Tuple[Booking, Span]] = []
+        seen = set()
+        for change in changes:
+            booking = self.get_booking(change.get_booking_id())
+            if booking.is_cancelled():
+                raise ValueError(f"Booking {change.get_booking_id()} is cancelled")
+            if id(booking) in seen:
+                raise ValueError(f"Booking {change.get_booking_id()} changed twice")
+            seen.add(id(booking))
+            plan.append((booking, self._target(booking, change)))
+        self._apply(plan)
+
+    def _target(self, booking: Booking, change: BookingChange) -> Span:
+        """Returns the stay a booking would occupy after a change."""
+        room = change.get_room_number()
+        if room is None:
+            room = booking.get_room_number()
+        if room not in self._calendar:
+            raise ValueError(f"Room {room} is not managed by this modifier")
+        check_in = (Day.parse(change.get_check_in_date()) if change.get_check_in_date()
+                    else booking.get_check_in_day())
+        check_out = (Day.parse(change.get_check_out_date()) if change.get_check_out_date()
+                     else booking.get_check_out_day())
+        if check_out <= check_in:
+            raise ValueError("Check-out date must be after check-in date")
+        return room, check_in, check_out
+
+    def _apply(self, plan: List[Tuple[Booking, Span]]) -> None:
+        """Re-indexes and updates the planned bookings, or nothing if any stay conflicts."""
+        # Price first: a rate calendar may refuse the new dates.
+        costs = [self._stay_cost(*span) if booking.get_invoice() is not None else None
+                 for booking, span in plan]
+        old_spans = [(booking, self._unindex(booking)) for booking, _ in plan]
+        placed = []
+        try:
+            for booking, span in plan:
+                if not self._is_free(*span):
+                    raise ValueError(f"Room {span[0]} is not free for booking "
+                                     f"{booking.get_booking_id()} from "
+                                     f"{Day(span[1])} to {Day(span[2])}")
+                self._index(booking, span)
+                placed.append(booking)
+        except ValueError:
+            for booking in placed:
+                self._unindex(booking)
+            for booking, span in old_spans:
+                self._index(booking, span)
+            raise
+        with batch_notifications():
+            for (booking, (room, check_in, check_out)), cost in zip(plan, costs):
+                booking.set_room_number(room)
+                booking.set_dates(Day(check_in), Day(check_out))
+                if cost is not None:
+                    booking.get_invoice().set_total_amount(cost)
+
+    def split_stay(self, booking_id: int, split_date: str, new_booking_id: int,
+                   room_number: Optional[int] = None,
+                   invoice_id: Optional[int] = None) -> Booking:
+        """
+        Ends a booking on split_date and books the rest of the stay as a new
+        booking, in another room if room_number is given (e.g. a room move
+        halfway through). If the booking has an invoice, invoice_id is
+        required and the new booking gets its own pending invoice.
+        Returns the new booking.
+        """
+        booking = self.get_booking(booking_id)
+        if booking.is_cancelled():
+            raise ValueError(f"Booking {booking_id} is cancelled")
+        if new_booking_id in self._bookings:
+            raise ValueError(f"Booking {new_booking_id} already added")
+        old_invoice = booking.get_invoice()
+        if old_invoice is not None and invoice_id is None:
+            raise ValueError("An invoice ID is needed for the second part of the stay")
+        room, check_in, check_out = self._target(booking, BookingChange(booking_id))
+        split = Day.parse(split_date)
+        if not check_in < split < check_out:
+            raise ValueError("Split date must fall inside the stay")
+        rest_room = room if room_number is None else room_number
+        if rest_room not in self._calendar:
+            raise ValueError(f"Room {rest_room} is not managed by this modifier")
+        rest_cost = (self._stay_cost(rest_room, split, check_out)
+                     if old_invoice is not None else None)
+        rest = Booking(new_booking_id, booking.get_guest_id(), rest_room,
+                       split_date, booking.get_check_out_date())
+        # The new booking starts out with no indexed stay; _apply places it.
+        self._bookings[new_booking_id] = rest
+        self._spans[id(rest)] = None
+        try:
+            self._apply([(booking, (room, check_in, split)),
+                         (rest, (rest_room, split, check_out))])
+        except ValueError:
+            del self._bookings[new_booking_id]
+            del self._spans[id(rest)]
+            raise
+        if old_invoice is not None:
+            rest.set_invoice(Invoice(invoice_id, rest_cost, 0.0,
+                                     old_invoice.get_payment_method(),
+                                     new_booking_id, "Pending"))
+        rest.subscribe(self._on_booking_change)
+        return rest
+
+    def _stay_cost(self, room: int, check_in: int, check_out: int) -> float:
+        """Returns the price of a stay from the room's rate calendar or nightly price."""
+        calendar = self._rate_calendars.get(room)
+        if calendar is not None:
+            return calendar.stay_cost(Day(check_in).isoformat(),
+                                      Day(check_out).isoformat())
+        return round(self._rooms[room].get_price_per_night() * (check_out - check_in), 2)
@@ -0,0 +1,382 @@
+"""Module for the append-only change log of model mutations with snapshots."""
+
+import importlib
+import itertools
+import os
+import pickle
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from compact_date import Day, Timestamp
+
+# Getter giving the natural ID of each model class.
+ID_GETTERS = (
+    ("Booking", "get_booking_id"),
+    ("Invoice", "get_invoice_id"),
+    ("Feedback", "get_feedback_id"),
+    ("GuestService", "get_service_id"),
+    ("Room", "get_room_number"),
+    ("LoyaltyProgram", "get_guest_id"),
+    ("Guest", "get_guest_id"),
+)
+
+# Date attributes stored as Day/Timestamp ints; logs written before that
+# hold them as strings, so they are converted on recovery.
+COMPACT_ATTRIBUTES = (
+    ("Booking", ("_check_in_date", "_check_out_date"), Day.of),
+    ("Feedback", ("_feedback_date",), Day.of),
+    ("LoyaltyProgram", ("_points_expiry_date",), Day.of),
+    ("GuestService", ("_request_time",), Timestamp.of),
+)
+
+# Attributes that are runtime wiring rather than model state.
+TRANSIENT = frozenset({"_observers"})
+
+# (kind, id) identifies an entity for its whole life in the log.
+EntityKey = Tuple[str, Any]
+# (sequence number, entity key, attribute or None for creation, value)
+Event = Tuple[int, EntityKey, Optional[str], Any]
+
+
+class _Ref:
+    """Placeholder for a reference to another tracked model object."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: EntityKey):
+        self.key = key
+
+    def __reduce__(self):
+        return (_Ref, (self.key,))
+
+
+def entity_key(obj: Any) -> EntityKey:
+    """Returns the (kind, id) key of a model object."""
+    for cls in type(obj).__mro__:
+        for kind, getter in ID_GETTERS:
+            if cls.__name__ == kind:
+                return kind, getattr(obj, getter)()
+    raise TypeError(f"Cannot log changes of {type(obj).__name__} objects")
+
+
+def _normalize_dates(obj: Any) -> None:
+    """Converts date attributes restored in an older text form to Day/Timestamp."""
+    state = obj.__dict__
+    for cls in type(obj).__mro__:
+        for kind, attrs, convert in COMPACT_ATTRIBUTES:
+            if cls.__name__ == kind:
+                for attr in attrs:
+                    if attr in state:
+                        state[attr] = convert(state[attr])
+
+
+class EventLog:
+    """
+    Append-only log of model mutations with periodic snapshots.
+
+    The log subscribes to each tracked object and appends one compact
+    (seq, key, attribute, value) event per field change it is notified of.
+    Events are buffered and written as pickled batches; on the first
+    flush after `snapshot_every` events the full state of every logged
+    entity is written atomically, with the log offset it covers. `recover`
+    loads the latest snapshot and seeks past that offset, so it reads and
+    replays only the events after it however long the log has grown.
+    """
+
+    def __init__(self, log_path: str, snapshot_path: str, batch_size: int = 1024,
+                 snapshot_every: int = 100_000, fsync: bool = False,
+                 position: Optional[Tuple[int, int, int]] = None):
+        """
+        Opens (or creates) the log for appending.
+        - batch_size: Events buffered before a batch is written.
+        - snapshot_every: Events between automatic snapshots; 0 disables them.
+        - fsync: Force batches to disk on every write.
+        - position: (last sequence, end of the intact log, events since the
+          snapshot) when already known from a replay; read from disk if None.
+        """
+        self._log_path = log_path
+        self._snapshot_path = snapshot_path
+        self._batch_size = batch_size
+        self._snapshot_every = snapshot_every
+        self._fsync = fsync
+        self._buffer: List[Event] = []
+        self._tracked: Dict[EntityKey, Any] = {}
+        self._keys: Dict[int, EntityKey] = {}  # id(obj) -> stable key
+        self._listeners: Dict[EntityKey, Callable] = {}
+        if position is None:
+            position = _last_sequence(log_path, snapshot_path)
+        self._seq, end, self._since_snapshot = position
+        if os.path.exists(log_path) and os.path.getsize(log_path) > end:
+            # Drop a torn tail so new batches are not appended behind it.
+            os.truncate(log_path, end)
+        self._file = open(log_path, "ab", buffering=1 << 20)
+
+    def __enter__(self) -> "EventLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_sequence(self) -> int:
+        """Returns the sequence number of the last recorded event."""
+        return self._seq
+
+    def track(self, obj: Any, record_state: bool = True) -> None:
+        """
+        Starts logging mutations of a model object, recording its current state.
+        Untracked model objects it references are tracked along with it.
+        Pass record_state=False for objects just restored by `recover`, whose
+        state the log already holds.
+        """
+        key = entity_key(obj)
+        if key in self._tracked:
+            raise ValueError(f"{key[0]} {key[1]} is already tracked")
+        self._tracked[key] = obj
+        self._keys[id(obj)] = key
+        if record_state:
+            cls = type(obj)
+            self._append(key, None, (cls.__module__, cls.__qualname__, self._state(obj)))
+
+        def on_change(changes: list) -> None:
+            # Log the stored attribute, which may be in a more compact form
+            # (e.g. a Day) than the value passed to observers.
+            state = obj.__dict__
+            for _, field, _, _ in changes:
+                attr = "_" + field
+                self._append(key, attr, self._encode(state[attr]))
+
+        self._listeners[key] = on_change
+        obj.subscribe(on_change)
+
+    def is_tracked(self, obj: Any) -> bool:
+        """Checks if a model object is being logged."""
+        return id(obj) in self._keys
+
+    def get_tracked(self) -> Dict[EntityKey, Any]:
+        """Returns the tracked objects keyed by (kind, id)."""
+        return dict(self._tracked)
+
+    def untrack(self, obj: Any) -> None:
+        """Stops logging mutations of a model object."""
+        key = self._keys.pop(id(obj))
+        del self._tracked[key]
+        obj.unsubscribe(self._listeners.pop(key))
+
+    def _encode(self, value: Any) -> Any:
+        """Replaces references to tracked objects with key placeholders."""
+        if isinstance(value, list):
+            return [self._encode(item) for item in value]
+        if not hasattr(value, "__dict__") or isinstance(value, type):
+            return value
+        key = self._keys.get(id(value))
+        if key is None:
+            try:
+                self.track(value)
+            except TypeError:
+                return value  # not a model object
+            key = self._keys[id(value)]
+        return _Ref(key)
+
+    def _state(self, obj: Any) -> Dict[str, Any]:
+        """Returns the persistent attributes of a model object."""
+        return {attr: self._encode(value) for attr, value in vars(obj).items()
+                if attr not in TRANSIENT}
+
+    def _append(self, key: EntityKey, attr: Optional[str], value: Any) -> None:
+        """Buffers one event, writing the batch and snapshot when due."""
+        self._seq += 1
+        self._buffer.append((self._seq, key, attr, value))
+        self._since_snapshot += 1
+        if len(self._buffer) >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes buffered events to the log file, then a snapshot if one is due."""
+        self._write()
+        if self._snapshot_every and self._since_snapshot >= self._snapshot_every:
+            self.snapshot()
+
+    def _write(self) -> None:
+        """Writes buffered events to the log file as one batch."""
+        if self._buffer:
+            pickle.dump(self._buffer, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+            self._buffer = []
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+
+    def snapshot(self) -> None:
+        """
+        Atomically writes the state of every logged entity: the tracked
+        objects as they are now, the rest as the snapshot and log hold them.
+        """
+        self._write()
+        classes, states, _ = replay(self._log_path, self._snapshot_path)
+        for key, obj in self._tracked.items():
+            classes[key] = (type(obj).__module__, type(obj).__qualname__)
+            states[key] = self._state(obj)
+        payload = {"seq": self._seq, "offset": self._file.tell(),
+                   "classes": classes, "states": states}
+        temp_path = self._snapshot_path + ".tmp"
+        with open(temp_path, "wb") as handle:
+            pickle.dump(payload, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self._snapshot_path)
+        self._since_snapshot = 0
+
+    def close(self) -> None:
+        """Flushes and closes the log file and stops tracking all objects."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+        for obj in list(self._tracked.values()):
+            self.untrack(obj)
+
+
+def _read_batches(log_path: str, offset: int = 0):
+    """
+    Yields (batch, offset after it) for the event batches stored in a log
+    file from `offset` on, stopping at the first torn or unreadable batch.
+    """
+    if not os.path.exists(log_path):
+        return
+    with open(log_path, "rb", buffering=1 << 20) as handle:
+        handle.seek(offset)
+        while True:
+            try:
+                batch = pickle.load(handle)
+            except (EOFError, pickle.UnpicklingError, ValueError, OverflowError,
+                    MemoryError, IndexError, KeyError, TypeError):
+                # End of file, or a torn final batch from a crash mid-write
+                # or garbage after it; everything before it is intact.
+                return
+            if not isinstance(batch, list):
+                return
+            yield batch, handle.tell()
+
+
+def _load_snapshot(snapshot_path: str) -> Dict[str, Any]:
+    """Returns the stored snapshot, or an empty one."""
+    if not os.path.exists(snapshot_path):
+        return {"seq": 0, "offset": 0, "classes": {}, "states": {}}
+    with open(snapshot_path, "rb") as handle:
+        return pickle.load(handle)
+
+
+def _read_tail(log_path: str, snapshot: Dict[str, Any]) -> Tuple[int, Iterator]:
+    """
+    Returns (offset, batches) for the log batches after a snapshot, seeking
+    to the offset stored with it. The log is read from the start instead if
+    it does not continue the snapshot there, e.g. it was replaced since.
+    """
+    offset = snapshot.get("offset", 0)
+    if offset and os.path.exists(log_path):
+        size = os.path.getsize(log_path)
+        if size == offset:
+            return offset, iter(())
+        if size > offset:
+            batches = _read_batches(log_path, offset)
+            first = next(batches, None)
+            if first is not None and first[0] and first[0][0][0] == snapshot["seq"] + 1:
+                return offset, itertools.chain([first], batches)
+            batches.close()
+    return 0, _read_batches(log_path)
+
+
+def _last_sequence(log_path: str, snapshot_path: str) -> Tuple[int, int, int]:
+    """
+    Returns the highest sequence number already persisted, the end of the
+    intact log and the number of events logged since the snapshot.
+    """
+    snapshot = _load_snapshot(snapshot_path)
+    start = last = snapshot["seq"]
+    end, batches = _read_tail(log_path, snapshot)
+    since = 0
+    for batch, end in batches:
+        if batch and batch[-1][0] > start:
+            last = max(last, batch[-1][0])
+            since += sum(1 for event in batch if event[0] > start)
+    return last, end, since
+
+
+def _replay(log_path: str, snapshot_path: str):
+    """Returns (classes, states, position) with position as EventLog takes it."""
+    snapshot = _load_snapshot(snapshot_path)
+    classes = dict(snapshot["classes"])
+    states = {key: dict(state) for key, state in snapshot["states"].items()}
+    start = snapshot["seq"]
+    last = start
+    end, batches = _read_tail(log_path, snapshot)
+    since = 0
+    for batch, end in batches:
+        if not batch or batch[-1][0] <= start:
+            continue  # already covered by the snapshot
+        for seq, key, attr, value in batch:
+            if seq <= start:
+                continue
+            since += 1
+            if attr is None:
+                module, qualname, state = value
+                classes[key] = (module, qualname)
+                states[key] = dict(state)
+            else:
+                states[key][attr] = value
+        last = batch[-1][0]
+    return classes, states, (last, end, since)
+
+
+def replay(log_path: str, snapshot_path: str) -> Tuple[Dict[EntityKey, Tuple[str, str]],
+                                                       Dict[EntityKey, Dict[str, Any]], int]:
+    """
+    Rebuilds raw entity states from the latest snapshot plus the log tail.
+    Returns (classes, states, last sequence number).
+    """
+    classes, states, position = _replay(log_path, snapshot_path)
+    return classes, states, position[0]
+
+
+def _restore(classes: Dict[EntityKey, Tuple[str, str]],
+             states: Dict[EntityKey, Dict[str, Any]]) -> Dict[EntityKey, Any]:
+    """Rebuilds model objects from raw entity states."""
+    objects: Dict[EntityKey, Any] = {}
+    for key, (module, qualname) in classes.items():
+        cls = getattr(importlib.import_module(module), qualname)
+        obj = cls.__new__(cls)
+        objects[key] = obj
+
+    def resolve(value):
+        if isinstance(value, _Ref):
+            return objects[value.key]
+        if isinstance(value, list):
+            return [resolve(item) for item in value]
+        return value
+
+    for key, obj in objects.items():
+        obj.__dict__.update({attr: resolve(value) for attr, value in states[key].items()})
+        _normalize_dates(obj)
+    return objects
+
+
+def recover(log_path: str, snapshot_path: str) -> Dict[EntityKey, Any]:
+    """
+    Restores model objects from the latest snapshot plus the log tail.
+    Returns a dict mapping (kind, id) keys to rebuilt objects.
+    """
+    classes, states, _ = _replay(log_path, snapshot_path)
+    return _restore(classes, states)
+
+
+def open_log(log_path: str, snapshot_path: str,
+             **options) -> Tuple[Dict[EntityKey, Any], EventLog]:
+    """
+    Restores model objects like `recover` and opens the log for appending,
+    reading the snapshot and log once. The restored objects are tracked.
+    Options are passed to EventLog.
+    Returns (objects keyed by (kind, id), EventLog).
+    """
+    classes, states, position = _replay(log_path, snapshot_path)
+    objects = _restore(classes, states)
+    log = EventLog(log_path, snapshot_path, position=position, **options)
+    for obj in objects.values():
+        log.track(obj, record_state=False)
+    return objects, log
@@ -0,0 +1,343 @@
+"""Module for chunked columnar export of bookings, invoices, feedback and services."""
+
+import json
+import os
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from booking import Booking
+from compact_date import EPOCH_ORDINAL
+from feedback import Feedback
+from guest_service import GuestService
+from invoice import Invoice
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency; export is unavailable without it
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency; only the NumPy format is written without it
+    pa = None
+    pq = None
+
+# Rows converted per chunk; memory use is bounded by one chunk plus the
+# string dictionaries.
+DEFAULT_CHUNK_ROWS = 1 << 18
+
+# Bytes reserved for each .npy header so the row count can be filled in
+# after the last chunk; must be a multiple of 64.
+NPY_HEADER_BYTES = 128
+
+MANIFEST = "_schema.json"
+
+# Column kinds and the dtype their data is stored as. "category" and
+# "text" columns hold int32 codes into a dictionary of distinct strings.
+KIND_DTYPES = {"int": "<i8", "float": "<f8", "bool": "|b1", "date": "<M8[D]",
+               "datetime": "<M8[s]", "category": "<i4", "text": "<i4"}
+
+# Table name -> (model class, [(column, getter, kind), ...]).
+TABLES: Dict[str, Tuple[type, List[Tuple[str, str, str]]]] = {
+    "bookings": (Booking, [
+        ("booking_id", "get_booking_id", "int"),
+        ("guest_id", "get_guest_id", "int"),
+        ("room_number", "get_room_number", "int"),
+        ("check_in_date", "get_check_in_day", "date"),
+        ("check_out_date", "get_check_out_day", "date"),
+        ("is_cancelled", "is_cancelled", "bool"),
+    ]),
+    "invoices": (Invoice, [
+        ("invoice_id", "get_invoice_id", "int"),
+        ("booking_id", "get_booking_id", "int"),
+        ("total_amount", "get_total_amount", "float"),
+        ("discounts", "get_discounts", "float"),
+        ("payment_method", "get_payment_method", "category"),
+        ("payment_status", "get_payment_status", "category"),
+    ]),
+    "feedback": (Feedback, [
+        ("feedback_id", "get_feedback_id", "int"),
+        ("guest_id", "get_guest_id", "int"),
+        ("rating", "get_rating", "float"),
+        ("comments", "get_comments", "text"),
+        ("feedback_date", "get_feedback_day", "date"),
+    ]),
+    "services": (GuestService, [
+        ("service_id", "get_service_id", "int"),
+        ("guest_id", "get_guest_id", "int"),
+        ("service_type", "get_service_type", "category"),
+        ("status", "get_status", "category"),
+        ("request_time", "get_request_timestamp", "datetime"),
+    ]),
+}
+
+
+def _require_numpy() -> None:
+    """Raises ImportError if NumPy is missing."""
+    if np is None:
+        raise ImportError("Columnar export needs NumPy (pip install numpy)")
+
+
+def _schema(table: str) -> Tuple[type, List[Tuple[str, str, str]]]:
+    """Returns the model class and columns of a table."""
+    if table not in TABLES:
+        raise ValueError(f"Unknown table '{table}'; expected one of {', '.join(TABLES)}")
+    return TABLES[table]
+
+
+class _Dictionary:
+    """Maps the distinct strings of one column to int codes."""
+
+    def __init__(self):
+        """Initializes an empty dictionary."""
+        self._codes: Dict[str, int] = {}
+        self._values: List[str] = []
+
+    def get_values(self) -> List[str]:
+        """Returns the distinct strings in code order."""
+        return self._values
+
+    def encode(self, values: List[str]) -> List[int]:
+        """Returns the codes of values, adding new values to the dictionary."""
+        codes = list(map(self._codes.get, values))
+        if None in codes:
+            for position, code in enumerate(codes):
+                if code is None:
+                    value = values[position]
+                    code = self._codes.get(value)
+                    if code is None:
+                        code = self._codes[value] = len(self._values)
+                        self._values.append(value)
+                    codes[position] = code
+        return codes
+
+
+def _chunks(objects: Iterable[Any], chunk_rows: int) -> Iterator[List[Any]]:
+    """Yields lists of at most chunk_rows objects."""
+    iterator = iter(objects)
+    chunk = list(islice(iterator, chunk_rows))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunk_rows))
+
+
+class _ColumnEncoder:
+    """Turns chunks of objects into one NumPy array per column."""
+
+    def __init__(self, table: str):
+        """Initializes the encoder for a table."""
+        cls, columns = _schema(table)
+        self._columns = [(name, getattr(cls, getter), kind) for name, getter, kind in columns]
+        self._dictionaries = {name: _Dictionary() for name, _, kind in self._columns
+                              if kind in ("category", "text")}
+
+    def get_dictionary(self, column: str) -> List[str]:
+        """Returns the distinct strings of a category or text column."""
+        return self._dictionaries[column].get_values()
+
+    def encode(self, chunk: List[Any]) -> Dict[str, Any]:
+        """Returns {column: array} for a chunk of objects."""
+        arrays = {}
+        for name, getter, kind in self._columns:
+            dictionary = self._dictionaries.get(name)
+            if kind == "date":  # Day numbers, shifted to the datetime64 epoch
+                days = np.fromiter(map(getter, chunk), "<i8", len(chunk)) - EPOCH_ORDINAL
+                arrays[name] = days.view(KIND_DTYPES[kind])
+            elif kind == "datetime":  # Timestamps are already seconds since the epoch
+                seconds = np.fromiter(map(getter, chunk), "<i8", len(chunk))
+                arrays[name] = seconds.view(KIND_DTYPES[kind])
+            elif dictionary is None:
+                arrays[name] = np.fromiter(map(getter, chunk), KIND_DTYPES[kind], len(chunk))
+            else:
+                arrays[name] = np.array(dictionary.encode(list(map(getter, chunk))),
+                                        dtype=KIND_DTYPES[kind])
+        return arrays
+
+
+def _npy_header(dtype: str, rows: int) -> bytes:
+    """Returns a version 1.0 .npy header of NPY_HEADER_BYTES for a 1-D array."""
+    header = f"{{'descr': '{dtype}', 'fortran_order': False, 'shape': ({rows},), }}"
+    header = header.ljust(NPY_HEADER_BYTES - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin-1")
+
+
+def _write_strings(path: str, values: List[str]) -> None:
+    """Writes a string dictionary as UTF-8 bytes plus int64 offsets (n + 1)."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(path + ".offsets.npy", offsets)
+    np.save(path + ".data.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+class ColumnarExporter:
+    """
+    Exports model objects as typed column files for analysis.
+
+    Each table goes to its own directory with one .npy file per column
+    and a _schema.json manifest. Integers and floats are 64-bit, dates
+    are datetime64[D], request times datetime64[s] and flags booleans.
+    String columns are dictionary-encoded: int32 codes, plus the distinct
+    strings as one UTF-8 byte array and int64 offsets. All files are
+    plain .npy so they memory-map back in (see load_table); .npz
+    archives cannot be mapped.
+
+    Objects are read in chunks of chunk_rows and each chunk is appended
+    to the column files, so memory is bounded by one chunk and the string
+    dictionaries. Headers reserve room for the row count, which is filled
+    in after the last chunk. With pyarrow installed, export_parquet()
+    writes the same columns as a Parquet file, one row group per chunk.
+    """
+
+    def __init__(self, output_dir: str, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        """Initializes the exporter for an output directory and chunk size."""
+        _require_numpy()
+        if chunk_rows <= 0:
+            raise ValueError("Chunk rows must be positive")
+        self._output_dir = output_dir
+        self._chunk_rows = chunk_rows
+
+    def get_output_dir(self) -> str:
+        """Returns the directory tables are written to."""
+        return self._output_dir
+
+    def export(self, table: str, objects: Iterable[Any]) -> int:
+        """Writes a table's column files; returns the number of rows."""
+        _, columns = _schema(table)
+        encoder = _ColumnEncoder(table)
+        directory = os.path.join(self._output_dir, table)
+        os.makedirs(directory, exist_ok=True)
+        files = {name: open(os.path.join(directory, name + ".npy"), "wb")
+                 for name, _, _ in columns}
+        rows = 0
+        try:
+            for name, _, kind in columns:
+                files[name].write(_npy_header(KIND_DTYPES[kind], 0))
+            for chunk in _chunks(objects, self._chunk_rows):
+                for name, array in encoder.encode(chunk).items():
+                    array.tofile(files[name])
+                rows += len(chunk)
+            for name, _, kind in columns:
+                files[name].seek(0)
+                files[name].write(_npy_header(KIND_DTYPES[kind], rows))
+        finally:
+            for out in files.values():
+                out.close()
+        for name, _, kind in columns:
+            if kind in ("category", "text"):
+                _write_strings(os.path.join(directory, name), encoder.get_dictionary(name))
+        manifest = {"table": table, "rows": rows,
+                    "columns": [{"name": name, "kind": kind} for name, _, kind in columns]}
+        with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as out:
+            json.dump(manifest, out, indent=1)
+        return rows
+
+    def export_parquet(self, table: str, objects: Iterable[Any]) -> int:
+        """
+        Writes a table as <output_dir>/<table>.parquet with pyarrow; returns
+        the number of rows. String columns use Parquet dictionary encoding.
+        """
+        if pa is None:
+            raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+        _, columns = _schema(table)
+        encoder = _ColumnEncoder(table)
+        os.makedirs(self._output_dir, exist_ok=True)
+        writer = None
+        rows = 0
+        try:
+            for chunk in _chunks(objects, self._chunk_rows):
+                arrays = encoder.encode(chunk)
+                batch = {}
+                for name, _, kind in columns:
+                    if kind in ("category", "text"):
+                        strings = np.array(encoder.get_dictionary(name), dtype=object)
+                        batch[name] = pa.array(strings[arrays[name]], type=pa.string())
+                    else:
+                        batch[name] = pa.array(arrays[name])
+                record = pa.table(batch)
+                if writer is None:
+                    writer = pq.ParquetWriter(os.path.join(self._output_dir, table + ".parquet"),
+                                              record.schema)
+                writer.write_table(record)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            raise ValueError(f"No rows to write for table '{table}'")
+        return rows
+
+
+class ColumnarTable:
+    """A table read back from ColumnarExporter files."""
+
+    def __init__(self, directory: str, manifest: Dict[str, Any], arrays: Dict[str, Any],
+                 strings: Dict[str, Tuple[Any, Any]]):
+        """Initializes the table from its manifest, column arrays and string dictionaries."""
+        self._directory = directory
+        self._rows = manifest["rows"]
+        self._kinds = {column["name"]: column["kind"] for column in manifest["columns"]}
+        self._arrays = arrays
+        self._strings = strings
+
+    def get_row_count(self) -> int:
+        """Returns the number of rows."""
+        return self._rows
+
+    def get_column_names(self) -> List[str]:
+        """Returns the column names in schema order."""
+        return list(self._kinds)
+
+    def get_kind(self, name: str) -> str:
+        """Returns a column's kind ('int', 'float', 'date', 'category', ...)."""
+        self._check(name)
+        return self._kinds[name]
+
+    def column(self, name: str) -> Any:
+        """Returns a column's array; the int32 codes for category and text columns."""
+        self._check(name)
+        return self._arrays[name]
+
+    def dictionary(self, name: str) -> List[str]:
+        """Returns the distinct strings of a category or text column, in code order."""
+        self._check(name)
+        if name not in self._strings:
+            raise ValueError(f"Column '{name}' is not a string column")
+        offsets, data = self._strings[name]
+        raw = data.tobytes()
+        return [raw[offsets[index]:offsets[index + 1]].decode("utf-8")
+                for index in range(len(offsets) - 1)]
+
+    def strings(self, name: str) -> Any:
+        """Returns a string column decoded as an object array."""
+        return np.array(self.dictionary(name), dtype=object)[self.column(name)]
+
+    def _check(self, name: str) -> None:
+        """Verifies a column exists."""
+        if name not in self._kinds:
+            raise ValueError(f"No column '{name}' in {self._directory}")
+
+
+def load_table(output_dir: str, table: str, mmap: bool = True) -> ColumnarTable:
+    """
+    Reads a table written by ColumnarExporter.export. With mmap the
+    column files are memory-mapped read-only instead of loaded.
+    """
+    _require_numpy()
+    directory = os.path.join(output_dir, table)
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as source:
+            manifest = json.load(source)
+    except (OSError, json.JSONDecodeError) as error:
+        raise ValueError(f"Cannot read table {directory}: {error}")
+    mode = "r" if mmap else None
+    arrays = {}
+    strings = {}
+    for column in manifest["columns"]:
+        path = os.path.join(directory, column["name"])
+        arrays[column["name"]] = np.load(path + ".npy", mmap_mode=mode)
+        if column["kind"] in ("category", "text"):
+            strings[column["name"]] = (np.load(path + ".offsets.npy", mmap_mode=mode),
+                                       np.load(path + ".data.npy", mmap_mode=mode))
+    return ColumnarTable(directory, manifest, arrays, strings)
@@ -0,0 +1,155 @@
+"""Module for compact, ordered date and time values stored as plain integers."""
+
+from datetime import date, datetime
+from typing import Any, Dict
+
+DATE_ERROR = "Date must be in YYYY-MM-DD format"
+TIME_ERROR = "Time must be in YYYY-MM-DD HH:MM:SS format"
+
+# Day number of 1970-01-01, the origin of Timestamp.
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+SECONDS_PER_DAY = 86400
+
+# Text -> Day and Day -> text, so each distinct day is parsed and
+# formatted once and equal days share one object.
+_PARSED: Dict[str, "Day"] = {}
+_TEXT: Dict[int, str] = {}
+
+
+class Day(int):
+    """
+    A calendar day stored as its day number (date.toordinal()).
+
+    Days are ints: they hash, order and subtract like their day numbers,
+    so stays can be compared and measured without parsing, and they use
+    no more memory than an int. str() gives the YYYY-MM-DD text back.
+    Parsed days are interned, so bookings on the same dates share one
+    object. Arithmetic returns plain ints; use shift() for a Day.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, text: str) -> "Day":
+        """Returns the Day of a YYYY-MM-DD string."""
+        day = _PARSED.get(text) if isinstance(text, str) else None
+        if day is None:
+            if not isinstance(text, str) or len(text) != 10:
+                raise ValueError(DATE_ERROR)
+            try:
+                day = cls(date.fromisoformat(text).toordinal())
+            except ValueError:
+                raise ValueError(DATE_ERROR)
+            _PARSED[text] = day
+            _TEXT[day] = text
+        return day
+
+    @classmethod
+    def of(cls, value: Any) -> "Day":
+        """Returns a Day from a Day, a YYYY-MM-DD string or a date."""
+        if type(value) is cls:
+            return value
+        if isinstance(value, str):
+            return cls.parse(value)
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return cls(value.toordinal())
+        raise ValueError(DATE_ERROR)
+
+    @classmethod
+    def today(cls) -> "Day":
+        """Returns today's Day."""
+        return cls(date.today().toordinal())
+
+    def shift(self, days: int) -> "Day":
+        """Returns the Day `days` later (earlier if negative)."""
+        return Day(int(self) + days)
+
+    def to_date(self) -> date:
+        """Returns the day as a datetime.date."""
+        return date.fromordinal(self)
+
+    def isoformat(self) -> str:
+        """Returns the day as YYYY-MM-DD."""
+        text = _TEXT.get(self)
+        if text is None:
+            text = _TEXT[self] = date.fromordinal(self).isoformat()
+        return text
+
+    __str__ = isoformat
+
+    def __format__(self, spec: str) -> str:
+        """Formats as YYYY-MM-DD, or with strftime codes if a spec is given."""
+        return format(date.fromordinal(self), spec) if spec else self.isoformat()
+
+    def __repr__(self) -> str:
+        """Returns a representation that shows the date."""
+        return f"Day('{self.isoformat()}')"
+
+
+class Timestamp(int):
+    """
+    A date and time to the second, stored as seconds since 1970-01-01
+    00:00:00 in the same (naive, local) clock as the text it came from.
+    Like Day it hashes and orders as an int; str() gives back the
+    YYYY-MM-DD HH:MM:SS text.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, text: str) -> "Timestamp":
+        """Returns the Timestamp of a YYYY-MM-DD HH:MM:SS string."""
+        if not isinstance(text, str) or len(text) != 19 or text[10] != " ":
+            raise ValueError(TIME_ERROR)
+        try:
+            day = Day.parse(text[:10])
+            hours, minutes, seconds = int(text[11:13]), int(text[14:16]), int(text[17:19])
+        except ValueError:
+            raise ValueError(TIME_ERROR)
+        if (text[13] != ":" or text[16] != ":" or not 0 <= hours < 24
+                or not 0 <= minutes < 60 or not 0 <= seconds < 60):
+            raise ValueError(TIME_ERROR)
+        return cls((day - EPOCH_ORDINAL) * SECONDS_PER_DAY
+                   + hours * 3600 + minutes * 60 + seconds)
+
+    @classmethod
+    def of(cls, value: Any) -> "Timestamp":
+        """Returns a Timestamp from a Timestamp, a YYYY-MM-DD HH:MM:SS string or a datetime."""
+        if type(value) is cls:
+            return value
+        if isinstance(value, str):
+            return cls.parse(value)
+        if isinstance(value, datetime):
+            return cls((value.toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY
+                       + value.hour * 3600 + value.minute * 60 + value.second)
+        raise ValueError(TIME_ERROR)
+
+    def get_day(self) -> Day:
+        """Returns the day of the timestamp."""
+        return Day(self // SECONDS_PER_DAY + EPOCH_ORDINAL)
+
+    def get_hour(self) -> int:
+        """Returns the hour of the day (0-23)."""
+        return self % SECONDS_PER_DAY // 3600
+
+    def to_datetime(self) -> datetime:
+        """Returns the timestamp as a naive datetime."""
+        seconds = self % SECONDS_PER_DAY
+        return datetime.combine(self.get_day().to_date(), datetime.min.time()).replace(
+            hour=seconds // 3600, minute=seconds % 3600 // 60, second=seconds % 60)
+
+    def isoformat(self) -> str:
+        """Returns the timestamp as YYYY-MM-DD HH:MM:SS."""
+        seconds = self % SECONDS_PER_DAY
+        return (f"{self.get_day().isoformat()} {seconds // 3600:02d}:"
+                f"{seconds % 3600 // 60:02d}:{seconds % 60:02d}")
+
+    __str__ = isoformat
+
+    def __format__(self, spec: str) -> str:
+        """Formats as YYYY-MM-DD HH:MM:SS, or with strftime codes if a spec is given."""
+        return format(self.to_datetime(), spec) if spec else self.isoformat()
+
+    def __repr__(self) -> str:
+        """Returns a representation that shows the time."""
+        return f"Timestamp('{self.isoformat()}')"
@@ -33,7 +33,10 @@ class DeluxeRoom(Room):
 
     def set_view(self, view: str) -> None:
         """Sets view type (UML-compliant setter)."""
+        old = self._view
         self._view = view
+        if self._observers:
+            self._notify("view", old, view)
 
     def is_jacuzzi(self) -> bool:
         """Returns jacuzzi status (UML-compliant method)."""
@@ -41,7 +44,10 @@ class DeluxeRoom(Room):
 
     def set_jacuzzi(self, has_jacuzzi: bool) -> None:
         """Sets jacuzzi status (UML-compliant setter)."""
+        old = self._jacuzzi
         self._jacuzzi = has_jacuzzi
+        if self._observers:
+            self._notify("jacuzzi", old, has_jacuzzi)
 
     def is_breakfast_included(self) -> bool:
         """Returns breakfast status (UML-compliant method)."""
@@ -49,7 +55,10 @@ class DeluxeRoom(Room):
 
     def set_breakfast_included(self, includes_breakfast: bool) -> None:
         """Sets breakfast status (UML-compliant setter)."""
+        old = self._breakfast_included
         self._breakfast_included = includes_breakfast
+        if self._observers:
+            self._notify("breakfast_included", old, includes_breakfast)
 
     # NON-UML ELEMENTS (justified additions)
     def __str__(self) -> str:
@@ -0,0 +1,214 @@
+"""Module for occupancy- and lead-time-based room pricing over a date horizon."""
+
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from deluxe_room import DeluxeRoom
+from observable import batch_notifications
+from room import Room
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency; a pure-Python path is used instead
+    np = None
+
+# (x, factor) points of a piecewise-linear curve; x must be increasing.
+Curve = Sequence[Tuple[float, float]]
+
+# (room type, view, jacuzzi, breakfast included, base price) identifies one
+# row of the price matrix; plain rooms have no view and no extras.
+RoomTypeKey = Tuple[str, str, bool, bool, float]
+
+
+def room_type_key(room: Room) -> RoomTypeKey:
+    """Returns the pricing row key for a room."""
+    if isinstance(room, DeluxeRoom):
+        return (room.get_room_type(), room.get_view(), room.is_jacuzzi(),
+                room.is_breakfast_included(), room.get_price_per_night())
+    return (room.get_room_type(), "", False, False, room.get_price_per_night())
+
+
+def _interpolate(curve: Curve, x: float) -> float:
+    """Evaluates a piecewise-linear curve, holding the end values outside it."""
+    xs = [point[0] for point in curve]
+    i = bisect_right(xs, x)
+    if i == 0:
+        return curve[0][1]
+    if i == len(curve):
+        return curve[-1][1]
+    (x0, y0), (x1, y1) = curve[i - 1], curve[i]
+    return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+
+class PricingRules:
+    """
+    Represents the configurable curves and premiums used to derive prices.
+    """
+
+    def __init__(self,
+                 occupancy_curve: Curve = ((0.0, 0.85), (0.5, 1.0), (0.8, 1.2), (1.0, 1.5)),
+                 lead_time_curve: Curve = ((0, 1.15), (7, 1.0), (60, 0.95), (365, 0.9)),
+                 view_premiums: Optional[Dict[str, float]] = None,
+                 jacuzzi_premium: float = 1.10, breakfast_premium: float = 1.05,
+                 min_factor: float = 0.7, max_factor: float = 2.0):
+        """
+        Initializes PricingRules with:
+        - occupancy_curve: Factor by forecast occupancy (0.0-1.0).
+        - lead_time_curve: Factor by days between today and the stay date.
+        - view_premiums: Factor per DeluxeRoom view; unknown views get 1.0.
+        - jacuzzi_premium: Factor for rooms with a jacuzzi.
+        - breakfast_premium: Factor for rooms with breakfast included.
+        - min_factor, max_factor: Bounds on the final price relative to the base price.
+        """
+        for name, curve in (("Occupancy", occupancy_curve), ("Lead time", lead_time_curve)):
+            xs = [point[0] for point in curve]
+            if not xs or any(a >= b for a, b in zip(xs, xs[1:])):
+                raise ValueError(f"{name} curve needs increasing x values")
+        if not 0 < min_factor <= max_factor:
+            raise ValueError("Price factor bounds must satisfy 0 < min_factor <= max_factor")
+        self._occupancy_curve = tuple(occupancy_curve)
+        self._lead_time_curve = tuple(lead_time_curve)
+        self._view_premiums = dict(view_premiums if view_premiums is not None
+                                   else {"Ocean": 1.15, "Mountain": 1.08, "City": 1.03})
+        self._jacuzzi_premium = jacuzzi_premium
+        self._breakfast_premium = breakfast_premium
+        self._min_factor = min_factor
+        self._max_factor = max_factor
+
+    def get_occupancy_curve(self) -> Curve:
+        """Returns the occupancy curve."""
+        return self._occupancy_curve
+
+    def get_lead_time_curve(self) -> Curve:
+        """Returns the lead-time curve."""
+        return self._lead_time_curve
+
+    def get_bounds(self) -> Tuple[float, float]:
+        """Returns the (min, max) factor bounds."""
+        return self._min_factor, self._max_factor
+
+    def attribute_factor(self, key: RoomTypeKey) -> float:
+        """Returns the combined view, jacuzzi and breakfast factor for a room type."""
+        _, view, jacuzzi, breakfast, _ = key
+        factor = self._view_premiums.get(view, 1.0)
+        if jacuzzi:
+            factor *= self._jacuzzi_premium
+        if breakfast:
+            factor *= self._breakfast_premium
+        return factor
+
+
+class DynamicPricingEngine:
+    """
+    Computes a price for every room type and every day of a horizon.
+
+    Rooms are grouped into room types by room_type_key, and each type's
+    base price is the price the rooms had when they were added, so
+    applying prices never compounds. The price for type t on day d is
+
+        base[t] * attributes[t] * occupancy(forecast[t, d]) * lead_time(d)
+
+    clipped to the rule bounds and rounded to cents. With NumPy installed
+    the whole matrix is computed in a few array operations and returned as
+    an ndarray; without it the same values come back as a list of rows.
+    """
+
+    def __init__(self, rules: Optional[PricingRules] = None, horizon_days: int = 365):
+        """Initializes an engine with the pricing rules and the number of days priced."""
+        if horizon_days <= 0:
+            raise ValueError("Horizon must be at least one day")
+        self._rules = rules if rules is not None else PricingRules()
+        self._horizon_days = horizon_days
+        self._type_rows: Dict[RoomTypeKey, int] = {}
+        self._rooms: List[Tuple[Room, int]] = []  # (room, row)
+        self._known: Set[int] = set()
+
+    def add_rooms(self, rooms: Iterable[Room]) -> None:
+        """Registers rooms, capturing their current price as the base price."""
+        for room in rooms:
+            if id(room) in self._known:
+                raise ValueError(f"Room {room.get_room_number()} already added")
+            self._known.add(id(room))
+            row = self._type_rows.setdefault(room_type_key(room), len(self._type_rows))
+            self._rooms.append((room, row))
+
+    def get_room_types(self) -> List[RoomTypeKey]:
+        """Returns the room types in price matrix row order."""
+        return list(self._type_rows)
+
+    def get_horizon_days(self) -> int:
+        """Returns the number of days in the price matrix."""
+        return self._horizon_days
+
+    def price_matrix(self, occupancy: Any) -> Any:
+        """
+        Returns the price matrix, one row per room type and one column per
+        day starting today.
+        - occupancy: Forecast occupancy (0.0-1.0), either per day for all
+          types (length horizon_days) or per type and day (rows x horizon_days).
+        """
+        if not self._type_rows:
+            raise ValueError("No rooms added")
+        if np is not None:
+            return self._price_matrix_numpy(occupancy)
+        return self._price_matrix_python(occupancy)
+
+    def _price_matrix_numpy(self, occupancy: Any) -> Any:
+        """Computes the price matrix with NumPy broadcasting."""
+        rules = self._rules
+        keys = self.get_room_types()
+        days = self._horizon_days
+        forecast = np.asarray(occupancy, dtype=float)
+        if forecast.shape not in ((days,), (len(keys), days)):
+            raise ValueError(f"Occupancy must have shape ({days},) or ({len(keys)}, {days})")
+        forecast = np.broadcast_to(forecast, (len(keys), days))
+        base = np.array([key[4] for key in keys], dtype=float)[:, None]
+        attributes = np.array([rules.attribute_factor(key) for key in keys])[:, None]
+        occ_x, occ_y = zip(*rules.get_occupancy_curve())
+        lead_x, lead_y = zip(*rules.get_lead_time_curve())
+        lead = np.interp(np.arange(days, dtype=float), lead_x, lead_y)[None, :]
+        factors = attributes * np.interp(forecast, occ_x, occ_y) * lead
+        low, high = rules.get_bounds()
+        return np.round(base * np.clip(factors, low, high), 2)
+
+    def _price_matrix_python(self, occupancy: Any) -> List[List[float]]:
+        """Computes the price matrix row by row without NumPy."""
+        rules = self._rules
+        keys = self.get_room_types()
+        days = self._horizon_days
+        forecast = list(occupancy)
+        per_day = len(forecast) == days and not isinstance(forecast[0], (list, tuple))
+        if not per_day and (len(forecast) != len(keys)
+                            or any(len(row) != days for row in forecast)):
+            raise ValueError(f"Occupancy must have shape ({days},) or ({len(keys)}, {days})")
+        lead = [_interpolate(rules.get_lead_time_curve(), day) for day in range(days)]
+        occupancy_curve = rules.get_occupancy_curve()
+        low, high = rules.get_bounds()
+        shared = [_interpolate(occupancy_curve, value) for value in forecast] if per_day else None
+        matrix = []
+        for row, key in enumerate(keys):
+            base = key[4]
+            attributes = rules.attribute_factor(key)
+            occupancy_factors = shared or [_interpolate(occupancy_curve, value)
+                                           for value in forecast[row]]
+            matrix.append([round(base * min(max(attributes * occ * lead_factor, low), high), 2)
+                           for occ, lead_factor in zip(occupancy_factors, lead)])
+        return matrix
+
+    def apply_prices(self, matrix: Any, day: int = 0) -> int:
+        """
+        Sets every added room's price per night to its type's price on the
+        given day of the matrix, in one notification batch.
+        Returns the number of rooms whose price changed.
+        """
+        if not 0 <= day < self._horizon_days:
+            raise ValueError(f"Day must be between 0 and {self._horizon_days - 1}")
+        column = [float(matrix[row][day]) for row in range(len(self._type_rows))]
+        changed = 0
+        with batch_notifications():
+            for room, row in self._rooms:
+                price = column[row]
+                if room.get_price_per_night() != price:
+                    room.set_price_per_night(price)
+                    changed += 1
+        return changed
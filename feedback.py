@@ -1,8 +1,9 @@
 """Module for the Feedback class, handling guest feedback."""
 
-from datetime import datetime
+from compact_date import Day
+from observable import Observable
 
-class Feedback:
+class Feedback(Observable):
     """
     Represents guest feedback.
     """
@@ -23,7 +24,7 @@ class Feedback:
         self._rating = rating
         self._comments = comments
         self._guest_id = guest_id
-        self._feedback_date = feedback_date
+        self._feedback_date = Day.of(feedback_date)
 
     # Getters and Setters
     def get_feedback_id(self) -> int:
@@ -32,7 +33,10 @@ class Feedback:
 
     def set_feedback_id(self, feedback_id: int) -> None:
         """Sets the feedback ID."""
+        old = self._feedback_id
         self._feedback_id = feedback_id
+        if self._observers:
+            self._notify("feedback_id", old, feedback_id)
 
     def get_rating(self) -> float:
         """Returns the rating."""
@@ -40,7 +44,10 @@ class Feedback:
 
     def set_rating(self, rating: float) -> None:
         """Sets the rating."""
+        old = self._rating
         self._rating = rating
+        if self._observers:
+            self._notify("rating", old, rating)
 
     def get_comments(self) -> str:
         """Returns the comments."""
@@ -48,7 +55,10 @@ class Feedback:
 
     def set_comments(self, comments: str) -> None:
         """Sets the comments."""
+        old = self._comments
         self._comments = comments
+        if self._observers:
+            self._notify("comments", old, comments)
 
     def get_guest_id(self) -> int:
         """Returns the guest ID."""
@@ -56,15 +66,26 @@ class Feedback:
 
     def set_guest_id(self, guest_id: int) -> None:
         """Sets the guest ID."""
+        old = self._guest_id
         self._guest_id = guest_id
+        if self._observers:
+            self._notify("guest_id", old, guest_id)
 
     def get_feedback_date(self) -> str:
         """Returns the feedback date."""
+        return self._feedback_date.isoformat()
+
+    def get_feedback_day(self) -> Day:
+        """Returns the feedback date as a Day."""
         return self._feedback_date
 
     def set_feedback_date(self, date: str) -> None:
         """Sets the feedback date."""
-        self._feedback_date = date
+        day = Day.of(date)
+        old = self._feedback_date
+        self._feedback_date = day
+        if self._observers:
+            self._notify("feedback_date", str(old), str(day))
 
     # UML-REQUIRED METHODS
     def validate_rating(self) -> None:
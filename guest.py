@@ -1,15 +1,18 @@
 """Module for the Guest class, representing a hotel guest with booking history."""
 
-from typing import List, Dict
+from typing import Dict, List, Optional
 from booking import Booking
+from observable import Observable
+from profiling import profiled
 
-class Guest:
+class Guest(Observable):
     """
     Represents a hotel guest, storing their basic information and booking history.
     """
 
     def __init__(self, guest_id: int, name: str, contact_info: str,
-                 loyalty_status: str = "Basic", reservation_history: List[Booking] = []):
+                 loyalty_status: str = "Basic",
+                 reservation_history: Optional[List[Booking]] = None):
         """
         Initializes a Guest object with:
         - guest_id: Unique identifier for the guest.
@@ -24,7 +27,9 @@ class Guest:
         self._contact_info = contact_info
         self._loyalty_status = loyalty_status
         # Store the guest's booking history.
-        self._reservation_history: List[Booking] = reservation_history
+        # A fresh list per guest; a shared default would mix guests' histories.
+        self._reservation_history: List[Booking] = (
+            reservation_history if reservation_history is not None else [])
 
     # Getter and setter methods for guest attributes.
     def get_guest_id(self) -> int:
@@ -33,7 +38,10 @@ class Guest:
 
     def set_guest_id(self, guest_id: int) -> None:
         """Sets the guest's unique ID."""
+        old = self._guest_id
         self._guest_id = guest_id
+        if self._observers:
+            self._notify("guest_id", old, guest_id)
 
     def get_name(self) -> str:
         """Returns the guest's name."""
@@ -41,7 +49,10 @@ class Guest:
 
     def set_name(self, name: str) -> None:
         """Sets the guest's name."""
+        old = self._name
         self._name = name
+        if self._observers:
+            self._notify("name", old, name)
 
     def get_contact_info(self) -> str:
         """Returns the guest's contact information."""
@@ -49,7 +60,10 @@ class Guest:
 
     def set_contact_info(self, contact_info: str) -> None:
         """Sets the guest's contact information."""
+        old = self._contact_info
         self._contact_info = contact_info
+        if self._observers:
+            self._notify("contact_info", old, contact_info)
 
     def get_loyalty_status(self) -> str:
         """Returns the guest's loyalty status."""
@@ -57,7 +71,10 @@ class Guest:
 
     def set_loyalty_status(self, loyalty_status: str) -> None:
         """Sets the guest's loyalty status."""
+        old = self._loyalty_status
         self._loyalty_status = loyalty_status
+        if self._observers:
+            self._notify("loyalty_status", old, loyalty_status)
 
     def get_reservation_history(self) -> List[Booking]:
         """Returns the guest's booking history."""
@@ -65,17 +82,24 @@ class Guest:
 
     def set_reservation_history(self, history: List[Booking]) -> None:
         """Sets the guest's booking history."""
+        old = self._reservation_history
         self._reservation_history = history
+        if self._observers:
+            self._notify("reservation_history", old, history)
 
     # Functional methods for guest operations.
     def upgrade_loyalty_status(self, new_status: str) -> None:
         """Upgrades the guest's loyalty tier to a new status."""
-        self._loyalty_status = new_status
+        self.set_loyalty_status(new_status)
 
     def add_reservation(self, booking: Booking) -> None:
         """Adds a new booking to the guest's reservation history."""
         self._reservation_history.append(booking)
+        if self._observers:
+            self._notify("reservation_history", self._reservation_history[:-1],
+                         self._reservation_history)
 
+    @profiled("guest_total_spent")
     def get_total_spent(self, room_prices: Dict[int, float]) -> float:
         """
         Calculates the total amount spent by the guest on their bookings.
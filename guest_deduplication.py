@@ -0,0 +1,295 @@
+"""Module for finding duplicate Guest records with blocking and MinHash/LSH."""
+
+import hashlib
+import random
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from guest import Guest
+from guest_directory import normalize_contact, normalize_text
+from profiling import profiled
+
+try:
+    import numpy as np
+except ImportError:  # grouping falls back to a pure-Python sort
+    np = None
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# (guest_id, normalized name, normalized contact)
+GuestRecord = Tuple[int, str, str]
+
+# Block keys of one kind (the contact, or one LSH band) for a run of guests:
+# parallel arrays of 64-bit keys and guest IDs.
+KeyColumn = Tuple[array, array]
+
+
+def shingles(text: str, k: int = 3) -> Set[str]:
+    """Returns the character k-shingles of a string, padded at both ends."""
+    padded = f" {text} "
+    if len(padded) <= k:
+        return {padded}
+    return {padded[i:i + k] for i in range(len(padded) - k + 1)}
+
+
+def jaccard(first: Set[str], second: Set[str]) -> float:
+    """Returns the Jaccard similarity of two shingle sets."""
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures and LSH band keys for shingle sets.
+    With `bands` bands of `rows` rows, pairs with Jaccard similarity s
+    collide in at least one band with probability 1 - (1 - s^rows)^bands.
+    """
+
+    def __init__(self, bands: int = 16, rows: int = 4, seed: int = 42):
+        """Initializes the hash family with a fixed seed for reproducible runs."""
+        self._bands = bands
+        self._rows = rows
+        rng = random.Random(seed)
+        count = bands * rows
+        self._coefficients = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                              for _ in range(count)]
+
+    def signature(self, shingle_set: Set[str]) -> List[int]:
+        """
+        Returns the MinHash signature of a shingle set.
+        crc32 is used rather than hash() so values agree across worker processes.
+        """
+        prime = _MERSENNE_PRIME
+        hashed = [zlib.crc32(shingle.encode()) for shingle in shingle_set]
+        return [min(((a * x + b) % prime) & _MAX_HASH for x in hashed)
+                for a, b in self._coefficients]
+
+    def band_keys(self, signature: List[int]) -> List[int]:
+        """
+        Returns one 64-bit bucket key per band of a signature. Tuples of ints
+        hash the same in every process, so workers agree on the keys.
+        """
+        rows = self._rows
+        return [hash((band, *signature[band * rows:(band + 1) * rows]))
+                for band in range(self._bands)]
+
+
+def contact_key(contact: str) -> int:
+    """Returns a 64-bit bucket key for a normalized contact."""
+    digest = hashlib.blake2b(contact.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class MergeProposal:
+    """
+    Represents a proposal to merge a duplicate guest into a primary guest.
+    """
+
+    def __init__(self, primary_id: int, duplicate_id: int, score: float,
+                 name_similarity: float, contact_similarity: float):
+        """
+        Initializes a MergeProposal with:
+        - primary_id: Guest that should survive the merge.
+        - duplicate_id: Guest that should be merged into the primary.
+        - score: Combined similarity score (0.0 to 1.0).
+        - name_similarity: Jaccard similarity of the normalized names.
+        - contact_similarity: Similarity of the normalized contacts.
+        """
+        self._primary_id = primary_id
+        self._duplicate_id = duplicate_id
+        self._score = score
+        self._name_similarity = name_similarity
+        self._contact_similarity = contact_similarity
+
+    def get_primary_id(self) -> int:
+        """Returns the ID of the surviving guest."""
+        return self._primary_id
+
+    def get_duplicate_id(self) -> int:
+        """Returns the ID of the guest to merge away."""
+        return self._duplicate_id
+
+    def get_score(self) -> float:
+        """Returns the combined similarity score."""
+        return self._score
+
+    def get_name_similarity(self) -> float:
+        """Returns the name similarity."""
+        return self._name_similarity
+
+    def get_contact_similarity(self) -> float:
+        """Returns the contact similarity."""
+        return self._contact_similarity
+
+    def __str__(self) -> str:
+        """Returns a string representation of the proposal."""
+        return (f"Merge Guest {self._duplicate_id} into Guest {self._primary_id}: "
+                f"Score: {self._score:.2f} (Name: {self._name_similarity:.2f}, "
+                f"Contact: {self._contact_similarity:.2f})")
+
+
+# Worker functions live at module level so ProcessPoolExecutor can pickle them.
+def _band_keys_chunk(args: Tuple[List[GuestRecord], int, int]) -> List[KeyColumn]:
+    """
+    Computes the blocking keys for a chunk of guest records: the contact
+    column first, then one column per LSH band.
+    """
+    records, bands, rows = args
+    hasher = MinHasher(bands, rows)
+    columns = [(array("q"), array("q")) for _ in range(bands + 1)]
+    for guest_id, name, contact in records:
+        if contact:
+            columns[0][0].append(contact_key(contact))
+            columns[0][1].append(guest_id)
+        if name:
+            for band, key in enumerate(hasher.band_keys(hasher.signature(shingles(name))), 1):
+                columns[band][0].append(key)
+                columns[band][1].append(guest_id)
+    return columns
+
+
+def _score_chunk(args: Tuple[List[Tuple[GuestRecord, GuestRecord]], float]) -> List[Tuple[int, int, float, float, float]]:
+    """Scores a chunk of candidate pairs, keeping those above the threshold."""
+    pairs, threshold = args
+    cache: Dict[str, Set[str]] = {}
+
+    def cached_shingles(text: str) -> Set[str]:
+        found = cache.get(text)
+        if found is None:
+            found = cache[text] = shingles(text)
+        return found
+
+    result = []
+    for (id_a, name_a, contact_a), (id_b, name_b, contact_b) in pairs:
+        name_sim = jaccard(cached_shingles(name_a), cached_shingles(name_b))
+        if not contact_a or not contact_b:
+            contact_sim = 0.0  # a missing contact is no evidence either way
+        elif contact_a == contact_b:
+            contact_sim = 1.0
+        else:
+            contact_sim = jaccard(cached_shingles(contact_a), cached_shingles(contact_b))
+        score = 0.6 * name_sim + 0.4 * contact_sim
+        if score >= threshold:
+            result.append((id_a, id_b, score, name_sim, contact_sim))
+    return result
+
+
+def _groups(keys: array, ids: array, max_size: int) -> Iterator[List[int]]:
+    """Yields the IDs sharing each key, for keys held by 2 to max_size IDs."""
+    if np is not None:
+        key_values = np.frombuffer(keys, dtype=np.int64)
+        order = np.argsort(key_values, kind="stable")
+        ordered = key_values[order]
+        bounds = np.flatnonzero(ordered[1:] != ordered[:-1]) + 1
+        starts = np.concatenate(([0], bounds))
+        stops = np.concatenate((bounds, [len(ordered)]))
+        sizes = stops - starts
+        kept = (sizes >= 2) & (sizes <= max_size)
+        id_values = np.frombuffer(ids, dtype=np.int64)
+        for start, stop in zip(starts[kept].tolist(), stops[kept].tolist()):
+            yield id_values[order[start:stop]].tolist()
+        return
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    start = 0
+    for position in range(1, len(order) + 1):
+        if position == len(order) or keys[order[position]] != keys[order[start]]:
+            if 2 <= position - start <= max_size:
+                yield [ids[index] for index in order[start:position]]
+            start = position
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    """Yields consecutive slices of at most `size` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class GuestDeduplicator:
+    """
+    Batch job that proposes merges for duplicate Guest records.
+
+    Candidate pairs come only from shared blocks: an identical normalized
+    contact, or a shared LSH band of the MinHash signature of the normalized
+    name. Blocks larger than `max_block_size` (e.g. a shared front-desk
+    phone number) are skipped so the candidate set stays near-linear.
+    Signature and scoring work is spread over a process pool.
+
+    Every block key is a 64-bit int, kept with its guest ID in flat arrays,
+    one key kind (the contact or an LSH band) at a time; blocks are found
+    by sorting one kind's keys (with NumPy when installed), so memory grows
+    by 16 bytes per key rather than by a tuple and a dict entry.
+    """
+
+    def __init__(self, threshold: float = 0.7, bands: int = 16, rows: int = 4,
+                 max_block_size: int = 200, workers: Optional[int] = None,
+                 chunk_size: int = 20_000):
+        """
+        Initializes the job.
+        - threshold: Minimum combined score for a merge proposal.
+        - bands, rows: LSH banding of the MinHash signature.
+        - max_block_size: Larger blocks are treated as noise and skipped.
+        - workers: Process count; 1 runs everything in-process.
+        - chunk_size: Records or pairs handed to a worker at a time.
+        """
+        self._threshold = threshold
+        self._bands = bands
+        self._rows = rows
+        self._max_block_size = max_block_size
+        self._workers = workers
+        self._chunk_size = chunk_size
+
+    def _map(self, func, tasks: List) -> List:
+        """Runs tasks in the process pool, or inline for a single worker."""
+        if self._workers == 1 or len(tasks) <= 1:
+            return [func(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=self._workers) as pool:
+            return list(pool.map(func, tasks))
+
+    def candidate_pairs(self, records: List[GuestRecord]) -> Set[Tuple[int, int]]:
+        """Returns the (lower_id, higher_id) pairs that share at least one block."""
+        tasks = [(chunk, self._bands, self._rows) for chunk in _chunks(records, self._chunk_size)]
+        columns: List[KeyColumn] = [(array("q"), array("q")) for _ in range(self._bands + 1)]
+        for chunk_columns in self._map(_band_keys_chunk, tasks):
+            for (keys, ids), (chunk_keys, chunk_ids) in zip(columns, chunk_columns):
+                keys.extend(chunk_keys)
+                ids.extend(chunk_ids)
+        pairs: Set[Tuple[int, int]] = set()
+        for index, (keys, ids) in enumerate(columns):
+            columns[index] = None  # free each kind once grouped
+            for members in _groups(keys, ids, self._max_block_size):
+                members.sort()
+                for i, first in enumerate(members):
+                    for second in members[i + 1:]:
+                        if first != second:
+                            pairs.add((first, second))
+        return pairs
+
+    @profiled("guest_deduplication")
+    def find_duplicates(self, guests: List[Guest]) -> List[MergeProposal]:
+        """
+        Returns merge proposals for likely duplicates, best score first.
+        The guest with the longer reservation history (then the lower ID) is
+        proposed as the primary record.
+        """
+        by_id = {guest.get_guest_id(): guest for guest in guests}
+        records = {guest.get_guest_id(): (guest.get_guest_id(),
+                                          normalize_text(guest.get_name()),
+                                          normalize_contact(guest.get_contact_info()))
+                   for guest in guests}
+        pairs = [(records[a], records[b])
+                 for a, b in sorted(self.candidate_pairs(list(records.values())))]
+        tasks = [(chunk, self._threshold) for chunk in _chunks(pairs, self._chunk_size)]
+
+        proposals = []
+        for chunk_result in self._map(_score_chunk, tasks):
+            for id_a, id_b, score, name_sim, contact_sim in chunk_result:
+                history_a = len(by_id[id_a].get_reservation_history())
+                history_b = len(by_id[id_b].get_reservation_history())
+                primary, duplicate = (id_b, id_a) if history_b > history_a else (id_a, id_b)
+                proposals.append(MergeProposal(primary, duplicate, score, name_sim, contact_sim))
+        proposals.sort(key=lambda p: (-p.get_score(), p.get_primary_id(), p.get_duplicate_id()))
+        return proposals
@@ -0,0 +1,182 @@
+"""Module for the GuestDirectory class, an indexed lookup of hotel guests."""
+
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from guest import Guest
+
+
+def normalize_text(text: str) -> str:
+    """
+    Folds text for case- and diacritic-insensitive matching.
+    "José Ñúñez" and "jose nunez" normalize to the same string.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+def normalize_contact(contact_info: str) -> str:
+    """
+    Normalizes contact information for exact lookup.
+    Emails are case-folded; phone numbers are reduced to their digits.
+    """
+    contact = contact_info.strip()
+    if "@" in contact:
+        return contact.casefold()
+    digits = re.sub(r"\D", "", contact)
+    return digits if digits else normalize_text(contact)
+
+
+# Characters that separate name words, e.g. in "Al-Blooshi" or "O'Neil".
+_WORD_BREAKS = re.compile(r"[\s\-'’]+")
+
+
+def _name_words(text: str) -> List[str]:
+    """Returns the normalized words of a name."""
+    return [word for word in _WORD_BREAKS.split(normalize_text(text)) if word]
+
+
+def _name_keys(name: str) -> List[str]:
+    """Returns the searchable keys for a name: the full name and each word onwards."""
+    words = _name_words(name)
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class GuestDirectory:
+    """
+    Indexes guests by ID, normalized contact and name prefix.
+
+    ID and contact lookups are dictionary hits. Name search uses a sorted
+    array of (key, guest_id) pairs searched with bisect, which answers
+    type-ahead queries in O(log n + k) while staying far more compact than
+    a per-character trie. Each word of a name is indexed, with hyphens and
+    apostrophes separating words too, so "blo" finds "Khalid Al-Blooshi"
+    just like "khal" does.
+    """
+
+    def __init__(self, guests: Optional[List[Guest]] = None):
+        """Initializes the directory, bulk-loading any given guests."""
+        self._by_id: Dict[int, Guest] = {}
+        self._by_contact: Dict[str, List[int]] = {}
+        self._names: List[Tuple[str, int]] = []
+        if guests:
+            self.bulk_load(guests)
+
+    def bulk_load(self, guests: List[Guest]) -> None:
+        """Adds many guests at once, sorting the name index a single time."""
+        for guest in guests:
+            self._index(guest)
+            self._names.extend((key, guest.get_guest_id()) for key in _name_keys(guest.get_name()))
+        self._names.sort()
+
+    def add(self, guest: Guest) -> None:
+        """Adds a single guest to the directory."""
+        self._index(guest)
+        for key in _name_keys(guest.get_name()):
+            insort(self._names, (key, guest.get_guest_id()))
+
+    def remove(self, guest_id: int) -> None:
+        """Removes a guest from the directory."""
+        guest = self._by_id.get(guest_id)
+        if guest is None:
+            raise KeyError(f"Guest {guest_id} not in directory")
+        self._unindex_contact(guest_id, guest.get_contact_info())
+        self._unindex_name(guest_id, guest.get_name())
+        del self._by_id[guest_id]
+        guest.unsubscribe(self._on_guest_change)
+
+    def _index(self, guest: Guest) -> None:
+        """Adds a guest to the ID and contact indexes and subscribes to changes."""
+        guest_id = guest.get_guest_id()
+        if guest_id in self._by_id:
+            raise ValueError(f"Guest {guest_id} already in directory")
+        self._by_id[guest_id] = guest
+        self._by_contact.setdefault(normalize_contact(guest.get_contact_info()), []).append(guest_id)
+        guest.subscribe(self._on_guest_change)
+
+    def _unindex_contact(self, guest_id: int, contact_info: str) -> None:
+        """Removes a guest ID from the contact index."""
+        key = normalize_contact(contact_info)
+        ids = self._by_contact.get(key, [])
+        if guest_id in ids:
+            ids.remove(guest_id)
+        if not ids:
+            self._by_contact.pop(key, None)
+
+    def _unindex_name(self, guest_id: int, name: str) -> None:
+        """Removes a guest ID from the name index."""
+        for key in _name_keys(name):
+            pos = bisect_left(self._names, (key, guest_id))
+            if pos < len(self._names) and self._names[pos] == (key, guest_id):
+                del self._names[pos]
+
+    def _on_guest_change(self, changes: list) -> None:
+        """Re-indexes a guest after its ID, name or contact changed."""
+        guest = changes[0][0]
+        old = {field: old_value for _, field, old_value, _ in changes}
+        if not {"guest_id", "name", "contact_info"} & old.keys():
+            return
+        old_id = old.get("guest_id", guest.get_guest_id())
+        new_id = guest.get_guest_id()
+        duplicate = new_id if new_id != old_id and new_id in self._by_id else None
+        if duplicate is not None:
+            # Put the old ID back (telling the other subscribers) and keep
+            # the guest filed under it; its other changes are still indexed.
+            guest.unsubscribe(self._on_guest_change)
+            try:
+                guest.set_guest_id(old_id)
+            finally:
+                guest.subscribe(self._on_guest_change)
+            new_id = old_id
+        self._unindex_contact(old_id, old.get("contact_info", guest.get_contact_info()))
+        self._unindex_name(old_id, old.get("name", guest.get_name()))
+        del self._by_id[old_id]
+        self._by_id[new_id] = guest
+        self._by_contact.setdefault(normalize_contact(guest.get_contact_info()), []).append(new_id)
+        for key in _name_keys(guest.get_name()):
+            insort(self._names, (key, new_id))
+        if duplicate is not None:
+            raise ValueError(f"Guest {duplicate} already in directory")
+
+    # Lookups
+    def get(self, guest_id: int) -> Optional[Guest]:
+        """Returns the guest with the given ID, or None."""
+        return self._by_id.get(guest_id)
+
+    def find_by_contact(self, contact_info: str) -> List[Guest]:
+        """Returns guests whose contact matches after normalization."""
+        ids = self._by_contact.get(normalize_contact(contact_info), [])
+        return [self._by_id[guest_id] for guest_id in ids]
+
+    def search_name(self, prefix: str, limit: int = 10) -> List[Guest]:
+        """
+        Returns up to `limit` guests with a name word starting with `prefix`.
+        Matching ignores case and diacritics; results are in key order.
+        """
+        needle = " ".join(_name_words(prefix))
+        if not needle:
+            return []
+        results: List[Guest] = []
+        seen = set()
+        pos = bisect_left(self._names, (needle,))
+        names = self._names
+        while pos < len(names) and len(results) < limit:
+            key, guest_id = names[pos]
+            if not key.startswith(needle):
+                break
+            if guest_id not in seen:
+                seen.add(guest_id)
+                results.append(self._by_id[guest_id])
+            pos += 1
+        return results
+
+    def __len__(self) -> int:
+        """Returns the number of guests in the directory."""
+        return len(self._by_id)
+
+    def __contains__(self, guest_id: int) -> bool:
+        """Checks if a guest ID is in the directory."""
+        return guest_id in self._by_id
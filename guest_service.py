@@ -1,8 +1,9 @@
 """Module for the GuestService class, managing guest service requests."""
 
-from datetime import datetime
+from compact_date import Timestamp
+from observable import Observable
 
-class GuestService:
+class GuestService(Observable):
     """
     Represents guest service requests exactly as defined in UML.
     Contains all attributes and methods specified in Part A.
@@ -23,7 +24,7 @@ class GuestService:
         self._service_type = service_type
         self._status = status
         self._guest_id = guest_id
-        self._request_time = request_time
+        self._request_time = Timestamp.of(request_time)
 
     # UML-REQUIRED METHODS (exact matches)
     def get_service_id(self) -> int:
@@ -32,7 +33,10 @@ class GuestService:
 
     def set_service_id(self, service_id: int) -> None:
         """Sets service ID (UML-compliant setter)."""
+        old = self._service_id
         self._service_id = service_id
+        if self._observers:
+            self._notify("service_id", old, service_id)
 
     def get_service_type(self) -> str:
         """Returns service type (UML-compliant getter)."""
@@ -40,7 +44,10 @@ class GuestService:
 
     def set_service_type(self, service_type: str) -> None:
         """Sets service type (UML-compliant setter)."""
+        old = self._service_type
         self._service_type = service_type
+        if self._observers:
+            self._notify("service_type", old, service_type)
 
     def get_status(self) -> str:
         """Returns status (UML-compliant getter)."""
@@ -48,7 +55,10 @@ class GuestService:
 
     def set_status(self, status: str) -> None:
         """Sets status (UML-compliant setter)."""
+        old = self._status
         self._status = status
+        if self._observers:
+            self._notify("status", old, status)
 
     def get_guest_id(self) -> int:
         """Returns guest ID (UML-compliant getter)."""
@@ -56,25 +66,32 @@ class GuestService:
 
     def set_guest_id(self, guest_id: int) -> None:
         """Sets guest ID (UML-compliant setter)."""
+        old = self._guest_id
         self._guest_id = guest_id
+        if self._observers:
+            self._notify("guest_id", old, guest_id)
 
     def get_request_time(self) -> str:
         """Returns request time (UML-compliant getter)."""
+        return self._request_time.isoformat()
+
+    def get_request_timestamp(self) -> Timestamp:
+        """Returns request time as a Timestamp (not in UML)."""
         return self._request_time
 
     def set_request_time(self, request_time: str) -> None:
         """Sets request time (UML-compliant setter)."""
         # Validate request time format (YYYY-MM-DD HH:MM:SS)
-        try:
-            datetime.strptime(request_time, "%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            raise ValueError("Time must be in செறிவு-MM-DD HH:MM:SS format")
-        self._request_time = request_time
+        timestamp = Timestamp.of(request_time)
+        old = self._request_time
+        self._request_time = timestamp
+        if self._observers:
+            self._notify("request_time", str(old), str(timestamp))
 
     def mark_as_completed(self) -> None:
         """Marks service as completed (UML-required method)."""
         # Set the status to 'Completed'
-        self._status = "Completed"
+        self.set_status("Completed")
 
     # NON-UML ELEMENTS (justified additions)
     def __str__(self) -> str:
@@ -0,0 +1,386 @@
+"""Module for a small asyncio HTTP/1.1 JSON API over the hotel model objects."""
+
+import asyncio
+import json
+import logging
+from datetime import date
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from booking import Booking
+from availability_cache import AvailabilityCache
+from feedback import Feedback
+from id_allocator import IdAllocator
+from invoice import Invoice
+from room import Room
+
+# Largest request body accepted, in bytes.
+MAX_BODY_BYTES = 64 * 1024
+
+# Longest request line or header line accepted, in bytes.
+MAX_LINE_BYTES = 8 * 1024
+
+JSON_TYPE = "application/json"
+
+logger = logging.getLogger(__name__)
+
+
+class APIError(ValueError):
+    """A request the API refuses, with the HTTP status to answer."""
+
+    def __init__(self, status: int, message: str):
+        """Initializes the error with an HTTP status and a message for the client."""
+        super().__init__(message)
+        self.status = status
+
+
+def _room_json(room: Room) -> Dict[str, Any]:
+    """Returns the JSON fields of a room."""
+    return {"room_number": room.get_room_number(), "room_type": room.get_room_type(),
+            "price_per_night": room.get_price_per_night()}
+
+
+def _booking_json(booking: Booking) -> Dict[str, Any]:
+    """Returns the JSON fields of a booking."""
+    return {"booking_id": booking.get_booking_id(), "guest_id": booking.get_guest_id(),
+            "room_number": booking.get_room_number(),
+            "check_in_date": booking.get_check_in_date(),
+            "check_out_date": booking.get_check_out_date(),
+            "cancelled": booking.is_cancelled()}
+
+
+def _invoice_json(invoice: Invoice) -> Dict[str, Any]:
+    """Returns the JSON fields of an invoice."""
+    return {"invoice_id": invoice.get_invoice_id(), "booking_id": invoice.get_booking_id(),
+            "total_amount": invoice.get_total_amount(), "discounts": invoice.get_discounts(),
+            "amount_due": invoice.calculate_total(),
+            "payment_method": invoice.get_payment_method(),
+            "payment_status": invoice.get_payment_status()}
+
+
+def _feedback_json(feedback: Feedback) -> Dict[str, Any]:
+    """Returns the JSON fields of a feedback entry."""
+    return {"feedback_id": feedback.get_feedback_id(), "guest_id": feedback.get_guest_id(),
+            "rating": feedback.get_rating(), "comments": feedback.get_comments(),
+            "feedback_date": feedback.get_feedback_date()}
+
+
+def _field(data: Dict[str, Any], name: str, kind: type) -> Any:
+    """Returns a required field of a request body, checking its type."""
+    value = data.get(name)
+    if kind is float and isinstance(value, int) and not isinstance(value, bool):
+        value = float(value)
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise APIError(400, f"Field '{name}' must be a {kind.__name__}")
+    return value
+
+
+class HotelAPI:
+    """
+    Answers API requests from the rooms, bookings, invoices and feedback
+    it holds; the transport lives in HTTPServer.
+
+    Routes (all bodies and responses are JSON objects):
+        GET    /rooms[?room_type=T&check_in=D&check_out=D]  rooms, free ones if dates given
+        GET    /bookings/ID                                 one booking
+        POST   /bookings                                    book {guest_id, room_number,
+                                                            check_in_date, check_out_date}
+        DELETE /bookings/ID                                 cancel a booking
+        GET    /bookings/ID/invoice                         a booking's invoice
+        POST   /bookings/ID/invoice                         create it at the nightly price
+        POST   /feedback                                    {guest_id, rating, comments}
+
+    Searches are answered from an AvailabilityCache and conflict checks
+    are binary searches in its per-room index. Objects created by the API are
+    passed to `on_create`, e.g. EventLog.track to persist them. New IDs come
+    from the "Booking", "Invoice" and "Feedback" sequences of an IdAllocator.
+    """
+
+    def __init__(self, rooms: Iterable[Room], bookings: Iterable[Booking] = (),
+                 invoices: Iterable[Invoice] = (), feedback: Iterable[Feedback] = (),
+                 on_create: Optional[Callable[[Any], None]] = None,
+                 ids: Optional[IdAllocator] = None):
+        """
+        Initializes the API.
+        - rooms, bookings, invoices, feedback: Existing model objects.
+        - on_create: Called with every booking, invoice and feedback the API creates.
+        - ids: Allocator shared with other writers; by default one kept in memory.
+        """
+        self._rooms: Dict[int, Room] = {room.get_room_number(): room for room in rooms}
+        self._rooms_by_type: Dict[str, List[Room]] = {}
+        for number in sorted(self._rooms):
+            room = self._rooms[number]
+            self._rooms_by_type.setdefault(room.get_room_type().lower(), []).append(room)
+        self._bookings: Dict[int, Booking] = {booking.get_booking_id(): booking
+                                              for booking in bookings}
+        self._availability = AvailabilityCache(self._rooms.values(), self._bookings.values())
+        self._invoices: Dict[int, Invoice] = {}  # booking ID -> invoice
+        for invoice in invoices:
+            self._invoices[invoice.get_booking_id()] = invoice
+        for booking in self._bookings.values():
+            if booking.get_invoice() is not None:
+                self._invoices[booking.get_booking_id()] = booking.get_invoice()
+        self._feedback: List[Feedback] = list(feedback)
+        if ids is None:
+            ids = IdAllocator()
+        ids.advance("Booking", max(self._bookings, default=0))
+        ids.advance("Invoice", max((invoice.get_invoice_id()
+                                    for invoice in self._invoices.values()), default=0))
+        ids.advance("Feedback", max((entry.get_feedback_id() for entry in self._feedback),
+                                    default=0))
+        self._booking_ids = ids.sequence("Booking")
+        self._invoice_ids = ids.sequence("Invoice")
+        self._feedback_ids = ids.sequence("Feedback")
+        self._on_create = on_create
+
+    def get_availability_cache(self) -> AvailabilityCache:
+        """Returns the cache searches are answered from, e.g. for its hit rate."""
+        return self._availability
+
+    def handle(self, method: str, target: str, body: bytes = b"") -> Tuple[int, Dict[str, Any]]:
+        """Returns the (status, JSON object) answer to one request."""
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            data = self._parse_body(body) if method in ("POST", "PUT") else {}
+            if parts == ["rooms"]:
+                self._allow(method, "GET")
+                return 200, self._search(parse_qs(url.query))
+            if parts == ["bookings"]:
+                self._allow(method, "POST")
+                return 201, self._book(data)
+            if parts == ["feedback"]:
+                self._allow(method, "POST")
+                return 201, self._add_feedback(data)
+            if len(parts) >= 2 and parts[0] == "bookings":
+                booking = self._booking(parts[1])
+                if len(parts) == 2:
+                    self._allow(method, "GET", "DELETE")
+                    if method == "DELETE":
+                        if booking.is_cancelled():
+                            raise APIError(409, f"Booking {parts[1]} is already cancelled")
+                        booking.cancel_booking()
+                    return 200, _booking_json(booking)
+                if parts[2:] == ["invoice"]:
+                    self._allow(method, "GET", "POST")
+                    return self._invoice(booking, create=method == "POST")
+            raise APIError(404, f"No route for {url.path}")
+        except APIError as error:
+            return error.status, {"error": str(error)}
+        except ValueError as error:
+            return 400, {"error": str(error)}
+        except Exception:
+            # A bug or inconsistent state; answer it rather than drop the connection.
+            logger.exception("Failed to handle %s %s", method, target)
+            return 500, {"error": "Internal server error"}
+
+    @staticmethod
+    def _allow(method: str, *allowed: str) -> None:
+        """Refuses methods a route does not support."""
+        if method not in allowed:
+            raise APIError(405, f"Method {method} not allowed")
+
+    @staticmethod
+    def _parse_body(body: bytes) -> Dict[str, Any]:
+        """Parses a JSON object body."""
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise APIError(400, "Body must be JSON")
+        if not isinstance(data, dict):
+            raise APIError(400, "Body must be a JSON object")
+        return data
+
+    def _booking(self, booking_id: str) -> Booking:
+        """Returns a booking by the ID in a path."""
+        booking = self._bookings.get(int(booking_id)) if booking_id.isdigit() else None
+        if booking is None:
+            raise APIError(404, f"Booking {booking_id} not found")
+        return booking
+
+    def _created(self, obj: Any) -> None:
+        """Reports a new object to on_create."""
+        if self._on_create is not None:
+            self._on_create(obj)
+
+    def _search(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Lists rooms, optionally of one type and free for a stay."""
+        room_type = query.get("room_type", [None])[0]
+        rooms = (self._rooms_by_type.get(room_type.lower(), []) if room_type
+                 else [self._rooms[number] for number in sorted(self._rooms)])
+        check_in = query.get("check_in", [None])[0]
+        check_out = query.get("check_out", [None])[0]
+        if check_in or check_out:
+            if not (check_in and check_out):
+                raise APIError(400, "Give both check_in and check_out")
+            types = [room_type] if room_type else sorted(self._rooms_by_type)
+            free = sorted(number for each_type in types
+                          for number in self._availability.search(each_type, check_in, check_out))
+            rooms = [self._rooms[number] for number in free]
+        return {"rooms": [_room_json(room) for room in rooms]}
+
+    def _book(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Books a room if it is free for the stay."""
+        room_number = _field(data, "room_number", int)
+        check_in = _field(data, "check_in_date", str)
+        check_out = _field(data, "check_out_date", str)
+        guest_id = _field(data, "guest_id", int)
+        booking = Booking(0, guest_id, room_number, check_in, check_out)
+        booking.validate_dates(check_in, check_out)
+        if room_number not in self._rooms:
+            raise APIError(404, f"Room {room_number} not found")
+        if not self._availability.is_available(room_number, check_in, check_out):
+            raise APIError(409, f"Room {room_number} is not available")
+        # Only accepted bookings take an ID.
+        booking.set_booking_id(self._booking_ids.next_id())
+        self._bookings[booking.get_booking_id()] = booking
+        self._availability.add_booking(booking)
+        self._created(booking)
+        return _booking_json(booking)
+
+    def _invoice(self, booking: Booking, create: bool) -> Tuple[int, Dict[str, Any]]:
+        """Returns a booking's invoice, creating it at the room's nightly price if asked."""
+        invoice = self._invoices.get(booking.get_booking_id())
+        if invoice is not None:
+            return 200, _invoice_json(invoice)
+        if not create:
+            raise APIError(404, f"Booking {booking.get_booking_id()} has no invoice")
+        if booking.is_cancelled():
+            raise APIError(409, f"Booking {booking.get_booking_id()} is cancelled")
+        price = self._rooms[booking.get_room_number()].get_price_per_night()
+        invoice = Invoice(self._invoice_ids.next_id(),
+                          round(price * booking.calculate_booking_duration(), 2), 0.0,
+                          "Credit Card", booking.get_booking_id(), "Pending")
+        self._invoices[booking.get_booking_id()] = invoice
+        self._created(invoice)
+        booking.set_invoice(invoice)
+        return 201, _invoice_json(invoice)
+
+    def _add_feedback(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Records a guest's feedback."""
+        feedback = Feedback(0, _field(data, "rating", float), _field(data, "comments", str),
+                            _field(data, "guest_id", int), date.today().isoformat())
+        feedback.validate_rating()
+        feedback.set_feedback_id(self._feedback_ids.next_id())
+        self._feedback.append(feedback)
+        self._created(feedback)
+        return _feedback_json(feedback)
+
+
+class HTTPServer:
+    """
+    Serves a HotelAPI over HTTP/1.1 with asyncio.
+
+    Connections are kept alive unless the client asks otherwise (or speaks
+    HTTP/1.0 without keep-alive). Requests on a connection are read and
+    answered strictly in order, so pipelined requests work: the next
+    request is parsed from the read buffer while earlier answers are
+    still being sent. Bodies need a Content-Length; chunked uploads are
+    refused.
+    """
+
+    def __init__(self, api: HotelAPI, host: str = "127.0.0.1", port: int = 8080):
+        """Initializes the server for an API, host and port (0 picks a free port)."""
+        self._api = api
+        self._host = host
+        self._port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> int:
+        """Starts listening; returns the port."""
+        self._server = await asyncio.start_server(self._serve_connection, self._host, self._port,
+                                                  limit=MAX_LINE_BYTES)
+        self._port = self._server.sockets[0].getsockname()[1]
+        return self._port
+
+    def get_port(self) -> int:
+        """Returns the port listened on."""
+        return self._port
+
+    async def serve_forever(self) -> None:
+        """Starts listening if needed and serves until cancelled."""
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        """Stops listening and waits for the listener to close."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        """Answers requests on one connection until it closes."""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except APIError as error:
+                    writer.write(self._response(error.status, {"error": str(error)}, False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                status, payload = self._api.handle(method, target, body)
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            logger.exception("Connection failed")
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader
+                            ) -> Optional[Tuple[str, str, bytes, bool]]:
+        """Reads one request; returns (method, target, body, keep-alive) or None at EOF."""
+        try:
+            line = await reader.readline()
+            while line in (b"\r\n", b"\n"):  # tolerate blank lines between requests
+                line = await reader.readline()
+            if not line:
+                return None
+            parts = line.decode("latin-1").split()
+            if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+                raise APIError(400, "Malformed request line")
+            method, target, version = parts
+            headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except APIError:
+            raise
+        except (asyncio.LimitOverrunError, ValueError):
+            raise APIError(431, "Request line or header too long")
+        if "transfer-encoding" in headers:
+            raise APIError(411, "Send bodies with a Content-Length")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise APIError(400, "Invalid Content-Length")
+        if not 0 <= length <= MAX_BODY_BYTES:
+            raise APIError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = (connection != "close" if version == "HTTP/1.1"
+                      else connection == "keep-alive")
+        return method, target, body, keep_alive
+
+    @staticmethod
+    def _response(status: int, payload: Dict[str, Any], keep_alive: bool) -> bytes:
+        """Returns the bytes of a JSON response."""
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: {JSON_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"{'' if keep_alive else 'Connection: close' + chr(13) + chr(10)}\r\n")
+        return head.encode("latin-1") + body
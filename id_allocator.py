@@ -0,0 +1,237 @@
+"""Module for allocating unique booking, invoice, feedback and service IDs in blocks."""
+
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: only threads of one process are coordinated
+    fcntl = None
+
+# Time-ordered IDs: milliseconds since TIME_EPOCH_MS above TIME_SHIFT bits
+# of counter, so they fit 63 bits until 2094.
+TIME_EPOCH_MS = 1735689600000  # 2025-01-01 00:00:00 UTC
+TIME_SHIFT = 22
+
+# Live sequences and allocators, reset in a forked child so it neither
+# reuses the blocks its parent's threads held nor inherits a held lock.
+_FORK_RESET: weakref.WeakSet = weakref.WeakSet()
+
+
+def _reset_after_fork() -> None:
+    """Resets every live sequence and allocator in a forked child."""
+    for obj in list(_FORK_RESET):
+        obj._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def time_of(value: int) -> float:
+    """Returns the time (seconds since 1970) a time-ordered ID was reserved at."""
+    return ((value >> TIME_SHIFT) + TIME_EPOCH_MS) / 1000
+
+
+class IdSequence:
+    """
+    Hands out the IDs of one kind of object, e.g. bookings.
+
+    Each thread takes IDs from its own block with no locking; only when
+    its block runs out does it reserve the next one from the allocator.
+    A thread's first block holds `first_block` IDs and each later one
+    twice as many, up to `max_block`, so short-lived processes leave
+    small gaps and busy threads rarely reserve.
+
+    Time-ordered sequences start every block at the current time in
+    milliseconds shifted left by TIME_SHIFT bits and retire a block
+    `max_lag_ms` after reserving it, so IDs from all threads and
+    processes grow with time and land near each other in an index.
+    """
+
+    def __init__(self, allocator: "IdAllocator", name: str, time_ordered: bool,
+                 first_block: int, max_block: int, max_lag_ms: int):
+        """Initializes a sequence; use IdAllocator.sequence() to get one."""
+        self._allocator = allocator
+        self._name = name
+        self._time_ordered = time_ordered
+        self._first_block = first_block
+        self._max_block = max_block
+        self._max_lag_ns = max_lag_ms * 1_000_000
+        self._local = threading.local()
+        _FORK_RESET.add(self)
+
+    def _reset(self) -> None:
+        """Forgets every thread's block."""
+        self._local = threading.local()
+
+    def get_name(self) -> str:
+        """Returns the name of the sequence."""
+        return self._name
+
+    def is_time_ordered(self) -> bool:
+        """Checks if IDs are time-ordered."""
+        return self._time_ordered
+
+    def next_id(self) -> int:
+        """Returns an ID never returned before by this sequence."""
+        local = self._local
+        try:
+            if self._time_ordered and time.monotonic_ns() > local.expires:
+                return self._refill(local)
+            return next(local.ids)
+        except (AttributeError, StopIteration):
+            return self._refill(local)
+
+    __call__ = next_id
+
+    def _refill(self, local: threading.local) -> int:
+        """Reserves the calling thread's next block and returns its first ID."""
+        size = min(local.size * 2, self._max_block) if hasattr(local, "size") else self._first_block
+        floor = 0
+        if self._time_ordered:
+            floor = (time.time_ns() // 1_000_000 - TIME_EPOCH_MS) << TIME_SHIFT
+            local.expires = time.monotonic_ns() + self._max_lag_ns
+        start = self._allocator._reserve(self._name, size, floor)
+        local.size = size
+        local.ids = iter(range(start + 1, start + size))
+        return start
+
+
+class IdAllocator:
+    """
+    Allocates unique IDs for bookings, invoices, feedback and services.
+
+    Every named sequence has a high-water mark: IDs up to it have been
+    reserved. Threads reserve blocks above the mark (see IdSequence) and
+    the new mark is written to `state_path` before any ID of the block is
+    used, so IDs stay unique across restarts; a restart only leaves the
+    unused rest of each block as a gap. The file is replaced atomically
+    and, where fcntl exists, updated under a lock on `state_path + ".lock"`
+    so several processes can share it. Without a state_path the marks
+    live in memory only.
+
+    Use sequence(name).next_id() (or call the sequence) to get IDs, e.g.
+    as Waitlist's next_booking_id, and advance() to keep new IDs above
+    those already assigned.
+    """
+
+    def __init__(self, state_path: Optional[str] = None, first_block: int = 16,
+                 max_block: int = 65536, max_lag_ms: int = 100, fsync: bool = False):
+        """
+        Initializes the allocator.
+        - state_path: JSON file holding the high-water marks, or None.
+        - first_block, max_block: Smallest and largest block a thread reserves.
+        - max_lag_ms: Age at which a time-ordered block is retired.
+        - fsync: Force the marks to disk on every reservation.
+        """
+        if first_block <= 0 or max_block < first_block:
+            raise ValueError("Block sizes must be positive and max_block at least first_block")
+        if max_lag_ms <= 0:
+            raise ValueError("max_lag_ms must be positive")
+        self._state_path = state_path
+        self._first_block = first_block
+        self._max_block = max_block
+        self._max_lag_ms = max_lag_ms
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._marks: Dict[str, int] = {}
+        self._sequences: Dict[str, IdSequence] = {}
+        self._reservations = 0
+        _FORK_RESET.add(self)
+
+    def _reset(self) -> None:
+        """Replaces the lock, which a forked child may inherit held."""
+        self._lock = threading.Lock()
+
+    def sequence(self, name: str, time_ordered: bool = False) -> IdSequence:
+        """Returns the sequence of a name, creating it on first use."""
+        with self._lock:
+            sequence = self._sequences.get(name)
+            if sequence is None:
+                sequence = self._sequences[name] = IdSequence(
+                    self, name, time_ordered, self._first_block, self._max_block,
+                    self._max_lag_ms)
+        if sequence.is_time_ordered() != time_ordered:
+            raise ValueError(f"Sequence {name} is "
+                             f"{'' if sequence.is_time_ordered() else 'not '}time-ordered")
+        return sequence
+
+    def next_id(self, name: str) -> int:
+        """Returns the next ID of a named sequence."""
+        return self.sequence(name).next_id()
+
+    def advance(self, name: str, value: int) -> None:
+        """Makes every later ID of a sequence greater than `value`."""
+        self._reserve(name, 0, value + 1)
+
+    def get_mark(self, name: str) -> int:
+        """Returns the highest reserved ID of a sequence, or 0."""
+        with self._lock, self._locked_file():
+            return self._load().get(name, 0)
+
+    def get_reservations(self) -> int:
+        """Returns the number of blocks reserved by this allocator."""
+        return self._reservations
+
+    def _reserve(self, name: str, size: int, floor: int) -> int:
+        """Reserves `size` IDs starting at `floor` or above the mark; returns the first."""
+        with self._lock, self._locked_file():
+            marks = self._load()
+            start = max(marks.get(name, 0) + 1, floor)
+            marks[name] = start + size - 1
+            self._save(marks)
+            if size:
+                self._reservations += 1
+        return start
+
+    # Persistence
+    def _locked_file(self):
+        """Returns a context holding the cross-process lock on the state file."""
+        return _FileLock(self._state_path + ".lock" if self._state_path and fcntl else None)
+
+    def _load(self) -> Dict[str, int]:
+        """Returns the current marks, re-read from the state file if there is one."""
+        if self._state_path is None:
+            return self._marks
+        try:
+            with open(self._state_path, encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {}
+
+    def _save(self, marks: Dict[str, int]) -> None:
+        """Writes the marks atomically."""
+        if self._state_path is None:
+            return
+        temp_path = self._state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(marks, handle, sort_keys=True)
+            if self._fsync:
+                handle.flush()
+                os.fsync(handle.fileno())
+        os.replace(temp_path, self._state_path)
+
+
+class _FileLock:
+    """Holds an exclusive fcntl lock on a file, or does nothing without a path."""
+
+    def __init__(self, path: Optional[str]):
+        """Initializes the lock."""
+        self._path = path
+        self._handle = None
+
+    def __enter__(self) -> "_FileLock":
+        if self._path is not None:
+            self._handle = open(self._path, "a")
+            fcntl.flock(self._handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._handle is not None:
+            fcntl.flock(self._handle, fcntl.LOCK_UN)
+            self._handle.close()
@@ -1,6 +1,8 @@
 """Module for the Invoice class."""
 
-class Invoice:
+from observable import Observable
+
+class Invoice(Observable):
     """
     Represents a booking invoice.
     """
@@ -33,7 +35,10 @@ class Invoice:
 
     def set_invoice_id(self, invoice_id: int) -> None:
         """Sets the invoice ID."""
+        old = self._invoice_id
         self._invoice_id = invoice_id
+        if self._observers:
+            self._notify("invoice_id", old, invoice_id)
 
     def get_total_amount(self) -> float:
         """Returns the total amount."""
@@ -41,7 +46,10 @@ class Invoice:
 
     def set_total_amount(self, amount: float) -> None:
         """Sets the total amount."""
+        old = self._total_amount
         self._total_amount = amount
+        if self._observers:
+            self._notify("total_amount", old, amount)
 
     def get_discounts(self) -> float:
         """Returns the discounts."""
@@ -49,7 +57,10 @@ class Invoice:
 
     def set_discounts(self, discounts: float) -> None:
         """Sets the discounts."""
+        old = self._discounts
         self._discounts = discounts
+        if self._observers:
+            self._notify("discounts", old, discounts)
 
     def get_payment_method(self) -> str:
         """Returns the payment method."""
@@ -57,7 +68,10 @@ class Invoice:
 
     def set_payment_method(self, method: str) -> None:
         """Sets the payment method."""
+        old = self._payment_method
         self._payment_method = method
+        if self._observers:
+            self._notify("payment_method", old, method)
 
     def get_booking_id(self) -> int:
         """Returns the booking ID."""
@@ -65,7 +79,10 @@ class Invoice:
 
     def set_booking_id(self, booking_id: int) -> None:
         """Sets the booking ID."""
+        old = self._booking_id
         self._booking_id = booking_id
+        if self._observers:
+            self._notify("booking_id", old, booking_id)
 
     def get_payment_status(self) -> str:
         """Returns the payment status."""
@@ -73,7 +90,10 @@ class Invoice:
 
     def set_payment_status(self, status: str) -> None:
         """Sets the payment status."""
+        old = self._payment_status
         self._payment_status = status
+        if self._observers:
+            self._notify("payment_status", old, status)
 
     # UML-REQUIRED METHODS
     def calculate_total(self) -> float:
@@ -0,0 +1,201 @@
+"""Module for an asyncio load generator that drives the HTTP API over keep-alive connections."""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Request mixes: fraction of requests that are bookings, the rest searches.
+SCENARIOS = {"search": 0.0, "mixed": 0.2, "book": 1.0}
+
+PERCENTILES = (50.0, 90.0, 99.0)
+
+
+class LoadReport:
+    """Throughput, latency and status counts of one load run."""
+
+    def __init__(self, seconds: float, latencies: List[float], statuses: Dict[int, int]):
+        """Initializes the report from the run time, per-request latencies and status counts."""
+        self._seconds = seconds
+        self._latencies = sorted(latencies)
+        self._statuses = dict(statuses)
+
+    def get_requests(self) -> int:
+        """Returns the number of answered requests."""
+        return len(self._latencies)
+
+    def get_seconds(self) -> float:
+        """Returns the wall time of the run."""
+        return self._seconds
+
+    def get_throughput(self) -> float:
+        """Returns answered requests per second."""
+        return len(self._latencies) / self._seconds if self._seconds else 0.0
+
+    def get_status_counts(self) -> Dict[int, int]:
+        """Returns the number of responses per HTTP status."""
+        return dict(self._statuses)
+
+    def get_percentile(self, percent: float) -> float:
+        """Returns a latency percentile in milliseconds (nearest rank)."""
+        if not self._latencies:
+            return 0.0
+        rank = max(1, math.ceil(percent / 100 * len(self._latencies)))
+        return self._latencies[min(rank, len(self._latencies)) - 1] * 1000
+
+    def get_booking_rate(self) -> float:
+        """Returns created bookings (201 responses) per second."""
+        return self._statuses.get(201, 0) / self._seconds if self._seconds else 0.0
+
+    def __str__(self) -> str:
+        """Returns the report as text."""
+        percentiles = ", ".join(f"p{percent:g} {self.get_percentile(percent):.2f} ms"
+                                for percent in PERCENTILES)
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(self._statuses.items()))
+        return (f"{self.get_requests()} requests in {self._seconds:.2f} s "
+                f"({self.get_throughput():.0f} req/s, {self.get_booking_rate():.0f} bookings/s)\n"
+                f"latency {percentiles}\n"
+                f"statuses {statuses}")
+
+
+def _request(method: str, target: str, payload: Optional[Dict[str, Any]], host: str) -> bytes:
+    """Returns the bytes of one keep-alive request."""
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    head = f"{method} {target} HTTP/1.1\r\nHost: {host}\r\n"
+    if body:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+    return (head + "\r\n").encode("latin-1") + body
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """Reads one response; returns (status, body)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Server closed the connection")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    return status, await reader.readexactly(length) if length else b""
+
+
+async def fetch(host: str, port: int, method: str, target: str,
+                payload: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+    """Sends one request on a new connection; returns (status, decoded JSON body)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(_request(method, target, payload, host))
+        await writer.drain()
+        status, body = await _read_response(reader)
+        return status, json.loads(body) if body else None
+    finally:
+        writer.close()
+
+
+def _workload(rooms: Sequence[Dict[str, Any]], count: int, book_share: float,
+              start: date, days: int, rng: random.Random) -> List[Tuple[str, str, Any]]:
+    """Returns `count` requests: searches for a room type and stay, or bookings."""
+    room_types = sorted({room["room_type"] for room in rooms})
+    work = []
+    for _ in range(count):
+        check_in = start + timedelta(days=rng.randrange(days))
+        check_out = check_in + timedelta(days=rng.randint(1, 4))
+        if rng.random() < book_share:
+            work.append(("POST", "/bookings",
+                         {"guest_id": rng.randint(1, 10000),
+                          "room_number": rng.choice(rooms)["room_number"],
+                          "check_in_date": check_in.isoformat(),
+                          "check_out_date": check_out.isoformat()}))
+        else:
+            work.append(("GET", f"/rooms?room_type={rng.choice(room_types)}"
+                                f"&check_in={check_in}&check_out={check_out}", None))
+    return work
+
+
+async def _drive(host: str, port: int, work: List[Tuple[str, str, Any]], pipeline: int,
+                 latencies: List[float], statuses: Dict[int, int]) -> None:
+    """Sends a connection's share of the work, `pipeline` requests in flight at a time."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for first in range(0, len(work), pipeline):
+            batch = work[first:first + pipeline]
+            sent = time.perf_counter()
+            writer.write(b"".join(_request(method, target, payload, host)
+                                  for method, target, payload in batch))
+            await writer.drain()
+            for _ in batch:
+                status, _ = await _read_response(reader)
+                latencies.append(time.perf_counter() - sent)
+                statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, requests: int = 10000, connections: int = 16,
+                   pipeline: int = 1, scenario: str = "mixed", start_date: str = "2030-01-01",
+                   days: int = 365, seed: Optional[int] = None) -> LoadReport:
+    """
+    Runs a load test against a server and returns its report.
+    - requests: Total requests, split evenly over the connections.
+    - connections: Concurrent keep-alive connections.
+    - pipeline: Requests written back to back before reading the answers.
+    - scenario: 'search', 'book' or 'mixed' (one booking in five).
+    - start_date, days: Window the random stays are drawn from.
+    A pipelined request's latency runs from its batch being sent to its answer.
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Scenario must be one of {', '.join(SCENARIOS)}")
+    if requests <= 0 or connections <= 0 or pipeline <= 0 or days <= 0:
+        raise ValueError("Requests, connections, pipeline depth and days must be positive")
+    status, listing = await fetch(host, port, "GET", "/rooms")
+    if status != 200 or not listing["rooms"]:
+        raise ValueError("Server has no rooms to load-test against")
+    rng = random.Random(seed)
+    work = _workload(listing["rooms"], requests, SCENARIOS[scenario],
+                     date.fromisoformat(start_date), days, rng)
+    connections = min(connections, requests)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(_drive(host, port, work[index::connections], pipeline,
+                                  latencies, statuses)
+                           for index in range(connections)))
+    return LoadReport(time.perf_counter() - started, latencies, statuses)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs a load test from the command line and prints the report."""
+    parser = argparse.ArgumentParser(description="Load-test the Royal Stay HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--pipeline", type=int, default=1,
+                        help="requests in flight per connection")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--start-date", default="2030-01-01")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    try:
+        report = asyncio.run(run_load(args.host, args.port, args.requests, args.connections,
+                                      args.pipeline, args.scenario, args.start_date,
+                                      args.days, args.seed))
+    except (OSError, ValueError) as error:
+        print(f"error: {error}")
+        return 1
+    print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
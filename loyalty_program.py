@@ -1,7 +1,9 @@
 """Module for the LoyaltyProgram class."""
 from typing import List
+from compact_date import Day
+from observable import Observable
 
-class LoyaltyProgram:
+class LoyaltyProgram(Observable):
     """
     Represents a loyalty program exactly as defined in UML.
     Contains all attributes and methods specified in Part A.
@@ -16,7 +18,7 @@ class LoyaltyProgram:
         self._rewards_available = rewards_available
         self._guest_id = guest_id
         self._tier = tier
-        self._points_expiry_date = points_expiry_date
+        self._points_expiry_date = Day.of(points_expiry_date)
 
     def get_points_earned(self) -> int:
         """Returns earned points."""
@@ -24,7 +26,10 @@ class LoyaltyProgram:
 
     def set_points_earned(self, points: int) -> None:
         """Sets earned points."""
+        old = self._points_earned
         self._points_earned = points
+        if self._observers:
+            self._notify("points_earned", old, points)
 
     def get_rewards_available(self) -> List[str]:
         """Returns available rewards."""
@@ -32,7 +37,10 @@ class LoyaltyProgram:
 
     def set_rewards_available(self, rewards: List[str]) -> None:
         """Sets available rewards."""
+        old = self._rewards_available
         self._rewards_available = rewards
+        if self._observers:
+            self._notify("rewards_available", old, rewards)
 
     def get_guest_id(self) -> int:
         """Returns guest ID."""
@@ -40,7 +48,10 @@ class LoyaltyProgram:
 
     def set_guest_id(self, guest_id: int) -> None:
         """Sets guest ID."""
+        old = self._guest_id
         self._guest_id = guest_id
+        if self._observers:
+            self._notify("guest_id", old, guest_id)
 
     def get_tier(self) -> str:
         """Returns loyalty tier."""
@@ -48,15 +59,26 @@ class LoyaltyProgram:
 
     def set_tier(self, tier: str) -> None:
         """Sets loyalty tier."""
+        old = self._tier
         self._tier = tier
+        if self._observers:
+            self._notify("tier", old, tier)
 
     def get_points_expiry_date(self) -> str:
         """Returns points expiry date."""
+        return self._points_expiry_date.isoformat()
+
+    def get_points_expiry_day(self) -> Day:
+        """Returns points expiry date as a Day."""
         return self._points_expiry_date
 
     def set_points_expiry_date(self, date: str) -> None:
         """Sets points expiry date."""
-        self._points_expiry_date = date
+        day = Day.of(date)
+        old = self._points_expiry_date
+        self._points_expiry_date = day
+        if self._observers:
+            self._notify("points_expiry_date", str(old), str(day))
 
     def redeem_points(self, points: int) -> str:
         """
@@ -72,7 +94,7 @@ class LoyaltyProgram:
         reward = f"Reward for {points} points"
 
         # Deduct the redeemed points from the guest's total.
-        self._points_earned -= points
+        self.set_points_earned(self._points_earned - points)
 
         # Return the reward string.
         return reward
@@ -4,6 +4,7 @@ Royal Stay Hotel Management System - Main Application
 Updated for separate Room/DeluxeRoom files
 """
 
+import sys
 from datetime import datetime, timedelta
 from room import Room
 from deluxe_room import DeluxeRoom
@@ -15,7 +16,10 @@ from feedback import Feedback
 from guest_service import GuestService
 from premium_service import PremiumService
 from loyalty_program import LoyaltyProgram
+from profiling import profiled
+from report_writer import ReportWriter
 
+@profiled("initialize_sample_data")
 def initialize_sample_data():
     """Creates sample data for demonstration."""
     # Initialize rooms
@@ -70,44 +74,22 @@ def initialize_sample_data():
         "feedback": feedback
     }
 
-def demonstrate_system(data):
-    """Demonstrates all system features with detailed and organized output."""
-    print("\n=== ROOMS ===")
-    for room in data["rooms"]:
-        print(f"  {room}")
-        if isinstance(room, DeluxeRoom):
-            print(f"    - View: {room.get_view()}")
-            print(f"    - Jacuzzi: {'Yes' if room.is_jacuzzi() else 'No'}")
-            print(f"    - Breakfast: {'Included' if room.is_breakfast_included() else 'Not Included'}")
-
-    print("\n=== GUESTS ===")
-    for guest in data["guests"]:
-        print(f"  {guest}")
-        if isinstance(guest, VIPGuest):
-            print(f"    - Personal Assistant: {'Yes' if guest.get_personal_assistant() else 'No'}")
-            print(f"    - Private Transportation: {'Yes' if guest.get_private_transportation() else 'No'}")
-            print(f"    - Dedicated Concierge: {'Yes' if guest.get_dedicated_concierge() else 'No'}")
-
-    print("\n=== BOOKINGS ===")
-    for booking in data["bookings"]:
-        print(f"  {booking.generate_booking_summary()}")
-        print(f"    - Duration: {booking.calculate_booking_duration()} nights")
-
-    print("\n=== SERVICES ===")
-    for service in data["services"]:
-        print(f"  {service}")
-        if isinstance(service, PremiumService):
-            print(f"    - Premium Level: {service.get_premium_level()}")
-
-    print("\n=== INVOICES ===")
-    for invoice in data["invoices"]:
-      print(f"  {invoice}")
-
-    print("\n=== FEEDBACK ===")
-    print(f"   {data['feedback']}")
-
-    print("\n=== LOYALTY PROGRAM ===")
-    print(f"   {data['loyalty']}")
+@profiled("demonstrate_system")
+def demonstrate_system(data, out=None):
+    """
+    Demonstrates all system features with detailed and organized output.
+    The report is streamed through a buffered ReportWriter (stdout by default).
+    """
+    with ReportWriter(out if out is not None else sys.stdout) as writer:
+        writer.write_report({
+            "rooms": data["rooms"],
+            "guests": data["guests"],
+            "bookings": data["bookings"],
+            "services": data["services"],
+            "invoices": data["invoices"],
+            "feedback": [data["feedback"]],
+            "loyalty": [data["loyalty"]],
+        })
 
 def main():
     """Entry point for the application"""
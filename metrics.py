@@ -0,0 +1,441 @@
+"""Module for operation metrics with Prometheus text exposition."""
+
+import importlib
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Histogram resolution: values below SUB_BUCKETS nanoseconds are exact,
+# larger ones keep their top SUB_BUCKET_BITS + 1 bits (about 6% error).
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKETS = 64 * SUB_BUCKETS  # enough for any 64-bit nanosecond value
+
+# Quantiles exported for every histogram.
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Methods timed while metrics are enabled: (module, class or None for a
+# module-level function, attribute, operation label).
+INSTRUMENTED = (
+    ("booking", "Booking", "__init__", "booking_create"),
+    ("booking", "Booking", "validate_dates", "booking_validate_dates"),
+    ("royalstay", None, "_free_rooms", "availability_search"),
+    ("availability_snapshot", "AvailabilitySnapshot", "free_rooms", "snapshot_search"),
+    ("room_inventory", "RoomTypeInventory", "free_rooms", "inventory_search"),
+    ("property_router", "PropertyRouter", "search", "property_search"),
+    ("invoice", "Invoice", "process_payment", "invoice_process_payment"),
+    ("loyalty_program", "LoyaltyProgram", "redeem_points", "loyalty_redeem_points"),
+    ("guest_service", "GuestService", "mark_as_completed", "service_mark_completed"),
+)
+
+OPERATION_SECONDS = "royalstay_operation_duration_seconds"
+OPERATION_ERRORS = "royalstay_operation_errors_total"
+
+
+def _bucket(nanoseconds: int) -> int:
+    """Returns the histogram bucket of a duration."""
+    if nanoseconds < SUB_BUCKETS:
+        return max(nanoseconds, 0)
+    shift = nanoseconds.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + (nanoseconds >> shift) - SUB_BUCKETS
+
+
+def _bucket_upper(index: int) -> int:
+    """Returns the largest duration, in nanoseconds, that falls in a bucket."""
+    if index < SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    top = index % SUB_BUCKETS + SUB_BUCKETS
+    return ((top + 1) << shift) - 1
+
+
+def _value_text(value: float) -> str:
+    """Formats a sample value the way Prometheus spells special floats."""
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _labels_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """Formats labels as {name="value",...}, escaping the values."""
+    if not labels:
+        return ""
+    escaped = [(name, value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+               for name, value in labels]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class _ThreadMarker:
+    """Lives in a thread's local storage and dies with the thread."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _PerThread:
+    """
+    Holds one cell of accumulators per thread. A thread only ever writes
+    its own cell, so updates need no lock; readers sum all cells.
+    When a thread ends, its cell is added into a shared base cell with
+    `fold(base, cell)` and released, so short-lived threads cost nothing
+    once they are gone.
+    """
+
+    def __init__(self, new_cell: Callable[[], list], fold: Callable[[list, list], None]):
+        """Initializes the cells with a factory for a thread's first cell."""
+        self._new_cell = new_cell
+        self._fold = fold
+        self._local = threading.local()
+        self._base = new_cell()  # totals of finished threads
+        self._cells: Dict[int, list] = {}  # id(cell) -> cell of a live thread
+        self._lock = threading.Lock()  # taken once per thread, to register and retire its cell
+
+    def cell(self) -> list:
+        """Returns the calling thread's cell."""
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = self._new_cell()
+            marker = self._local.marker = _ThreadMarker()
+            with self._lock:
+                self._cells[id(cell)] = cell
+            weakref.finalize(marker, _PerThread._retire, weakref.ref(self), cell)
+            return cell
+
+    @staticmethod
+    def _retire(ref: "weakref.ref[_PerThread]", cell: list) -> None:
+        """Folds a finished thread's cell into the base cell."""
+        cells = ref()
+        if cells is not None:
+            with cells._lock:
+                cells._fold(cells._base, cell)
+                del cells._cells[id(cell)]
+
+    def cells(self) -> List[list]:
+        """Returns a copy of the base cell and the cell of every live thread."""
+        with self._lock:
+            # Copied, so a cell folded in while the caller sums is not counted twice.
+            base = self._new_cell()
+            self._fold(base, self._base)
+            return [base, *self._cells.values()]
+
+
+def _fold_counter(base: list, cell: list) -> None:
+    """Adds a counter cell into another."""
+    base[0] += cell[0]
+
+
+def _fold_histogram(base: list, cell: list) -> None:
+    """Adds a histogram cell into another."""
+    base[0] += cell[0]
+    base[1] += cell[1]
+    buckets = base[2]
+    for index, value in enumerate(cell[2]):
+        if value:
+            buckets[index] += value
+
+
+class Counter:
+    """
+    Represents a monotonically increasing count, e.g. failed operations.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[Tuple[str, str], ...] = ()):
+        """Initializes a Counter with its metric name, help text and labels."""
+        self._name = name
+        self._help = help_text
+        self._labels = labels
+        self._cells = _PerThread(lambda: [0.0], _fold_counter)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Adds a non-negative amount."""
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._cells.cell()[0] += amount
+
+    def get_value(self) -> float:
+        """Returns the total over all threads."""
+        return sum(cell[0] for cell in self._cells.cells())
+
+    def samples(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """Returns (sample name, labels, value) for exposition."""
+        return [(self._name, self._labels, self.get_value())]
+
+
+class Gauge:
+    """
+    Represents a value that can go up and down, e.g. rooms currently occupied.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[Tuple[str, str], ...] = ()):
+        """Initializes a Gauge with its metric name, help text and labels."""
+        self._name = name
+        self._help = help_text
+        self._labels = labels
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        """Sets the current value."""
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Raises the value."""
+        self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Lowers the value."""
+        self._value -= amount
+
+    def get_value(self) -> float:
+        """Returns the current value."""
+        return self._value
+
+    def samples(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """Returns (sample name, labels, value) for exposition."""
+        return [(self._name, self._labels, self._value)]
+
+
+class Histogram:
+    """
+    Represents the distribution of a duration with HDR-style buckets.
+
+    Bucket widths grow with the value, so any duration from nanoseconds
+    to hours is kept within about 6%. Each thread fills its own bucket
+    array; quantiles are read from the merged arrays and exported as a
+    Prometheus summary.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[Tuple[str, str], ...] = ()):
+        """Initializes a Histogram with its metric name, help text and labels."""
+        self._name = name
+        self._help = help_text
+        self._labels = labels
+        # [count, sum in seconds, bucket counts]
+        self._cells = _PerThread(lambda: [0, 0.0, [0] * BUCKETS], _fold_histogram)
+
+    def observe_ns(self, nanoseconds: int) -> None:
+        """Records one duration given in nanoseconds."""
+        cell = self._cells.cell()
+        cell[0] += 1
+        cell[1] += nanoseconds / 1e9
+        cell[2][_bucket(nanoseconds)] += 1
+
+    def observe(self, seconds: float) -> None:
+        """Records one duration given in seconds."""
+        self.observe_ns(int(seconds * 1e9))
+
+    def _merged(self) -> Tuple[int, float, List[int]]:
+        """Returns the count, sum and bucket counts over all threads."""
+        count, total = 0, 0.0
+        buckets = [0] * BUCKETS
+        for cell_count, cell_sum, cell_buckets in self._cells.cells():
+            count += cell_count
+            total += cell_sum
+            for index, value in enumerate(cell_buckets):
+                if value:
+                    buckets[index] += value
+        return count, total, buckets
+
+    def get_count(self) -> int:
+        """Returns the number of observations."""
+        return sum(cell[0] for cell in self._cells.cells())
+
+    def get_sum(self) -> float:
+        """Returns the sum of all observations, in seconds."""
+        return sum(cell[1] for cell in self._cells.cells())
+
+    def quantiles(self, quantiles: Iterable[float] = QUANTILES) -> Dict[float, float]:
+        """Returns the upper bound, in seconds, of the bucket holding each quantile."""
+        count, _, buckets = self._merged()
+        result = {}
+        for quantile in sorted(quantiles):
+            if not 0 <= quantile <= 1:
+                raise ValueError("Quantiles must be between 0 and 1")
+            if count == 0:
+                result[quantile] = float("nan")
+                continue
+            rank = max(1, int(quantile * count + 0.5))
+            seen = 0
+            for index, value in enumerate(buckets):
+                seen += value
+                if seen >= rank:
+                    result[quantile] = _bucket_upper(index) / 1e9
+                    break
+        return result
+
+    def samples(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """Returns (sample name, labels, value) for exposition."""
+        count, total, _ = self._merged()
+        samples = [(self._name, self._labels + (("quantile", str(quantile)),), value)
+                   for quantile, value in self.quantiles().items()]
+        samples.append((self._name + "_sum", self._labels, total))
+        samples.append((self._name + "_count", self._labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Holds the metrics of the process and times the INSTRUMENTED methods.
+
+    While disabled the instrumented methods are the original functions,
+    so metrics cost nothing. enable() swaps in timing wrappers that add
+    two clock reads and one lock-free histogram update per call, and
+    count calls that raise; disable() puts the originals back.
+    """
+
+    _TYPES = {Counter: "counter", Gauge: "gauge", Histogram: "summary"}
+
+    def __init__(self):
+        """Initializes an empty, disabled registry."""
+        self._metrics: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Any] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}  # name -> (type, help text)
+        self._lock = threading.Lock()
+        self._originals: List[Tuple[Any, str, Any]] = []  # (owner, attribute, original)
+
+    def _get(self, cls: type, name: str, help_text: str, labels: Dict[str, str]) -> Any:
+        """Returns the metric with a name and labels, creating it on first use."""
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    kind, _ = self._help.setdefault(name, (self._TYPES[cls], help_text))
+                    if kind != self._TYPES[cls]:
+                        raise ValueError(f"Metric {name} is already a {kind}")
+                    metric = self._metrics[key] = cls(name, help_text, key[1])
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already a {self._help[name][0]}")
+        return metric
+
+    def counter(self, name: str, help_text: str = "", **labels: str) -> Counter:
+        """Returns the counter with a name and labels."""
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str = "", **labels: str) -> Gauge:
+        """Returns the gauge with a name and labels."""
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str = "", **labels: str) -> Histogram:
+        """Returns the histogram with a name and labels."""
+        return self._get(Histogram, name, help_text, labels)
+
+    def operation(self, operation: str) -> Histogram:
+        """Returns the duration histogram of an instrumented operation."""
+        return self.histogram(OPERATION_SECONDS, "Time spent per operation call",
+                              operation=operation)
+
+    # Instrumentation
+    def is_enabled(self) -> bool:
+        """Checks if the instrumented methods are being timed."""
+        return bool(self._originals)
+
+    def enable(self) -> None:
+        """Starts timing the INSTRUMENTED methods."""
+        if self._originals:
+            return
+        for module_name, class_name, attribute, operation in INSTRUMENTED:
+            module = importlib.import_module(module_name)
+            owner = getattr(module, class_name) if class_name else module
+            original = owner.__dict__[attribute] if class_name else getattr(module, attribute)
+            setattr(owner, attribute, self._timed(original, operation))
+            self._originals.append((owner, attribute, original))
+
+    def disable(self) -> None:
+        """Stops timing and restores the original methods."""
+        for owner, attribute, original in reversed(self._originals):
+            setattr(owner, attribute, original)
+        self._originals = []
+
+    def _timed(self, function: Callable, operation: str) -> Callable:
+        """Wraps a function to record its duration and count its errors."""
+        histogram = self.operation(operation)
+        errors = self.counter(OPERATION_ERRORS, "Operation calls that raised",
+                              operation=operation)
+        clock = time.perf_counter_ns
+        cells = histogram._cells
+        local = cells._local
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            except BaseException:
+                errors.inc()
+                raise
+            finally:
+                # Histogram.observe_ns inlined: this runs on every call.
+                elapsed = clock() - start
+                try:
+                    cell = local.cell
+                except AttributeError:
+                    cell = cells.cell()
+                cell[0] += 1
+                cell[1] += elapsed / 1e9
+                if elapsed < SUB_BUCKETS:
+                    cell[2][elapsed] += 1
+                else:
+                    shift = elapsed.bit_length() - SUB_BUCKET_BITS - 1
+                    cell[2][(shift + 1) * SUB_BUCKETS + (elapsed >> shift) - SUB_BUCKETS] += 1
+
+        timed.__name__ = function.__name__
+        timed.__qualname__ = function.__qualname__
+        timed.__doc__ = function.__doc__
+        timed.__wrapped__ = function
+        return timed
+
+    # Exposition
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.items(), key=lambda item: item[0])
+        lines = []
+        current = None
+        for (name, _), metric in metrics:
+            if name != current:
+                kind, help_text = self._help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                current = name
+            for sample, labels, value in metric.samples():
+                lines.append(f"{sample}{_labels_text(labels)} {_value_text(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Writes the exposition to a file atomically, e.g. for the node exporter textfile collector."""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as out:
+            out.write(self.render())
+        os.replace(temporary, path)
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1"):
+        """
+        Serves the exposition over HTTP from a background thread.
+        Returns the server; call its shutdown() to stop it.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# Registry shared by the whole process.
+REGISTRY = MetricsRegistry()
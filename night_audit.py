@@ -0,0 +1,285 @@
+"""Module for the nightly audit: no-shows, room status, room charges and service close-out."""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from booking import Booking
+from guest_service import GuestService
+from invoice import Invoice
+from observable import batch_notifications
+from profiling import profiled
+from room import Room
+
+# Audit phases in the order they run inside each shard.
+PHASES = ("no_shows", "room_status", "room_charges", "services")
+
+# Service statuses that count as already closed.
+CLOSED_STATUSES = frozenset({"completed", "cancelled"})
+
+# Plain rows handed to worker processes instead of model objects.
+RoomRow = Tuple[int, float, bool]  # (room number, price per night, available)
+BookingRow = Tuple[int, int, str, str, bool, bool]  # (id, room, check-in, check-out, cancelled, arrived)
+ServiceRow = Tuple[int, str, str]  # (service id, status, request time)
+
+
+# Worker function lives at module level so ProcessPoolExecutor can pickle it.
+def _audit_shard(args: Tuple[List[RoomRow], List[BookingRow], List[ServiceRow], str]
+                 ) -> Tuple[Dict[str, list], Dict[str, float]]:
+    """
+    Audits one shard of rooms with their bookings, plus a share of the
+    service requests. Reads rows only; returns the decisions and the
+    seconds spent in each phase.
+    """
+    rooms, bookings, services, audit_date = args
+    timings = {}
+
+    start = time.perf_counter()
+    no_shows = [booking_id for booking_id, _, check_in, _, cancelled, arrived in bookings
+                if check_in == audit_date and not cancelled and not arrived]
+    timings["no_shows"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    skipped = set(no_shows)
+    in_house = [(booking_id, room_number) for booking_id, room_number, check_in, check_out,
+                cancelled, _ in bookings
+                if not cancelled and booking_id not in skipped
+                and check_in <= audit_date < check_out]
+    occupied = {room_number for _, room_number in in_house}
+    availability = [(room_number, room_number not in occupied)
+                    for room_number, _, available in rooms
+                    if available != (room_number not in occupied)]
+    timings["room_status"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prices = {room_number: price for room_number, price, _ in rooms}
+    charges = [(booking_id, prices[room_number]) for booking_id, room_number in in_house]
+    timings["room_charges"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    closed = [service_id for service_id, status, request_time in services
+              if status.lower() not in CLOSED_STATUSES and request_time[:10] <= audit_date]
+    timings["services"] = time.perf_counter() - start
+
+    decisions = {"no_shows": no_shows, "availability": availability,
+                 "charges": charges, "services": closed}
+    return decisions, timings
+
+
+class AuditResult:
+    """
+    Represents the outcome of one night audit.
+    """
+
+    def __init__(self, audit_date: str, no_shows: List[int], rooms_changed: Dict[int, bool],
+                 charges: Dict[int, float], unbilled: List[int], services_closed: List[int],
+                 timings: Dict[str, float]):
+        """
+        Initializes an AuditResult with:
+        - audit_date: Business date that was audited (YYYY-MM-DD).
+        - no_shows: IDs of bookings cancelled as no-shows.
+        - rooms_changed: New availability of each room whose status changed.
+        - charges: Room charge posted per booking ID.
+        - unbilled: IDs of in-house bookings that have no invoice.
+        - services_closed: IDs of service requests marked completed.
+        - timings: Seconds per phase; shard phases are summed over shards.
+        """
+        self._audit_date = audit_date
+        self._no_shows = no_shows
+        self._rooms_changed = rooms_changed
+        self._charges = charges
+        self._unbilled = unbilled
+        self._services_closed = services_closed
+        self._timings = timings
+
+    def get_audit_date(self) -> str:
+        """Returns the audited business date."""
+        return self._audit_date
+
+    def get_no_shows(self) -> List[int]:
+        """Returns the IDs of bookings cancelled as no-shows."""
+        return list(self._no_shows)
+
+    def get_rooms_changed(self) -> Dict[int, bool]:
+        """Returns the new availability of each room whose status changed."""
+        return dict(self._rooms_changed)
+
+    def get_charges(self) -> Dict[int, float]:
+        """Returns the room charge posted per booking ID."""
+        return dict(self._charges)
+
+    def get_total_charged(self) -> float:
+        """Returns the sum of all room charges posted."""
+        return sum(self._charges.values())
+
+    def get_unbilled(self) -> List[int]:
+        """Returns the IDs of in-house bookings that have no invoice."""
+        return list(self._unbilled)
+
+    def get_services_closed(self) -> List[int]:
+        """Returns the IDs of service requests marked completed."""
+        return list(self._services_closed)
+
+    def get_timings(self) -> Dict[str, float]:
+        """Returns the seconds spent per phase."""
+        return dict(self._timings)
+
+    def __str__(self) -> str:
+        """Returns a string representation of the AuditResult object."""
+        return (f"Night Audit {self._audit_date}: {len(self._no_shows)} no-shows, "
+                f"{len(self._rooms_changed)} room status changes, "
+                f"{len(self._charges)} charges (${self.get_total_charged():.2f}), "
+                f"{len(self._services_closed)} services closed")
+
+
+class NightAudit:
+    """
+    Runs the nightly audit for one business date.
+
+    Rooms are split into shards of `shard_size` consecutive room numbers;
+    each shard travels with the bookings for its rooms, and open service
+    requests are spread evenly over the shards. Shards are audited in a
+    process pool on plain rows and only return decisions. Nothing is
+    changed until every shard has finished; the decisions are then applied
+    inside one notification batch and rolled back if any of them fails,
+    so subscribers such as the change log see the whole audit or nothing.
+
+    The audit posts one night of room charges, so it must run once per date.
+    """
+
+    def __init__(self, shard_size: int = 2_000, workers: Optional[int] = None):
+        """
+        Initializes the audit job.
+        - shard_size: Rooms per shard.
+        - workers: Process count; 1 runs everything in-process.
+        """
+        if shard_size <= 0:
+            raise ValueError("Shard size must be positive")
+        self._shard_size = shard_size
+        self._workers = workers
+
+    def _map(self, tasks: List) -> List:
+        """Runs the shard audits, in worker processes when worthwhile."""
+        if self._workers == 1 or len(tasks) <= 1:
+            return [_audit_shard(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=self._workers) as pool:
+            return list(pool.map(_audit_shard, tasks))
+
+    @profiled("night_audit")
+    def run(self, audit_date: str, rooms: Iterable[Room], bookings: Iterable[Booking],
+            services: Iterable[GuestService] = (), invoices: Iterable[Invoice] = (),
+            arrived: Iterable[int] = ()) -> AuditResult:
+        """
+        Audits the night of `audit_date` and applies the results.
+        - Active bookings starting that day whose ID is not in `arrived`
+          are cancelled as no-shows.
+        - Each room is marked available unless an active booking covers the night.
+        - Every booking in house that night is charged the room's nightly
+          price on its invoice (booking.get_invoice(), else the invoice in
+          `invoices` with its booking ID).
+        - Open service requests made on or before that day are completed.
+        Bookings for rooms not in `rooms` are ignored.
+        Returns the AuditResult.
+        """
+        try:
+            date.fromisoformat(audit_date)
+        except ValueError:
+            raise ValueError("Date must be in YYYY-MM-DD format")
+        timings = {}
+
+        start = time.perf_counter()
+        rooms_by_number: Dict[int, Room] = {}
+        for room in rooms:
+            if room.get_room_number() in rooms_by_number:
+                raise ValueError(f"Duplicate room number: {room.get_room_number()}")
+            rooms_by_number[room.get_room_number()] = room
+        arrived_ids: Set[int] = set(arrived)
+        room_numbers = sorted(rooms_by_number)
+        shard_of = {number: index // self._shard_size for index, number in enumerate(room_numbers)}
+        shard_count = max(1, -(-len(room_numbers) // self._shard_size))
+        room_rows: List[List[RoomRow]] = [[] for _ in range(shard_count)]
+        for number in room_numbers:
+            room = rooms_by_number[number]
+            room_rows[shard_of[number]].append(
+                (number, room.get_price_per_night(), room.is_available()))
+        bookings_by_id: Dict[int, Booking] = {}
+        booking_rows: List[List[BookingRow]] = [[] for _ in range(shard_count)]
+        for booking in bookings:
+            shard = shard_of.get(booking.get_room_number())
+            if shard is None:
+                continue
+            booking_id = booking.get_booking_id()
+            bookings_by_id[booking_id] = booking
+            booking_rows[shard].append((booking_id, booking.get_room_number(),
+                                        booking.get_check_in_date(), booking.get_check_out_date(),
+                                        booking.is_cancelled(), booking_id in arrived_ids))
+        services_by_id: Dict[int, GuestService] = {}
+        service_rows: List[List[ServiceRow]] = [[] for _ in range(shard_count)]
+        for index, service in enumerate(services):
+            services_by_id[service.get_service_id()] = service
+            service_rows[index % shard_count].append(
+                (service.get_service_id(), service.get_status(), service.get_request_time()))
+        tasks = [(room_rows[i], booking_rows[i], service_rows[i], audit_date)
+                 for i in range(shard_count)]
+        timings["partition"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        shard_results = self._map(tasks)
+        timings["shards"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for phase in PHASES:
+            timings[phase] = sum(shard_timings[phase] for _, shard_timings in shard_results)
+        invoices_by_booking = {invoice.get_booking_id(): invoice for invoice in invoices}
+        no_shows: List[int] = []
+        rooms_changed: Dict[int, bool] = {}
+        charges: Dict[int, float] = {}
+        unbilled: List[int] = []
+        services_closed: List[int] = []
+        # (object, setter name, new value, old value) in application order.
+        changes: List[Tuple[Any, str, Any, Any]] = []
+        totals: Dict[int, float] = {}  # id(invoice) -> total after charges so far
+        for decisions, _ in shard_results:
+            for booking_id in decisions["no_shows"]:
+                no_shows.append(booking_id)
+                changes.append((bookings_by_id[booking_id], "set_cancelled", True, False))
+            for number, available in decisions["availability"]:
+                rooms_changed[number] = available
+                changes.append((rooms_by_number[number], "set_availability",
+                                available, not available))
+            for booking_id, price in decisions["charges"]:
+                invoice = (bookings_by_id[booking_id].get_invoice()
+                           or invoices_by_booking.get(booking_id))
+                if invoice is None:
+                    unbilled.append(booking_id)
+                    continue
+                charges[booking_id] = price
+                total = totals.get(id(invoice), invoice.get_total_amount())
+                totals[id(invoice)] = total + price
+                changes.append((invoice, "set_total_amount", total + price, total))
+            for service_id in decisions["services"]:
+                service = services_by_id[service_id]
+                services_closed.append(service_id)
+                changes.append((service, "set_status", "Completed", service.get_status()))
+        timings["merge"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._commit(changes)
+        timings["commit"] = time.perf_counter() - start
+        return AuditResult(audit_date, no_shows, rooms_changed, charges, unbilled,
+                           services_closed, timings)
+
+    @staticmethod
+    def _commit(changes: List[Tuple[Any, str, Any, Any]]) -> None:
+        """Applies all changes in one batch, undoing them if any setter fails."""
+        with batch_notifications():
+            applied = 0
+            try:
+                for obj, setter, new, _ in changes:
+                    getattr(obj, setter)(new)
+                    applied += 1
+            except Exception:
+                for obj, setter, _, old in reversed(changes[:applied]):
+                    getattr(obj, setter)(old)
+                raise
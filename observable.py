@@ -0,0 +1,83 @@
+"""Module for field-level change notification on model objects."""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+# (object, field, old value, new value); field is the attribute name
+# without its leading underscore, e.g. "price_per_night".
+Change = Tuple[Any, str, Any, Any]
+Subscriber = Callable[[List[Change]], None]
+
+_batching = threading.local()
+
+
+class Observable:
+    """
+    Base class that lets subscribers follow changes made through setters.
+
+    Setters call `_notify` only when `self._observers` is non-empty, and
+    the empty default lives on the class, so objects nobody subscribes to
+    pay one attribute check per setter call and store nothing extra.
+    """
+
+    _observers: Tuple = ()
+
+    def subscribe(self, callback: Subscriber) -> None:
+        """
+        Registers a callback that receives a list of changes to this object.
+        Outside a batch the list holds a single change.
+        """
+        if not self._observers:
+            self._observers = []
+        self._observers.append(callback)
+
+    def unsubscribe(self, callback: Subscriber) -> None:
+        """Removes a previously registered callback."""
+        if not self._observers:
+            raise ValueError("Callback is not subscribed")
+        self._observers.remove(callback)
+        if not self._observers:
+            del self._observers
+
+    def _notify(self, field: str, old: Any, new: Any) -> None:
+        """Delivers a change now, or queues it if a batch is open."""
+        pending = getattr(_batching, "pending", None)
+        if pending is not None:
+            key = (id(self), field)
+            queued = pending.get(key)
+            if queued is None:
+                pending[key] = [self, field, old, new]
+            else:
+                queued[3] = new  # keep the first old value and the last new one
+            return
+        changes = [(self, field, old, new)]
+        for callback in list(self._observers):
+            callback(changes)
+
+
+@contextmanager
+def batch_notifications():
+    """
+    Collects changes made inside the block and delivers them on exit.
+    Repeated changes to the same field are coalesced, and each subscriber
+    is called once per object with all of that object's changes.
+    Nested batches are delivered when the outermost one closes.
+    """
+    if getattr(_batching, "pending", None) is not None:
+        yield
+        return
+    _batching.pending = {}
+    try:
+        yield
+    finally:
+        pending: Dict = _batching.pending
+        _batching.pending = None
+        by_object: Dict[int, List[Change]] = {}
+        for obj, field, old, new in pending.values():
+            if old == new:
+                continue  # changed and changed back
+            by_object.setdefault(id(obj), []).append((obj, field, old, new))
+        for changes in by_object.values():
+            for callback in list(changes[0][0]._observers):
+                callback(changes)
@@ -28,7 +28,10 @@ class PremiumService(GuestService):
 
     def set_premium_level(self, level: str) -> None:
         """Sets the premium service level."""
+        old = self._premium_level
         self._premium_level = level
+        if self._observers:
+            self._notify("premium_level", old, level)
 
     def get_specialized_staff(self) -> bool:
         """Returns whether specialized staff is assigned."""
@@ -36,7 +39,10 @@ class PremiumService(GuestService):
 
     def set_specialized_staff(self, has_specialized_staff: bool) -> None:
         """Sets whether specialized staff is assigned."""
+        old = self._specialized_staff
         self._specialized_staff = has_specialized_staff
+        if self._observers:
+            self._notify("specialized_staff", old, has_specialized_staff)
 
     def get_exclusive_access(self) -> bool:
         """Returns whether exclusive access is granted."""
@@ -44,7 +50,10 @@ class PremiumService(GuestService):
 
     def set_exclusive_access(self, has_exclusive_access: bool) -> None:
         """Sets whether exclusive access is granted."""
+        old = self._exclusive_access
         self._exclusive_access = has_exclusive_access
+        if self._observers:
+            self._notify("exclusive_access", old, has_exclusive_access)
 
     def __str__(self) -> str:
         """Returns a string representation of the premium service."""
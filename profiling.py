@@ -0,0 +1,259 @@
+"""Module for opt-in, sampled CPU and allocation profiling of whole operations."""
+
+import functools
+import json
+import os
+import random
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Environment variables read at import, so production can turn profiling
+# on without a code change.
+ENV_DIR = "ROYALSTAY_PROFILE_DIR"
+ENV_RATE = "ROYALSTAY_PROFILE_RATE"
+ENV_TOP = "ROYALSTAY_PROFILE_TOP"
+
+# Frames kept per allocation site.
+TRACEMALLOC_FRAMES = 1
+
+
+def _env_number(name: str, parse: Callable[[str], Any], default: Any,
+                valid: Callable[[Any], bool]) -> Any:
+    """Returns a numeric environment variable, or the default if it is unset or invalid."""
+    text = os.environ.get(name)
+    if text is None:
+        return default
+    try:
+        value = parse(text)
+    except ValueError:
+        value = None
+    if value is None or not valid(value):
+        warnings.warn(f"Ignoring {name}={text!r}; using {default}", RuntimeWarning)
+        return default
+    return value
+
+
+class Profiler:
+    """
+    Profiles a sample of operation runs and writes one artifact per run.
+
+    A sampled run is measured with cProfile and tracemalloc and produces
+    two files in the output directory, named after the operation and the
+    start time: <name>.prof with the full cProfile stats (for pstats or
+    snakeviz) and <name>.json with the wall and CPU time, the peak traced
+    memory, the top functions by cumulative time and the top allocation
+    sites by bytes still held at the end of the run.
+
+    cProfile and tracemalloc serve the whole process, so one run is
+    profiled at a time: runs that start while another is profiled,
+    including runs nested in it, are part of it or are not profiled. A
+    failure to write the artifacts is logged, never raised into the
+    profiled operation. While no output directory is set, a @profiled
+    function only pays for one is_enabled() check per call.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, sample_rate: float = 1.0,
+                 top: int = 25, seed: Optional[int] = None):
+        """
+        Initializes the profiler.
+        - output_dir: Where artifacts go; None leaves profiling off.
+        - sample_rate: Fraction of runs profiled (0.0-1.0).
+        - top: Functions and allocation sites kept in each summary.
+        - seed: Seed for the sampling decisions, for reproducible runs.
+        """
+        self._random = random.Random(seed)
+        self._running = threading.Lock()  # held by the one run being profiled
+        self._output_dir: Optional[str] = None
+        self._sample_rate = 1.0
+        self._top = 25
+        self.configure(output_dir, sample_rate, top)
+
+    @classmethod
+    def from_environment(cls) -> "Profiler":
+        """
+        Returns a profiler configured from the ROYALSTAY_PROFILE_* variables.
+        A malformed rate or top is warned about and replaced by its default,
+        since every model module imports this one.
+        """
+        return cls(os.environ.get(ENV_DIR) or None,
+                   _env_number(ENV_RATE, float, 1.0, lambda rate: 0.0 <= rate <= 1.0),
+                   _env_number(ENV_TOP, int, 25, lambda top: top > 0))
+
+    def configure(self, output_dir: Optional[str], sample_rate: float = 1.0,
+                  top: int = 25) -> None:
+        """Changes where artifacts go and how many runs are sampled."""
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("Sample rate must be between 0.0 and 1.0")
+        if top <= 0:
+            raise ValueError("Top count must be positive")
+        self._output_dir = output_dir
+        self._sample_rate = sample_rate
+        self._top = top
+
+    def is_enabled(self) -> bool:
+        """Checks if runs may be profiled."""
+        return self._output_dir is not None
+
+    def get_output_dir(self) -> Optional[str]:
+        """Returns the artifact directory, or None if profiling is off."""
+        return self._output_dir
+
+    @contextmanager
+    def profile(self, operation: str):
+        """
+        Profiles the block as one run of `operation` if it is sampled.
+        Yields the path of the JSON artifact to be written, or None.
+        """
+        if (self._output_dir is None or self._random.random() >= self._sample_rate
+                or not self._running.acquire(blocking=False)):
+            yield None
+            return
+        try:
+            with self._profiling(operation) as path:
+                yield path
+        finally:
+            self._running.release()
+
+    @contextmanager
+    def _profiling(self, operation: str):
+        """Profiles the block as one run of `operation`; the caller holds _running."""
+        import cProfile
+        import tracemalloc
+
+        started = datetime.now()
+        base = os.path.join(self._output_dir,
+                            f"{operation}-{started:%Y%m%d-%H%M%S-%f}-{os.getpid()}")
+        own_tracing = not tracemalloc.is_tracing()
+        if own_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        wall, cpu = time.perf_counter(), time.process_time()
+        profile.enable()
+        try:
+            yield base + ".json"
+        finally:
+            profile.disable()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if own_tracing:
+                tracemalloc.stop()
+            try:
+                self._write(base, operation, started, wall, cpu, peak, profile, before, after)
+            except Exception:
+                import logging
+
+                logging.getLogger(__name__).exception(
+                    "Cannot write the profile of %s to %s", operation, self._output_dir)
+
+    def _write(self, base: str, operation: str, started: datetime, wall: float, cpu: float,
+               peak: int, profile: Any, before: Any, after: Any) -> None:
+        """Writes the .prof and .json artifacts of one run."""
+        import pstats
+        import tracemalloc
+
+        os.makedirs(self._output_dir, exist_ok=True)
+        profile.dump_stats(base + ".prof")
+        stats = pstats.Stats(profile)
+        functions = []
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            functions.append({"function": f"{os.path.basename(filename)}:{line}({name})",
+                              "calls": calls, "tottime": tottime, "cumtime": cumtime})
+        functions.sort(key=lambda entry: entry["cumtime"], reverse=True)
+        # Leave out what the profiler itself allocates.
+        ignore = [tracemalloc.Filter(False, __file__),
+                  tracemalloc.Filter(False, tracemalloc.__file__)]
+        allocations = []
+        for stat in after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno"):
+            frame = stat.traceback[0]
+            if stat.size_diff <= 0:
+                continue
+            allocations.append({"location": f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                                "size_diff": stat.size_diff, "count_diff": stat.count_diff})
+            if len(allocations) == self._top:
+                break
+        summary = {"operation": operation, "started": started.isoformat(),
+                   "wall_seconds": wall, "cpu_seconds": cpu, "peak_bytes": peak,
+                   "functions": functions[:self._top], "allocations": allocations}
+        with open(base + ".json", "w", encoding="utf-8") as out:
+            json.dump(summary, out, indent=1)
+
+
+# Profiler used by @profiled; configured from the environment at import.
+PROFILER = Profiler.from_environment()
+
+
+def profiled(operation: str) -> Callable[[Callable], Callable]:
+    """Decorator that profiles each sampled call of a function as `operation`."""
+    def decorate(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.is_enabled():
+                return function(*args, **kwargs)
+            with PROFILER.profile(operation):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def load_run(path: str) -> Dict[str, Any]:
+    """Reads the JSON artifact of one profiled run."""
+    try:
+        with open(path, encoding="utf-8") as artifact:
+            run = json.load(artifact)
+    except (OSError, json.JSONDecodeError) as error:
+        raise ValueError(f"Cannot read profile {path}: {error}")
+    if "operation" not in run or "functions" not in run:
+        raise ValueError(f"{path} is not a profile artifact")
+    return run
+
+
+def summarize(run: Dict[str, Any], limit: int = 10) -> List[str]:
+    """Returns report lines for one profiled run."""
+    lines = [f"{run['operation']} at {run['started']}: "
+             f"{run['wall_seconds'] * 1000:.1f} ms wall, {run['cpu_seconds'] * 1000:.1f} ms CPU, "
+             f"peak {run['peak_bytes'] / 1024:.1f} KiB traced",
+             "Top functions by cumulative time:"]
+    for entry in run["functions"][:limit]:
+        lines.append(f"  {entry['cumtime'] * 1000:9.2f} ms  {entry['calls']:8d} calls  "
+                     f"{entry['function']}")
+    lines.append("Top allocation sites by bytes held:")
+    for entry in run["allocations"][:limit]:
+        lines.append(f"  {entry['size_diff'] / 1024:9.1f} KiB  {entry['count_diff']:8d} blocks  "
+                     f"{entry['location']}")
+    return lines
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any], limit: int = 10) -> List[str]:
+    """Returns report lines comparing two runs, largest changes first."""
+    def change(before: float, after: float) -> str:
+        percent = f" ({(after - before) / before:+.0%})" if before else ""
+        return f"{before:.4g} -> {after:.4g}{percent}"
+
+    lines = [f"{old['operation']} vs {new['operation']}",
+             f"wall seconds: {change(old['wall_seconds'], new['wall_seconds'])}",
+             f"CPU seconds: {change(old['cpu_seconds'], new['cpu_seconds'])}",
+             f"peak bytes: {change(old['peak_bytes'], new['peak_bytes'])}",
+             "Functions with the largest change in cumulative time:"]
+    old_times = {entry["function"]: entry["cumtime"] for entry in old["functions"]}
+    new_times = {entry["function"]: entry["cumtime"] for entry in new["functions"]}
+    deltas = sorted(((new_times.get(name, 0.0) - old_times.get(name, 0.0), name)
+                     for name in set(old_times) | set(new_times)),
+                    key=lambda item: abs(item[0]), reverse=True)
+    for delta, name in deltas[:limit]:
+        lines.append(f"  {delta * 1000:+9.2f} ms  {name}")
+    lines.append("Allocation sites with the largest change in bytes held:")
+    old_sizes = {entry["location"]: entry["size_diff"] for entry in old["allocations"]}
+    new_sizes = {entry["location"]: entry["size_diff"] for entry in new["allocations"]}
+    deltas = sorted(((new_sizes.get(site, 0) - old_sizes.get(site, 0), site)
+                     for site in set(old_sizes) | set(new_sizes)),
+                    key=lambda item: abs(item[0]), reverse=True)
+    for delta, site in deltas[:limit]:
+        lines.append(f"  {delta / 1024:+9.1f} KiB  {site}")
+    return lines
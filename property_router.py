@@ -0,0 +1,410 @@
+"""Module for a hotel chain split into property shards, with cross-property search."""
+
+import heapq
+import os
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from availability_refresh import CALENDAR_FIELDS
+from booking import Booking
+from compact_date import Day
+from room import Room
+
+# Room fields that change what a search returns.
+SEARCH_FIELDS = frozenset({"room_type", "price_per_night"})
+
+# Plain rows handed to worker processes instead of model objects.
+# (room number, price per night, sorted check-in days, matching check-out days)
+RoomRow = Tuple[int, float, List[int], List[int]]
+ShardRows = Dict[str, List[RoomRow]]  # lower-case room type -> rooms of that type
+# (stay price, property ID, free rooms, cheapest room number)
+MatchRow = Tuple[float, int, int, int]
+
+# Shards loaded into the worker processes when the pool was started.
+_worker_shards: Dict[int, ShardRows] = {}
+
+
+def _is_free(row: RoomRow, check_in: int, check_out: int) -> bool:
+    """Checks if a room row has no stay overlapping [check_in, check_out)."""
+    _, _, starts, ends = row
+    position = bisect_left(starts, check_in)
+    if position < len(starts) and starts[position] < check_out:
+        return False
+    return position == 0 or ends[position - 1] <= check_in
+
+
+def _rank_key(match: MatchRow) -> Tuple[float, int, int]:
+    """Orders matches by stay price, then most free rooms, then property ID."""
+    return match[0], -match[2], match[1]
+
+
+def _search_rows(property_id: int, rows: ShardRows, room_type: str, check_in: int,
+                 check_out: int, min_rooms: int) -> Optional[MatchRow]:
+    """Returns a property's match for a stay, or None if too few rooms are free."""
+    free = 0
+    cheapest = None
+    for row in rows.get(room_type, ()):
+        if _is_free(row, check_in, check_out):
+            free += 1
+            if cheapest is None or row[1] < cheapest[1]:
+                cheapest = row
+    if free < min_rooms:
+        return None
+    return round(cheapest[1] * (check_out - check_in), 2), property_id, free, cheapest[0]
+
+
+# Worker functions live at module level so ProcessPoolExecutor can pickle them.
+def _load_shards(shards: Dict[int, ShardRows]) -> None:
+    """Pool initializer: keeps every shard's rows in the worker."""
+    _worker_shards.clear()
+    _worker_shards.update(shards)
+
+
+def _search_chunk(args: Tuple[List[int], Dict[int, ShardRows], str, int, int, int, int]
+                  ) -> List[MatchRow]:
+    """
+    Searches a chunk of properties, using the rows sent along for shards
+    that changed since the pool was started. Returns the best `limit`.
+    """
+    property_ids, changed, room_type, check_in, check_out, min_rooms, limit = args
+    matches = []
+    for property_id in property_ids:
+        rows = changed.get(property_id)
+        if rows is None:
+            rows = _worker_shards[property_id]
+        match = _search_rows(property_id, rows, room_type, check_in, check_out, min_rooms)
+        if match is not None:
+            matches.append(match)
+    return heapq.nsmallest(limit, matches, key=_rank_key)
+
+
+class PropertyShard:
+    """
+    Represents one property of the chain with its own rooms, bookings and index.
+
+    Room numbers and booking IDs only need to be unique within the
+    property; across the chain a room is (property ID, room number).
+    The availability index holds, per room type, each room's active stays
+    as sorted day numbers. New bookings are inserted into it; other
+    changes, which the shard follows through change notification, drop it
+    to be rebuilt on next use. Every change bumps the version so the
+    router can tell stale copies of the index apart.
+    """
+
+    def __init__(self, property_id: int, name: str, region: str,
+                 rooms: Iterable[Room] = (), bookings: Iterable[Booking] = ()):
+        """
+        Initializes a PropertyShard with:
+        - property_id: Unique identifier for the property within the chain.
+        - name: Property name.
+        - region: Region used to select properties in searches.
+        - rooms, bookings: The property's rooms and their bookings.
+        """
+        self._property_id = property_id
+        self._name = name
+        self._region = region
+        self._rooms: Dict[int, Room] = {}
+        self._bookings: Dict[int, Booking] = {}
+        self._rows: Optional[ShardRows] = None
+        self._row_of: Dict[int, RoomRow] = {}  # room number -> its row in the index
+        self._version = 0
+        for room in rooms:
+            self.add_room(room)
+        for booking in bookings:
+            self.add_booking(booking)
+
+    def get_property_id(self) -> int:
+        """Returns the property ID."""
+        return self._property_id
+
+    def get_name(self) -> str:
+        """Returns the property name."""
+        return self._name
+
+    def get_region(self) -> str:
+        """Returns the property's region."""
+        return self._region
+
+    def get_room(self, room_number: int) -> Room:
+        """Returns a room of this property."""
+        room = self._rooms.get(room_number)
+        if room is None:
+            raise ValueError(f"Room {room_number} not found at property {self._property_id}")
+        return room
+
+    def get_rooms(self) -> List[Room]:
+        """Returns the property's rooms."""
+        return list(self._rooms.values())
+
+    def get_booking(self, booking_id: int) -> Booking:
+        """Returns a booking of this property."""
+        booking = self._bookings.get(booking_id)
+        if booking is None:
+            raise ValueError(f"Booking {booking_id} not found at property {self._property_id}")
+        return booking
+
+    def get_bookings(self) -> List[Booking]:
+        """Returns the property's bookings."""
+        return list(self._bookings.values())
+
+    def get_version(self) -> int:
+        """Returns a number that changes whenever the index changes."""
+        return self._version
+
+    def _invalidate(self) -> None:
+        """Drops the index so the next use rebuilds it."""
+        self._rows = None
+        self._version += 1
+
+    def add_room(self, room: Room) -> None:
+        """Adds a room to the property."""
+        number = room.get_room_number()
+        if number in self._rooms:
+            raise ValueError(f"Room {number} already exists at property {self._property_id}")
+        self._rooms[number] = room
+        room.subscribe(self._on_room_change)
+        self._invalidate()
+
+    def add_booking(self, booking: Booking) -> None:
+        """Adds a booking for one of the property's rooms, refusing overlaps."""
+        booking_id = booking.get_booking_id()
+        if booking_id in self._bookings:
+            raise ValueError(f"Booking {booking_id} already exists at property {self._property_id}")
+        room_number = booking.get_room_number()
+        self.get_room(room_number)
+        if not booking.is_cancelled():
+            check_in = booking.get_check_in_day()
+            check_out = booking.get_check_out_day()
+            self.rows()
+            row = self._row_of[room_number]
+            if not _is_free(row, check_in, check_out):
+                raise ValueError(f"Room {room_number} is not free for booking {booking_id}")
+            # Insert into the built index rather than rebuilding it.
+            position = bisect_left(row[2], check_in)
+            row[2].insert(position, check_in)
+            row[3].insert(position, check_out)
+            self._version += 1
+        self._bookings[booking_id] = booking
+        booking.subscribe(self._on_booking_change)
+
+    def _on_room_change(self, changes: list) -> None:
+        """Drops the index when a room's type or price changes."""
+        if any(field in SEARCH_FIELDS for _, field, _, _ in changes):
+            self._invalidate()
+
+    def _on_booking_change(self, changes: list) -> None:
+        """Drops the index when a booking's stay changes."""
+        if any(field in CALENDAR_FIELDS for _, field, _, _ in changes):
+            self._invalidate()
+
+    def rows(self) -> ShardRows:
+        """Returns the availability index, rebuilding it if it is stale."""
+        if self._rows is None:
+            stays: Dict[int, List[Tuple[int, int]]] = {number: [] for number in self._rooms}
+            for booking in self._bookings.values():
+                room_stays = stays.get(booking.get_room_number())
+                if room_stays is not None and not booking.is_cancelled():
+                    room_stays.append((booking.get_check_in_day(),
+                                       booking.get_check_out_day()))
+            rows: ShardRows = {}
+            self._row_of = {}
+            for number, room in self._rooms.items():
+                room_stays = sorted(stays[number])
+                row = self._row_of[number] = (number, room.get_price_per_night(),
+                                              [stay[0] for stay in room_stays],
+                                              [stay[1] for stay in room_stays])
+                rows.setdefault(room.get_room_type().lower(), []).append(row)
+            self._rows = rows
+        return self._rows
+
+    def is_free(self, room_number: int, check_in: str, check_out: str) -> bool:
+        """Checks if a room has no active booking overlapping a stay."""
+        self.get_room(room_number)
+        start, stop = Day.parse(check_in), Day.parse(check_out)
+        if stop <= start:
+            raise ValueError("Check-out date must be after check-in date")
+        self.rows()
+        return _is_free(self._row_of[room_number], start, stop)
+
+    def __str__(self) -> str:
+        """Returns a string representation of the PropertyShard object."""
+        return (f"Property #{self._property_id}: {self._name} ({self._region}), "
+                f"{len(self._rooms)} rooms, {len(self._bookings)} bookings")
+
+
+class PropertyMatch:
+    """
+    Represents one property with enough free rooms for a searched stay.
+    """
+
+    def __init__(self, property_id: int, name: str, region: str, free_rooms: int,
+                 room_number: int, stay_price: float):
+        """
+        Initializes a PropertyMatch with:
+        - property_id, name, region: The property.
+        - free_rooms: Rooms of the type free for the whole stay.
+        - room_number: Cheapest free room.
+        - stay_price: Price of the stay in that room.
+        """
+        self._property_id = property_id
+        self._name = name
+        self._region = region
+        self._free_rooms = free_rooms
+        self._room_number = room_number
+        self._stay_price = stay_price
+
+    def get_property_id(self) -> int:
+        """Returns the property ID."""
+        return self._property_id
+
+    def get_name(self) -> str:
+        """Returns the property name."""
+        return self._name
+
+    def get_region(self) -> str:
+        """Returns the property's region."""
+        return self._region
+
+    def get_free_rooms(self) -> int:
+        """Returns how many rooms of the type are free for the stay."""
+        return self._free_rooms
+
+    def get_room_number(self) -> int:
+        """Returns the cheapest free room."""
+        return self._room_number
+
+    def get_stay_price(self) -> float:
+        """Returns the price of the stay in the cheapest free room."""
+        return self._stay_price
+
+    def __str__(self) -> str:
+        """Returns a string representation of the PropertyMatch object."""
+        return (f"{self._name} ({self._region}): {self._free_rooms} free, "
+                f"Room {self._room_number} for ${self._stay_price:.2f}")
+
+
+class PropertyRouter:
+    """
+    Routes work to the property shards of a chain and searches across them.
+
+    search() fans a query out over the properties of a region and gathers
+    each shard's best matches, ranked by stay price, then free rooms. With
+    more than one worker the shards are searched in a process pool that
+    is started once with a copy of every shard's index; a query then only
+    sends property IDs, plus fresh rows for the shards that changed since.
+    When more than a quarter of the shards have changed the pool is
+    restarted with new copies. Call close() (or use the router as a
+    context manager) to stop the pool.
+    """
+
+    def __init__(self, shards: Iterable[PropertyShard] = (), workers: Optional[int] = None,
+                 chunks_per_worker: int = 4):
+        """
+        Initializes the router.
+        - shards: Properties of the chain.
+        - workers: Process count (default: CPU count); 1 searches in-process.
+        - chunks_per_worker: Tasks per worker and query, to even out shard sizes.
+        """
+        self._shards: Dict[int, PropertyShard] = {}
+        self._regions: Dict[str, List[int]] = {}
+        self._workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._chunks_per_worker = chunks_per_worker
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_versions: Dict[int, int] = {}  # property ID -> version loaded in the pool
+        for shard in shards:
+            self.add_property(shard)
+
+    def __enter__(self) -> "PropertyRouter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_property(self, shard: PropertyShard) -> None:
+        """Adds a property to the chain."""
+        property_id = shard.get_property_id()
+        if property_id in self._shards:
+            raise ValueError(f"Property {property_id} already exists")
+        self._shards[property_id] = shard
+        self._regions.setdefault(shard.get_region().lower(), []).append(property_id)
+
+    def route(self, property_id: int) -> PropertyShard:
+        """Returns the shard that owns a property."""
+        shard = self._shards.get(property_id)
+        if shard is None:
+            raise ValueError(f"Property {property_id} not found")
+        return shard
+
+    def add_booking(self, property_id: int, booking: Booking) -> None:
+        """Adds a booking to the property that owns its room."""
+        self.route(property_id).add_booking(booking)
+
+    def get_properties(self, region: Optional[str] = None) -> List[PropertyShard]:
+        """Returns the properties of a region, or of the whole chain."""
+        if region is None:
+            return list(self._shards.values())
+        return [self._shards[property_id]
+                for property_id in self._regions.get(region.lower(), [])]
+
+    def search(self, room_type: str, check_in: str, check_out: str,
+               region: Optional[str] = None, min_rooms: int = 1,
+               limit: int = 20) -> List[PropertyMatch]:
+        """
+        Returns up to `limit` properties, cheapest stay first, with at least
+        `min_rooms` rooms of a type free for the whole stay.
+        - region: Only search this region (default: the whole chain).
+        """
+        start, stop = Day.parse(check_in), Day.parse(check_out)
+        if stop <= start:
+            raise ValueError("Check-out date must be after check-in date")
+        if min_rooms <= 0 or limit <= 0:
+            raise ValueError("Minimum rooms and limit must be positive")
+        property_ids = [shard.get_property_id() for shard in self.get_properties(region)]
+        query = (room_type.lower(), start, stop, min_rooms, limit)
+        if self._workers == 1 or len(property_ids) <= 1:
+            matches = _search_chunk((property_ids,
+                                     {pid: self._shards[pid].rows() for pid in property_ids},
+                                     *query))
+        else:
+            matches = self._search_pool(property_ids, query)
+        ranked = heapq.nsmallest(limit, matches, key=_rank_key)
+        results = []
+        for price, property_id, free, room_number in ranked:
+            shard = self._shards[property_id]
+            results.append(PropertyMatch(property_id, shard.get_name(), shard.get_region(),
+                                         free, room_number, price))
+        return results
+
+    def _search_pool(self, property_ids: List[int], query: Tuple) -> List[MatchRow]:
+        """Fans a query out over the process pool and gathers the matches."""
+        changed = [pid for pid in self._shards
+                   if self._shards[pid].get_version() != self._pool_versions.get(pid)]
+        if self._pool is None or 4 * len(changed) > len(self._shards):
+            self._start_pool()
+            changed = []
+        changed_ids = set(changed)
+        chunk_count = min(len(property_ids), self._workers * self._chunks_per_worker)
+        tasks = []
+        for index in range(chunk_count):
+            chunk = property_ids[index::chunk_count]
+            fresh = {pid: self._shards[pid].rows() for pid in chunk if pid in changed_ids}
+            tasks.append((chunk, fresh, *query))
+        matches: List[MatchRow] = []
+        for chunk_matches in self._pool.map(_search_chunk, tasks):
+            matches.extend(chunk_matches)
+        return matches
+
+    def _start_pool(self) -> None:
+        """(Re)starts the worker pool with a copy of every shard's index."""
+        self.close()
+        snapshot = {pid: shard.rows() for pid, shard in self._shards.items()}
+        self._pool_versions = {pid: shard.get_version() for pid, shard in self._shards.items()}
+        self._pool = ProcessPoolExecutor(max_workers=self._workers, initializer=_load_shards,
+                                         initargs=(snapshot,))
+
+    def close(self) -> None:
+        """Stops the worker pool, if one is running."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,136 @@
+"""Module for per-night room rates and stay costs over a date range."""
+
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Iterable, List, Optional
+
+# Stay queries summed night by night before the prefix-sum array is rebuilt.
+PREFIX_REBUILD_QUERIES = 32
+
+
+class RateCalendar:
+    """
+    Represents the nightly rates of one room over a range of dates.
+
+    Rates are kept in a plain per-night list, and stay costs come from a
+    prefix-sum array in O(1). A rate change rewrites the nights it covers
+    (O(k) list slice operations) and invalidates the array; later queries
+    sum their nights from the list in O(k) until PREFIX_REBUILD_QUERIES of
+    them have been answered, and then the array is rebuilt once. Bursts of
+    updates therefore never pay an O(n) rebuild each, and bursts of quotes
+    run at array speed.
+    """
+
+    def __init__(self, room_number: int, start_date: str, base_rate: float, days: int = 365):
+        """
+        Initializes a RateCalendar with:
+        - room_number: Room the rates apply to.
+        - start_date: First night covered (YYYY-MM-DD).
+        - base_rate: Initial rate for every night.
+        - days: Number of nights covered.
+        """
+        if days <= 0:
+            raise ValueError("Calendar must cover at least one night")
+        if base_rate < 0:
+            raise ValueError("Rate cannot be negative")
+        self._room_number = room_number
+        self._start = self._parse(start_date)
+        self._start_ordinal = self._start.toordinal()
+        self._rates = [float(base_rate)] * days
+        self._prefix: Optional[List[float]] = [0.0, *accumulate(self._rates)]
+        self._summed_queries = 0
+
+    @staticmethod
+    def _parse(day: str) -> date:
+        """Parses a YYYY-MM-DD date."""
+        try:
+            return date.fromisoformat(day)
+        except (TypeError, ValueError):
+            raise ValueError("Date must be in YYYY-MM-DD format")
+
+    def _index(self, day: str, allow_end: bool = False) -> int:
+        """Returns the night index of a date, checking it is covered."""
+        index = self._parse(day).toordinal() - self._start_ordinal
+        if not 0 <= index <= len(self._rates) - (0 if allow_end else 1):
+            raise ValueError(f"Date {day} is outside the rate calendar")
+        return index
+
+    def _range(self, from_date: str, to_date: str) -> range:
+        """Returns the night indexes of [from_date, to_date)."""
+        start = self._index(from_date)
+        stop = self._index(to_date, allow_end=True)
+        if stop <= start:
+            raise ValueError("End date must be after start date")
+        return range(start, stop)
+
+    def get_room_number(self) -> int:
+        """Returns the room number."""
+        return self._room_number
+
+    def get_start_date(self) -> str:
+        """Returns the first night covered."""
+        return self._start.isoformat()
+
+    def get_end_date(self) -> str:
+        """Returns the day after the last night covered."""
+        return (self._start + timedelta(days=len(self._rates))).isoformat()
+
+    def get_rate(self, day: str) -> float:
+        """Returns the rate for the night starting on a date."""
+        return self._rates[self._index(day)]
+
+    def get_rates(self, from_date: str, to_date: str) -> List[float]:
+        """Returns the nightly rates for [from_date, to_date)."""
+        nights = self._range(from_date, to_date)
+        return self._rates[nights.start:nights.stop]
+
+    def set_rates(self, from_date: str, to_date: str, rate: float,
+                  weekdays: Optional[Iterable[int]] = None) -> None:
+        """
+        Sets the rate for the nights in [from_date, to_date).
+        - weekdays: Only change nights on these weekdays (Monday=0 ... Sunday=6),
+          e.g. (4, 5) for Friday and Saturday nights.
+        """
+        if rate < 0:
+            raise ValueError("Rate cannot be negative")
+        nights = self._range(from_date, to_date)
+        rate = float(rate)
+        if weekdays is None:
+            self._rates[nights.start:nights.stop] = [rate] * len(nights)
+        else:
+            # Every seventh night from the first one on each selected weekday.
+            first_weekday = self._start.weekday()
+            for weekday in set(weekdays):
+                first = nights.start + (weekday - first_weekday - nights.start) % 7
+                count = len(range(first, nights.stop, 7))
+                self._rates[first:nights.stop:7] = [rate] * count
+        self._prefix = None
+        self._summed_queries = 0
+
+    def adjust_rates(self, from_date: str, to_date: str, amount: float) -> None:
+        """Adds an amount (negative to lower) to every rate in [from_date, to_date)."""
+        nights = self._range(from_date, to_date)
+        if min(self._rates[nights.start:nights.stop]) + amount < 0:
+            raise ValueError("Rate cannot be negative")
+        self._rates[nights.start:nights.stop] = [rate + amount for rate in
+                                                 self._rates[nights.start:nights.stop]]
+        self._prefix = None
+        self._summed_queries = 0
+
+    def stay_cost(self, check_in: str, check_out: str) -> float:
+        """Returns the total of the nightly rates for a [check_in, check_out) stay."""
+        nights = self._range(check_in, check_out)
+        prefix = self._prefix
+        if prefix is None:
+            self._summed_queries += 1
+            if self._summed_queries < PREFIX_REBUILD_QUERIES:
+                return round(sum(self._rates[nights.start:nights.stop]), 2)
+            prefix = self._prefix = [0.0, *accumulate(self._rates)]
+            self._summed_queries = 0
+        return round(prefix[nights.stop] - prefix[nights.start], 2)
+
+    def __str__(self) -> str:
+        """Returns a string representation of the RateCalendar object."""
+        return (f"Rate Calendar for Room {self._room_number}: "
+                f"{self.get_start_date()} to {self.get_end_date()}, "
+                f"{len(self._rates)} nights")
@@ -0,0 +1,130 @@
+"""Module for memoized rendering of model summaries and string representations."""
+
+import weakref
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from booking import Booking
+from deluxe_room import DeluxeRoom
+from feedback import Feedback
+from invoice import Invoice
+from room import Room
+
+# Fields each cached render method reads, keyed by the class defining it.
+DEPENDENCIES: Dict[Tuple[type, str], FrozenSet[str]] = {
+    (Booking, "generate_booking_summary"): frozenset(
+        {"booking_id", "room_number", "check_in_date", "check_out_date", "is_cancelled"}),
+    (Booking, "__str__"): frozenset(
+        {"booking_id", "room_number", "check_in_date", "check_out_date", "is_cancelled"}),
+    (Invoice, "__str__"): frozenset(
+        {"invoice_id", "total_amount", "discounts", "payment_method", "booking_id", "payment_status"}),
+    (Feedback, "generate_feedback_summary"): frozenset({"feedback_id", "rating", "guest_id"}),
+    (Feedback, "__str__"): frozenset(
+        {"feedback_id", "rating", "comments", "guest_id", "feedback_date"}),
+    (Room, "__str__"): frozenset(
+        {"room_number", "room_type", "price_per_night", "amenities", "availability"}),
+    (DeluxeRoom, "__str__"): frozenset(
+        {"room_number", "view", "jacuzzi", "breakfast_included"}),
+}
+
+
+class RenderCache:
+    """
+    Bounded cache of rendered strings for model objects.
+
+    A cached object is subscribed to change notifications, and a setter
+    only drops the renderings that read the field it changed. At most
+    `max_objects` objects hold cached strings; beyond that the object
+    cached longest ago is evicted and unsubscribed, which returns its
+    setters to the zero-cost path. Entries disappear with their objects.
+    A hit costs two dictionary lookups, so no per-hit recency bookkeeping
+    is done.
+
+    Note: lists returned by getters (e.g. Room.get_amenities) can be
+    mutated without notification; use the model's mutators instead.
+    """
+
+    def __init__(self, max_objects: int = 100_000):
+        """Initializes an empty cache holding at most `max_objects` objects."""
+        self._max_objects = max_objects
+        self._strings: Dict[int, Dict[str, str]] = {}  # id(obj) -> {method: text}
+        self._refs: Dict[int, weakref.ref] = {}
+        self._ref_keys: Dict[weakref.ref, int] = {}
+        self._forget_callback = self._forget
+        self._dependencies: Dict[Tuple[type, str], Optional[FrozenSet[str]]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def render(self, obj: Any, method: str = "__str__") -> str:
+        """Returns obj.<method>(), reusing the cached string when still valid."""
+        key = id(obj)
+        cached = self._strings.get(key)
+        if cached is not None:
+            text = cached.get(method)
+            if text is not None:
+                self._hits += 1
+                return text
+        self._misses += 1
+        text = getattr(obj, method)()
+        if cached is None:
+            cached = self._strings[key] = {}
+            ref = self._refs[key] = weakref.ref(obj, self._forget_callback)
+            self._ref_keys[ref] = key
+            obj.subscribe(self._on_change)
+            if len(self._strings) > self._max_objects:
+                self._evict()
+        cached[method] = text
+        return text
+
+    def _forget(self, ref: weakref.ref) -> None:
+        """Drops the entry of an object that has been garbage collected."""
+        key = self._ref_keys.pop(ref, None)
+        if key is not None:
+            self._strings.pop(key, None)
+            self._refs.pop(key, None)
+
+    def _evict(self) -> None:
+        """Removes the object that has been cached the longest."""
+        key = next(iter(self._strings))
+        del self._strings[key]
+        ref = self._refs.pop(key)
+        del self._ref_keys[ref]
+        obj = ref()
+        if obj is not None:
+            obj.unsubscribe(self._on_change)
+
+    def _fields(self, cls: type, method: str) -> Optional[FrozenSet[str]]:
+        """Returns the fields a method reads, or None if unknown."""
+        cache_key = (cls, method)
+        if cache_key not in self._dependencies:
+            owner = next((klass for klass in cls.__mro__ if method in vars(klass)), cls)
+            self._dependencies[cache_key] = DEPENDENCIES.get((owner, method))
+        return self._dependencies[cache_key]
+
+    def _on_change(self, changes: list) -> None:
+        """Drops cached strings that read any of the changed fields."""
+        obj = changes[0][0]
+        cached = self._strings.get(id(obj))
+        if cached is None:
+            return
+        changed = {field for _, field, _, _ in changes}
+        for method in list(cached):
+            fields = self._fields(type(obj), method)
+            if fields is None or not fields.isdisjoint(changed):
+                del cached[method]
+
+    def clear(self) -> None:
+        """Empties the cache and unsubscribes every cached object."""
+        while self._strings:
+            self._evict()
+
+    def get_hits(self) -> int:
+        """Returns the number of renders served from the cache."""
+        return self._hits
+
+    def get_misses(self) -> int:
+        """Returns the number of renders that had to be computed."""
+        return self._misses
+
+    def __len__(self) -> int:
+        """Returns the number of objects with cached strings."""
+        return len(self._strings)
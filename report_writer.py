@@ -0,0 +1,286 @@
+"""Module for streaming the property report to text, CSV and JSONL outputs."""
+
+import csv
+import json
+import os
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Union
+
+from deluxe_room import DeluxeRoom
+from premium_service import PremiumService
+from profiling import profiled
+from vip_guest import VIPGuest
+
+# Sections in report order.
+SECTIONS = ("rooms", "guests", "bookings", "services", "invoices", "feedback", "loyalty")
+
+_TITLES = {"loyalty": "LOYALTY PROGRAM"}
+
+WRITE_BUFFER_BYTES = 1 << 20
+
+
+def _yes_no(flag: bool) -> str:
+    """Formats a flag the way the report prints it."""
+    return "Yes" if flag else "No"
+
+
+# Text lines per entity, matching the original demonstrate_system output.
+def _room_lines(room) -> Iterator[str]:
+    """Returns the report lines for a room."""
+    yield f"  {room}"
+    if isinstance(room, DeluxeRoom):
+        yield f"    - View: {room.get_view()}"
+        yield f"    - Jacuzzi: {_yes_no(room.is_jacuzzi())}"
+        yield f"    - Breakfast: {'Included' if room.is_breakfast_included() else 'Not Included'}"
+
+
+def _guest_lines(guest) -> Iterator[str]:
+    """Returns the report lines for a guest."""
+    yield f"  {guest}"
+    if isinstance(guest, VIPGuest):
+        yield f"    - Personal Assistant: {_yes_no(guest.get_personal_assistant())}"
+        yield f"    - Private Transportation: {_yes_no(guest.get_private_transportation())}"
+        yield f"    - Dedicated Concierge: {_yes_no(guest.get_dedicated_concierge())}"
+
+
+def _booking_lines(booking) -> Iterator[str]:
+    """Returns the report lines for a booking."""
+    yield f"  {booking.generate_booking_summary()}"
+    yield f"    - Duration: {booking.calculate_booking_duration()} nights"
+
+
+def _service_lines(service) -> Iterator[str]:
+    """Returns the report lines for a service request."""
+    yield f"  {service}"
+    if isinstance(service, PremiumService):
+        yield f"    - Premium Level: {service.get_premium_level()}"
+
+
+def _invoice_lines(invoice) -> Iterator[str]:
+    """Returns the report lines for an invoice."""
+    yield f"  {invoice}"
+
+
+def _single_lines(entity) -> Iterator[str]:
+    """Returns the report line for feedback or a loyalty program."""
+    yield f"   {entity}"
+
+
+# Flat records per entity, used for the CSV and JSONL outputs.
+def _room_record(room) -> Dict[str, Any]:
+    """Returns the export record for a room."""
+    deluxe = isinstance(room, DeluxeRoom)
+    return {"room_number": room.get_room_number(), "room_type": room.get_room_type(),
+            "price_per_night": room.get_price_per_night(), "amenities": room.get_amenities(),
+            "available": room.is_available(),
+            "view": room.get_view() if deluxe else None,
+            "jacuzzi": room.is_jacuzzi() if deluxe else None,
+            "breakfast_included": room.is_breakfast_included() if deluxe else None}
+
+
+def _guest_record(guest) -> Dict[str, Any]:
+    """Returns the export record for a guest."""
+    vip = isinstance(guest, VIPGuest)
+    return {"guest_id": guest.get_guest_id(), "name": guest.get_name(),
+            "contact_info": guest.get_contact_info(), "loyalty_status": guest.get_loyalty_status(),
+            "reservations": len(guest.get_reservation_history()),
+            "personal_assistant": guest.get_personal_assistant() if vip else None,
+            "private_transportation": guest.get_private_transportation() if vip else None,
+            "dedicated_concierge": guest.get_dedicated_concierge() if vip else None}
+
+
+def _booking_record(booking) -> Dict[str, Any]:
+    """Returns the export record for a booking."""
+    return {"booking_id": booking.get_booking_id(), "guest_id": booking.get_guest_id(),
+            "room_number": booking.get_room_number(),
+            "check_in_date": booking.get_check_in_date(),
+            "check_out_date": booking.get_check_out_date(),
+            "nights": booking.calculate_booking_duration(), "cancelled": booking.is_cancelled()}
+
+
+def _service_record(service) -> Dict[str, Any]:
+    """Returns the export record for a service request."""
+    premium = isinstance(service, PremiumService)
+    return {"service_id": service.get_service_id(), "service_type": service.get_service_type(),
+            "status": service.get_status(), "guest_id": service.get_guest_id(),
+            "request_time": service.get_request_time(),
+            "premium_level": service.get_premium_level() if premium else None}
+
+
+def _invoice_record(invoice) -> Dict[str, Any]:
+    """Returns the export record for an invoice."""
+    return {"invoice_id": invoice.get_invoice_id(), "booking_id": invoice.get_booking_id(),
+            "total_amount": invoice.get_total_amount(), "discounts": invoice.get_discounts(),
+            "final_amount": invoice.calculate_total(),
+            "payment_method": invoice.get_payment_method(),
+            "payment_status": invoice.get_payment_status()}
+
+
+def _feedback_record(feedback) -> Dict[str, Any]:
+    """Returns the export record for feedback."""
+    return {"feedback_id": feedback.get_feedback_id(), "guest_id": feedback.get_guest_id(),
+            "rating": feedback.get_rating(), "comments": feedback.get_comments(),
+            "feedback_date": feedback.get_feedback_date()}
+
+
+def _loyalty_record(loyalty) -> Dict[str, Any]:
+    """Returns the export record for a loyalty program."""
+    return {"guest_id": loyalty.get_guest_id(), "tier": loyalty.get_tier(),
+            "points_earned": loyalty.get_points_earned(),
+            "rewards_available": loyalty.get_rewards_available(),
+            "points_expiry_date": loyalty.get_points_expiry_date()}
+
+
+_FORMATTERS: Dict[str, Callable[[Any], Iterator[str]]] = {
+    "rooms": _room_lines, "guests": _guest_lines, "bookings": _booking_lines,
+    "services": _service_lines, "invoices": _invoice_lines,
+    "feedback": _single_lines, "loyalty": _single_lines,
+}
+
+_RECORDS: Dict[str, Callable[[Any], Dict[str, Any]]] = {
+    "rooms": _room_record, "guests": _guest_record, "bookings": _booking_record,
+    "services": _service_record, "invoices": _invoice_record,
+    "feedback": _feedback_record, "loyalty": _loyalty_record,
+}
+
+
+class ReportWriter:
+    """
+    Streams report sections from iterators to text, CSV and JSONL outputs.
+
+    Entities are consumed one at a time, so the full data set never has to
+    be in memory. Text lines are collected into chunks and written with one
+    call per chunk through a 1 MiB buffered file, instead of one print()
+    per line. CSV (one file per section) and JSONL outputs are filled in the
+    same pass when requested.
+    """
+
+    def __init__(self, text_out: Union[str, IO[str], None] = None,
+                 csv_dir: Optional[str] = None, jsonl_out: Union[str, IO[str], None] = None,
+                 sections: Optional[Iterable[str]] = None, page_size: Optional[int] = None,
+                 chunk_lines: int = 4096):
+        """
+        Initializes the writer.
+        - text_out: Path or open text stream for the human-readable report.
+        - csv_dir: Directory receiving one <section>.csv file per section.
+        - jsonl_out: Path or open text stream for JSON lines.
+        - sections: Names of the sections to include (default: all).
+        - page_size: Text lines per page; a page header starts each page.
+        - chunk_lines: Text lines collected before each write call.
+        """
+        selected = tuple(sections) if sections is not None else SECTIONS
+        unknown = set(selected) - set(SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown report sections: {', '.join(sorted(unknown))}")
+        if page_size is not None and page_size <= 0:
+            raise ValueError("Page size must be positive")
+        self._sections = selected
+        self._page_size = page_size
+        self._chunk_lines = chunk_lines
+        self._owned: List[IO[str]] = []
+        self._text = self._open(text_out)
+        self._jsonl = self._open(jsonl_out)
+        self._csv_dir = csv_dir
+        self._pending: List[str] = []
+        self._lines_on_page = 0
+        self._page = 0
+
+    def _open(self, target: Union[str, IO[str], None]) -> Optional[IO[str]]:
+        """Opens a path with a large buffer, or passes a stream through."""
+        if target is None or not isinstance(target, str):
+            return target
+        handle = open(target, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER_BYTES)
+        self._owned.append(handle)
+        return handle
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def includes(self, section: str) -> bool:
+        """Checks if a section is selected for output."""
+        return section in self._sections
+
+    @profiled("report")
+    def write_report(self, sources: Dict[str, Iterable[Any]]) -> None:
+        """Writes every selected section present in `sources`, in report order."""
+        for section in SECTIONS:
+            if section in sources and self.includes(section):
+                self.write_section(section, sources[section])
+
+    def write_section(self, section: str, entities: Iterable[Any]) -> int:
+        """
+        Streams one section to all outputs.
+        Returns the number of entities written (0 if the section is filtered out).
+        """
+        if section not in _FORMATTERS:
+            raise ValueError(f"Unknown report section: {section}")
+        if not self.includes(section):
+            return 0
+        text = self._text is not None
+        jsonl = self._jsonl
+        csv_file = None
+        csv_writer = None
+        record_of = _RECORDS[section]
+        lines_of = _FORMATTERS[section]
+        if text:
+            self._add_line("")
+            self._add_line(f"=== {_TITLES.get(section, section.upper())} ===")
+        count = 0
+        try:
+            for entity in entities:
+                count += 1
+                if text:
+                    for line in lines_of(entity):
+                        self._add_line(line)
+                if jsonl is None and self._csv_dir is None:
+                    continue
+                record = record_of(entity)
+                if jsonl is not None:
+                    jsonl.write(json.dumps({"section": section, **record}) + "\n")
+                if self._csv_dir is not None:
+                    if csv_writer is None:
+                        csv_file = open(os.path.join(self._csv_dir, f"{section}.csv"), "w",
+                                        encoding="utf-8", newline="", buffering=WRITE_BUFFER_BYTES)
+                        csv_writer = csv.writer(csv_file)
+                        csv_writer.writerow(record)
+                    csv_writer.writerow([_csv_value(value) for value in record.values()])
+        finally:
+            if csv_file is not None:
+                csv_file.close()
+        return count
+
+    def _add_line(self, line: str) -> None:
+        """Queues a text line, starting a new page or flushing a chunk when due."""
+        if self._page_size is not None:
+            if self._lines_on_page == 0:
+                self._page += 1
+                self._pending.append(f"--- Page {self._page} ---\n")
+            self._lines_on_page = (self._lines_on_page + 1) % self._page_size
+        self._pending.append(line + "\n")
+        if len(self._pending) >= self._chunk_lines:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes queued text lines to the text output."""
+        if self._pending:
+            self._text.write("".join(self._pending))
+            self._pending = []
+
+    def close(self) -> None:
+        """Flushes all outputs and closes the files this writer opened."""
+        self.flush()
+        for stream in (self._text, self._jsonl):
+            if stream is not None:
+                stream.flush()
+        for handle in self._owned:
+            handle.close()
+        self._owned = []
+
+
+def _csv_value(value: Any) -> Any:
+    """Formats list fields for a single CSV cell."""
+    if isinstance(value, list):
+        return "|".join(str(item) for item in value)
+    return value
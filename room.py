@@ -1,6 +1,8 @@
 """Room class implementation."""
 
-class Room:
+from observable import Observable
+
+class Room(Observable):
     """
     Represents a hotel room.
     Contains attributes and methods for room management.
@@ -25,7 +27,10 @@ class Room:
 
     def set_room_number(self, room_number: int) -> None:
         """Sets the room's unique number."""
+        old = self._room_number
         self._room_number = room_number
+        if self._observers:
+            self._notify("room_number", old, room_number)
 
     def get_room_type(self) -> str:
         """Returns the room's category."""
@@ -33,7 +38,10 @@ class Room:
 
     def set_room_type(self, room_type: str) -> None:
         """Sets the room's category."""
+        old = self._room_type
         self._room_type = room_type
+        if self._observers:
+            self._notify("room_type", old, room_type)
 
     def get_price_per_night(self) -> float:
         """Returns the room's nightly rate."""
@@ -41,7 +49,10 @@ class Room:
 
     def set_price_per_night(self, price: float) -> None:
         """Sets the room's nightly rate."""
+        old = self._price_per_night
         self._price_per_night = price
+        if self._observers:
+            self._notify("price_per_night", old, price)
 
     def get_amenities(self) -> list[str]:
         """Returns the list of amenities in the room."""
@@ -49,7 +60,10 @@ class Room:
 
     def set_amenities(self, amenities: list[str]) -> None:
         """Sets the list of amenities in the room."""
+        old = self._amenities
         self._amenities = amenities
+        if self._observers:
+            self._notify("amenities", old, amenities)
 
     def get_availability(self) -> bool:
         """Returns the room's availability status."""
@@ -57,7 +71,10 @@ class Room:
 
     def set_availability(self, available: bool) -> None:
         """Sets the room's availability status."""
+        old = self._availability
         self._availability = available
+        if self._observers:
+            self._notify("availability", old, available)
 
     def is_available(self) -> bool:
         """Checks if the room is currently available."""
@@ -68,6 +85,8 @@ class Room:
         # Only add the amenity if it's not already in the list.
         if amenity not in self._amenities:
             self._amenities.append(amenity)
+            if self._observers:
+                self._notify("amenities", self._amenities[:-1], self._amenities)
 
     def calculate_total_cost(self, nights: int) -> float:
         """
@@ -0,0 +1,247 @@
+"""Module for assigning room numbers to bookings sold at room-type level."""
+
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from booking import Booking
+from compact_date import Day
+from observable import batch_notifications
+from profiling import profiled
+from room import Room
+
+_NEVER = float("inf")
+
+
+class RoomAssignmentOptimizer:
+    """
+    Gives each booking of one room type a concrete room so that the free
+    nights left over form sellable stretches rather than scattered holes.
+
+    assign() is interval partitioning: bookings are placed in check-in
+    order, and the rooms are kept sorted by the day they next become free.
+    A booking goes to a room that frees up exactly on its check-in day if
+    there is one; otherwise to the room whose idle gap it would close is
+    the shortest that is still sellable (at least `min_stay` nights);
+    only if neither exists does it accept a gap shorter than that, an
+    orphan gap. Each placement is a few binary searches, so 100k bookings
+    over 2k rooms take about a second. Between equally good rooms the
+    booking's current room wins, so re-optimizing moves few bookings.
+
+    Pinned bookings (e.g. a VIP asking for a particular room) are placed
+    in their room, and other bookings are kept out of the way of their
+    dates. Required rooms restrict a booking to a set, e.g. all ocean-view
+    DeluxeRooms. add_booking() places one new booking into the existing
+    plan, and assign(from_date=...) re-optimizes only the stays that
+    start on or after a date, leaving guests who have arrived in place.
+    """
+
+    def __init__(self, rooms: Iterable[Room], min_stay: int = 2):
+        """
+        Initializes the optimizer.
+        - rooms: Rooms of one type to assign.
+        - min_stay: Shortest gap, in nights, that can still be sold.
+        """
+        if min_stay < 1:
+            raise ValueError("Minimum stay must be at least one night")
+        self._rooms = sorted(room.get_room_number() for room in rooms)
+        if not self._rooms:
+            raise ValueError("No rooms to assign")
+        if len(set(self._rooms)) != len(self._rooms):
+            raise ValueError("Duplicate room numbers")
+        self._min_stay = min_stay
+        self._pins: Dict[int, int] = {}  # booking ID -> room number
+        self._requirements: Dict[int, Set[int]] = {}  # booking ID -> allowed rooms
+        self._calendars: Dict[int, List[Tuple[int, int, int]]] = {
+            room: [] for room in self._rooms}  # room -> sorted (in, out, booking ID)
+        self._unassigned: List[int] = []
+
+    def pin(self, booking_id: int, room_number: int) -> None:
+        """Requires a booking to get one particular room."""
+        if room_number not in self._calendars:
+            raise ValueError(f"Room {room_number} is not managed by this optimizer")
+        self._pins[booking_id] = room_number
+
+    def require(self, booking_id: int, room_numbers: Iterable[int]) -> None:
+        """Restricts a booking to a set of acceptable rooms."""
+        allowed = set(room_numbers)
+        if not allowed or not allowed <= set(self._calendars):
+            raise ValueError("Required rooms must be a non-empty set of managed rooms")
+        self._requirements[booking_id] = allowed
+
+    def _allowed(self, booking_id: int, room: int) -> bool:
+        """Checks pins and requirements for a booking and a room."""
+        pinned = self._pins.get(booking_id)
+        if pinned is not None:
+            return room == pinned
+        allowed = self._requirements.get(booking_id)
+        return allowed is None or room in allowed
+
+    @profiled("room_assignment")
+    def assign(self, bookings: Iterable[Booking], from_date: Optional[str] = None) -> int:
+        """
+        Assigns rooms to all active bookings, in one notification batch.
+        - from_date: Keep the rooms of bookings that check in before this
+          date and only re-assign the rest.
+        Bookings that cannot be placed keep their room number and are
+        listed by get_unassigned().
+        Returns the number of bookings whose room number changed.
+        """
+        cutoff = Day.parse(from_date) if from_date is not None else None
+        stays = []
+        for booking in bookings:
+            if booking.is_cancelled():
+                continue
+            stays.append((booking.get_check_in_day(),
+                          booking.get_check_out_day(),
+                          booking.get_booking_id(), booking))
+        if not stays:
+            return 0
+        calendars: Dict[int, List[Tuple[int, int, int]]] = {room: [] for room in self._rooms}
+        horizon_start = cutoff if cutoff is not None else min(stay[0] for stay in stays)
+        free_from = {room: horizon_start for room in self._rooms}
+        movable = []
+        for stay in stays:
+            check_in, check_out, booking_id, booking = stay
+            room = booking.get_room_number()
+            if cutoff is not None and check_in < cutoff and room in calendars:
+                calendars[room].append((check_in, check_out, booking_id))
+                free_from[room] = max(free_from[room], check_out)
+            else:
+                movable.append(stay)
+        movable.sort(key=lambda stay: (stay[0], -stay[1], stay[2]))  # longest first per day
+
+        # Check-in days of pinned stays not yet placed, per room, latest first.
+        pinned_starts: Dict[int, List[int]] = {room: [] for room in self._rooms}
+        for check_in, _, booking_id, _ in movable:
+            if booking_id in self._pins:
+                pinned_starts[self._pins[booking_id]].append(check_in)
+        for starts in pinned_starts.values():
+            starts.sort(reverse=True)
+
+        rooms_by_free = sorted((day, room) for room, day in free_from.items())
+        targets: List[Tuple[Booking, int]] = []
+        unassigned = []
+        for check_in, check_out, booking_id, booking in movable:
+            position = self._choose(rooms_by_free, pinned_starts, free_from, booking_id,
+                                    booking.get_room_number(), check_in, check_out)
+            if booking_id in self._pins:
+                pinned_starts[self._pins[booking_id]].pop()
+            if position is None:
+                unassigned.append(booking_id)
+                continue
+            _, room = rooms_by_free.pop(position)
+            insort(rooms_by_free, (check_out, room))
+            free_from[room] = check_out
+            calendars[room].append((check_in, check_out, booking_id))
+            targets.append((booking, room))
+
+        for calendar in calendars.values():
+            calendar.sort()
+        self._calendars = calendars
+        self._unassigned = unassigned
+        return self._apply(targets)
+
+    def _choose(self, rooms_by_free: List[Tuple[int, int]], pinned_starts: Dict[int, List[int]],
+                free_from: Dict[int, int], booking_id: int, current: int,
+                check_in: int, check_out: int) -> Optional[int]:
+        """Returns the position in rooms_by_free of the best room for a stay, or None."""
+        exact = bisect_left(rooms_by_free, (check_in,))
+        busy = bisect_left(rooms_by_free, (check_in + 1,))
+        orphan = bisect_left(rooms_by_free, (check_in - self._min_stay + 1,))
+        # Exact fits first, then the shortest sellable gap, then the shortest orphan gap.
+        for positions in (range(exact, busy), range(orphan - 1, -1, -1),
+                          range(exact - 1, orphan - 1, -1)):
+            found = None
+            for position in positions:
+                room = rooms_by_free[position][1]
+                if (self._allowed(booking_id, room)
+                        and not self._blocked(pinned_starts, booking_id, room, check_out)):
+                    found = position
+                    break
+            if found is None:
+                continue
+            day = rooms_by_free[found][0]
+            if self._pins:
+                # Among rooms free since the same day, fill the one whose next
+                # pinned stay comes soonest, keeping unpinned rooms open.
+                best, best_key = found, None
+                for position in range(bisect_left(rooms_by_free, (day,)),
+                                      bisect_left(rooms_by_free, (day + 1,))):
+                    room = rooms_by_free[position][1]
+                    if (not self._allowed(booking_id, room)
+                            or self._blocked(pinned_starts, booking_id, room, check_out)):
+                        continue
+                    starts = pinned_starts[room]
+                    key = (starts[-1] if starts else _NEVER, room != current)
+                    if best_key is None or key < best_key:
+                        best, best_key = position, key
+                return best
+            # Between equally good rooms keep the current one, so re-optimizing
+            # moves as few bookings as possible.
+            if (current != rooms_by_free[found][1] and free_from.get(current) == day
+                    and self._allowed(booking_id, current)):
+                return bisect_left(rooms_by_free, (day, current))
+            return found
+        return None
+
+    def _blocked(self, pinned_starts: Dict[int, List[int]], booking_id: int, room: int,
+                 check_out: int) -> bool:
+        """Checks if a stay would run into a pinned stay not yet placed in the room."""
+        starts = pinned_starts[room]
+        return bool(starts) and starts[-1] < check_out and booking_id not in self._pins
+
+    def _apply(self, targets: List[Tuple[Booking, int]]) -> int:
+        """Sets the chosen room numbers; returns how many changed."""
+        changed = 0
+        with batch_notifications():
+            for booking, room in targets:
+                if booking.get_room_number() != room:
+                    booking.set_room_number(room)
+                    changed += 1
+        return changed
+
+    def add_booking(self, booking: Booking) -> int:
+        """
+        Places one new booking into the current plan without moving others,
+        preferring the room where it leaves the fewest orphan gaps and then
+        the tightest fit.
+        Returns the room number assigned.
+        """
+        check_in = booking.get_check_in_day()
+        check_out = booking.get_check_out_day()
+        booking_id = booking.get_booking_id()
+        best = None
+        for room, calendar in self._calendars.items():
+            if not self._allowed(booking_id, room):
+                continue
+            position = bisect_left(calendar, (check_in,))
+            before = calendar[position - 1][1] if position else None
+            after = calendar[position][0] if position < len(calendar) else None
+            if (before is not None and before > check_in) or (after is not None and after < check_out):
+                continue
+            gap_before = check_in - before if before is not None else _NEVER
+            gap_after = after - check_out if after is not None else _NEVER
+            orphans = sum(0 < gap < self._min_stay for gap in (gap_before, gap_after))
+            score = (orphans, min(gap_before, gap_after), room)
+            if best is None or score < best:
+                best = score
+        if best is None:
+            raise ValueError(f"No room is free for booking {booking_id}")
+        room = best[2]
+        insort(self._calendars[room], (check_in, check_out, booking_id))
+        self._apply([(booking, room)])
+        return room
+
+    def get_unassigned(self) -> List[int]:
+        """Returns the IDs of bookings the last assign() could not place."""
+        return list(self._unassigned)
+
+    def count_orphan_nights(self) -> int:
+        """Returns the number of free nights in gaps shorter than the minimum stay."""
+        total = 0
+        for calendar in self._calendars.values():
+            for (_, previous_out, _), (next_in, _, _) in zip(calendar, calendar[1:]):
+                gap = next_in - previous_out
+                if 0 < gap < self._min_stay:
+                    total += gap
+        return total
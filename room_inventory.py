@@ -0,0 +1,242 @@
+"""Module for per-night free-room counts by room type, for allotment-based selling."""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from availability_refresh import CALENDAR_FIELDS
+from booking import Booking
+from compact_date import Day
+from room import Room
+
+
+class _MinAddSegmentTree:
+    """
+    Segment tree over n integers with lazy range add and range minimum,
+    both O(log n). Iterative, with the leaves padded to a power of two.
+    """
+
+    def __init__(self, values: List[int]):
+        """Builds the tree over the given values in O(n)."""
+        size = 1
+        while size < len(values):
+            size *= 2
+        self._size = size
+        self._height = size.bit_length() - 1
+        self._min = [float("inf")] * (2 * size)
+        self._pending = [0] * size  # lazy add not yet pushed to the children
+        self._min[size:size + len(values)] = values
+        for node in range(size - 1, 0, -1):
+            self._min[node] = min(self._min[2 * node], self._min[2 * node + 1])
+
+    def _apply(self, node: int, delta: int) -> None:
+        """Adds delta to a whole subtree, deferring the children."""
+        self._min[node] += delta
+        if node < self._size:
+            self._pending[node] += delta
+
+    def _push(self, leaf: int) -> None:
+        """Pushes pending adds down the path from the root to a leaf."""
+        for shift in range(self._height, 0, -1):
+            node = leaf >> shift
+            delta = self._pending[node]
+            if delta:
+                self._apply(2 * node, delta)
+                self._apply(2 * node + 1, delta)
+                self._pending[node] = 0
+
+    def _pull(self, node: int) -> None:
+        """Recomputes the minimums on the path from a node up to the root."""
+        tree = self._min
+        while node > 1:
+            node >>= 1
+            tree[node] = min(tree[2 * node], tree[2 * node + 1]) + self._pending[node]
+
+    def add(self, start: int, stop: int, delta: int) -> None:
+        """Adds delta to every value in [start, stop)."""
+        left, right = start + self._size, stop + self._size
+        first, last = left, right - 1
+        while left < right:
+            if left & 1:
+                self._apply(left, delta)
+                left += 1
+            if right & 1:
+                right -= 1
+                self._apply(right, delta)
+            left >>= 1
+            right >>= 1
+        self._pull(first)
+        self._pull(last)
+
+    def minimum(self, start: int, stop: int) -> int:
+        """Returns the smallest value in [start, stop)."""
+        left, right = start + self._size, stop + self._size
+        self._push(left)
+        self._push(right - 1)
+        tree = self._min
+        result = float("inf")
+        while left < right:
+            if left & 1:
+                result = min(result, tree[left])
+                left += 1
+            if right & 1:
+                right -= 1
+                result = min(result, tree[right])
+            left >>= 1
+            right >>= 1
+        return result
+
+
+class RoomTypeInventory:
+    """
+    Tracks how many rooms of each type are free on each night of a window.
+
+    Each room type has a segment tree of free-room counts per night, so
+    "how many Deluxe rooms are free on every night of this stay" is a
+    range minimum and booking or releasing a stay is a range add, both
+    O(log nights). Counts start at the number of rooms of the type and
+    are built from the bookings in one pass per type.
+
+    Bookings are followed through change notification, so cancellations,
+    date changes and room moves adjust the counts. Allotments sold to
+    channels without a room number are held with reserve() and release().
+    Nights outside the window are ignored.
+    """
+
+    def __init__(self, rooms: Iterable[Room], bookings: Iterable[Booking],
+                 start_date: str, days: int = 365):
+        """
+        Initializes the inventory.
+        - rooms: Rooms counted per type.
+        - bookings: Bookings that occupy those rooms.
+        - start_date: First night of the window (YYYY-MM-DD).
+        - days: Number of nights in the window.
+        """
+        if days <= 0:
+            raise ValueError("Inventory must cover at least one night")
+        self._start = Day.parse(start_date)
+        self._days = days
+        self._room_types: Dict[int, str] = {}
+        self._capacity: Dict[str, int] = {}
+        for room in rooms:
+            room_type = room.get_room_type().lower()
+            self._room_types[room.get_room_number()] = room_type
+            self._capacity[room_type] = self._capacity.get(room_type, 0) + 1
+        self._trees: Dict[str, _MinAddSegmentTree] = {}
+        self._bookings: Dict[int, Booking] = {}  # id(booking) -> booking
+        self._counted: Dict[int, Optional[Tuple[str, int, int]]] = {}  # id(booking) -> (type, start, stop)
+        self.rebuild(bookings)
+
+    def _nights(self, check_in: str, check_out: str) -> Tuple[int, int]:
+        """Returns the window positions [start, stop) of a stay, requiring it to be inside the window."""
+        start = Day.parse(check_in) - self._start
+        stop = Day.parse(check_out) - self._start
+        if stop <= start:
+            raise ValueError("Check-out date must be after check-in date")
+        if start < 0 or stop > self._days:
+            raise ValueError("Stay is outside the inventory window")
+        return start, stop
+
+    def _span(self, booking: Booking) -> Optional[Tuple[str, int, int]]:
+        """Returns the (type, start, stop) a booking occupies in the window, if any."""
+        room_type = self._room_types.get(booking.get_room_number())
+        if room_type is None or booking.is_cancelled():
+            return None
+        start = max(booking.get_check_in_day() - self._start, 0)
+        stop = min(booking.get_check_out_day() - self._start, self._days)
+        return (room_type, start, stop) if start < stop else None
+
+    def _tree(self, room_type: str) -> _MinAddSegmentTree:
+        """Returns the tree of a room type."""
+        tree = self._trees.get(room_type.lower())
+        if tree is None:
+            raise ValueError(f"No rooms of type {room_type}")
+        return tree
+
+    def rebuild(self, bookings: Iterable[Booking]) -> None:
+        """Recounts every night from scratch and follows exactly these bookings."""
+        for booking in self._bookings.values():
+            booking.unsubscribe(self._on_booking_change)
+        self._bookings = {}
+        self._counted = {}
+        # Difference arrays per type: +1 at check-in, -1 at check-out.
+        changes = {room_type: [0] * (self._days + 1) for room_type in self._capacity}
+        for booking in bookings:
+            key = id(booking)
+            if key in self._bookings:
+                continue
+            self._bookings[key] = booking
+            span = self._counted[key] = self._span(booking)
+            if span is not None:
+                room_type, start, stop = span
+                changes[room_type][start] += 1
+                changes[room_type][stop] -= 1
+            booking.subscribe(self._on_booking_change)
+        for room_type, capacity in self._capacity.items():
+            free = []
+            booked = 0
+            for delta in changes[room_type][:self._days]:
+                booked += delta
+                free.append(capacity - booked)
+            self._trees[room_type] = _MinAddSegmentTree(free)
+
+    def add_booking(self, booking: Booking) -> None:
+        """Counts a new booking and follows its changes."""
+        key = id(booking)
+        if key in self._bookings:
+            raise ValueError(f"Booking {booking.get_booking_id()} already added")
+        self._bookings[key] = booking
+        self._count(booking)
+        booking.subscribe(self._on_booking_change)
+
+    def _count(self, booking: Booking) -> None:
+        """Takes a booking's nights out of the free counts."""
+        span = self._counted[id(booking)] = self._span(booking)
+        if span is not None:
+            room_type, start, stop = span
+            self._trees[room_type].add(start, stop, -1)
+
+    def _on_booking_change(self, changes: list) -> None:
+        """Gives back a booking's old nights and takes its new ones."""
+        if any(field in CALENDAR_FIELDS for _, field, _, _ in changes):
+            booking = changes[0][0]
+            span = self._counted.pop(id(booking))
+            if span is not None:
+                room_type, start, stop = span
+                self._trees[room_type].add(start, stop, 1)
+            self._count(booking)
+
+    def free_rooms(self, room_type: str, check_in: str, check_out: str) -> int:
+        """Returns how many rooms of a type are free on every night of a stay."""
+        start, stop = self._nights(check_in, check_out)
+        return self._tree(room_type).minimum(start, stop)
+
+    def can_sell(self, room_type: str, check_in: str, check_out: str, count: int = 1) -> bool:
+        """Checks if `count` rooms of a type are free on every night of a stay."""
+        return self.free_rooms(room_type, check_in, check_out) >= count
+
+    def reserve(self, room_type: str, check_in: str, check_out: str, count: int = 1) -> None:
+        """Holds `count` rooms of a type for a stay, e.g. for a channel allotment."""
+        if count <= 0:
+            raise ValueError("Count must be positive")
+        if not self.can_sell(room_type, check_in, check_out, count):
+            raise ValueError(f"Not enough {room_type} rooms free for {check_in} to {check_out}")
+        start, stop = self._nights(check_in, check_out)
+        self._tree(room_type).add(start, stop, -count)
+
+    def release(self, room_type: str, check_in: str, check_out: str, count: int = 1) -> None:
+        """Returns `count` previously reserved rooms of a type for a stay."""
+        if count <= 0:
+            raise ValueError("Count must be positive")
+        start, stop = self._nights(check_in, check_out)
+        self._tree(room_type).add(start, stop, count)
+
+    def get_capacity(self, room_type: str) -> int:
+        """Returns the number of rooms of a type."""
+        return self._capacity.get(room_type.lower(), 0)
+
+    def get_start_date(self) -> str:
+        """Returns the first night of the window."""
+        return self._start.isoformat()
+
+    def get_end_date(self) -> str:
+        """Returns the day after the last night of the window."""
+        return self._start.shift(self._days).isoformat()
@@ -0,0 +1,368 @@
+"""
+Royal Stay command-line interface.
+
+Usage:
+    python royalstay.py search ROOM_TYPE CHECK_IN CHECK_OUT
+    python royalstay.py book GUEST_ID ROOM_NUMBER CHECK_IN CHECK_OUT
+    python royalstay.py cancel BOOKING_ID
+    python royalstay.py report [--sections ...] [--csv-dir DIR] [--jsonl FILE]
+    python royalstay.py serve [--host HOST] [--port PORT]
+    python royalstay.py export OUTPUT_DIR [--tables ...] [--parquet]
+    python royalstay.py bench
+    python royalstay.py profile summary RUN.json
+    python royalstay.py profile diff OLD.json NEW.json
+
+Add --metrics FILE before the command to time it and write the
+operation latencies in Prometheus text format (see metrics.py). Set
+ROYALSTAY_PROFILE_DIR to profile the main operations (see profiling.py);
+the profile command reads the runs it writes.
+
+Hotel state lives in an event log plus snapshot under --state (see
+change_log.py) and is seeded with the sample data from main.py on first use.
+New IDs are allocated from ids.json there (see id_allocator.py).
+
+Only the standard library is imported at module level. Every subcommand
+imports the modules it needs inside its handler, so simple commands never
+pay for reporting, benchmarking or optional heavy dependencies such as
+NumPy. test_royal_stay.py enforces STARTUP_BUDGET_SECONDS.
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+DEFAULT_STATE_DIR = "royalstay_state"
+
+# Time allowed for a search on the sample state in a fresh interpreter,
+# from importing this module to printing the result, however long its
+# logged history has grown. A typical run takes about a third of it,
+# leaving room for a loaded test machine.
+STARTUP_BUDGET_SECONDS = 0.1
+
+# Logged events after which the next flush (at the latest when a command
+# exits) snapshots the state, so startup seeks past the history and
+# replays only a short log tail.
+SNAPSHOT_EVERY = 1000
+
+# Longest time `serve` keeps changes buffered before writing them to the log.
+SERVE_FLUSH_SECONDS = 1.0
+
+
+def _open_state(state_dir: str):
+    """
+    Loads the hotel state and opens its event log for writing.
+    Returns (objects keyed by (kind, id), EventLog).
+    """
+    from change_log import open_log
+
+    os.makedirs(state_dir, exist_ok=True)
+    log_path = os.path.join(state_dir, "changes.log")
+    snapshot_path = os.path.join(state_dir, "state.snapshot")
+    objects, log = open_log(log_path, snapshot_path, snapshot_every=SNAPSHOT_EVERY)
+    if not objects:
+        from main import initialize_sample_data
+
+        data = initialize_sample_data()
+        for group in data.values():
+            for obj in (group if isinstance(group, list) else [group]):
+                if not log.is_tracked(obj):
+                    log.track(obj)
+        log.flush()
+        objects = log.get_tracked()
+    return objects, log
+
+
+def _open_ids(state_dir: str, objects: dict):
+    """
+    Returns the IdAllocator of the hotel state, with every sequence above
+    the IDs already in `objects` (e.g. the sample data or older states).
+    """
+    from id_allocator import IdAllocator
+
+    # Blocks start at one ID, so a command that books once leaves no gap.
+    ids = IdAllocator(os.path.join(state_dir, "ids.json"), first_block=1)
+    for kind in ("Booking", "Invoice", "Feedback", "GuestService"):
+        ids.advance(kind, max((key[1] for key in objects if key[0] == kind), default=0))
+    return ids
+
+
+def _of_kind(objects: dict, kind: str) -> list:
+    """Returns the objects of one kind, ordered by ID."""
+    keys = sorted(key for key in objects if key[0] == kind)
+    return [objects[key] for key in keys]
+
+
+def _validate_stay(check_in: str, check_out: str) -> None:
+    """Verifies both dates are YYYY-MM-DD and check-out is after check-in."""
+    from datetime import date
+
+    try:
+        first, last = date.fromisoformat(check_in), date.fromisoformat(check_out)
+    except ValueError:
+        raise ValueError("Date must be in YYYY-MM-DD format")
+    if last <= first:
+        raise ValueError("Check-out date must be after check-in date")
+
+
+def _overlaps(booking, check_in: str, check_out: str) -> bool:
+    """Checks if an active booking overlaps [check_in, check_out); ISO dates compare as strings."""
+    return (not booking.is_cancelled()
+            and booking.get_check_in_date() < check_out
+            and check_in < booking.get_check_out_date())
+
+
+def _free_rooms(objects: dict, room_type: str, check_in: str, check_out: str) -> list:
+    """Returns rooms of a type with no active booking overlapping the stay."""
+    taken = {booking.get_room_number() for booking in _of_kind(objects, "Booking")
+             if _overlaps(booking, check_in, check_out)}
+    return [room for room in _of_kind(objects, "Room")
+            if room.get_room_type().lower() == room_type.lower()
+            and room.get_room_number() not in taken]
+
+
+def cmd_search(args) -> int:
+    """Lists rooms of a type that are free for the given dates."""
+    _validate_stay(args.check_in, args.check_out)
+    objects, log = _open_state(args.state)
+    with log:
+        rooms = _free_rooms(objects, args.room_type, args.check_in, args.check_out)
+    for room in rooms:
+        print(room)
+    if not rooms:
+        print("No rooms available")
+    return 0
+
+
+def cmd_book(args) -> int:
+    """Books a room for a guest if it is free for the given dates."""
+    from booking import Booking
+
+    _validate_stay(args.check_in, args.check_out)
+    objects, log = _open_state(args.state)
+    with log:
+        rooms = {room.get_room_number(): room for room in _of_kind(objects, "Room")}
+        if args.room_number not in rooms:
+            print(f"Room {args.room_number} does not exist", file=sys.stderr)
+            return 1
+        room_type = rooms[args.room_number].get_room_type()
+        free = {room.get_room_number()
+                for room in _free_rooms(objects, room_type, args.check_in, args.check_out)}
+        if args.room_number not in free:
+            print(f"Room {args.room_number} is not available", file=sys.stderr)
+            return 1
+        booking_id = _open_ids(args.state, objects).next_id("Booking")
+        booking = Booking(booking_id, args.guest_id, args.room_number,
+                          args.check_in, args.check_out)
+        log.track(booking)
+    print(booking.generate_booking_summary())
+    return 0
+
+
+def cmd_cancel(args) -> int:
+    """Cancels a booking."""
+    objects, log = _open_state(args.state)
+    with log:
+        booking = objects.get(("Booking", args.booking_id))
+        if booking is None:
+            print(f"Booking {args.booking_id} does not exist", file=sys.stderr)
+            return 1
+        booking.cancel_booking()
+    print(booking.generate_booking_summary())
+    return 0
+
+
+def cmd_report(args) -> int:
+    """Writes the full-property report."""
+    from report_writer import ReportWriter
+
+    objects, log = _open_state(args.state)
+    with log:
+        sources = {
+            "rooms": _of_kind(objects, "Room"),
+            "guests": _of_kind(objects, "Guest"),
+            "bookings": _of_kind(objects, "Booking"),
+            "services": _of_kind(objects, "GuestService"),
+            "invoices": _of_kind(objects, "Invoice"),
+            "feedback": _of_kind(objects, "Feedback"),
+            "loyalty": _of_kind(objects, "LoyaltyProgram"),
+        }
+        with ReportWriter(args.output or sys.stdout, csv_dir=args.csv_dir,
+                          jsonl_out=args.jsonl, sections=args.sections,
+                          page_size=args.page_size) as writer:
+            writer.write_report(sources)
+    return 0
+
+
+async def _flush_every(log, seconds: float) -> None:
+    """Flushes an event log periodically."""
+    import asyncio
+
+    while True:
+        await asyncio.sleep(seconds)
+        log.flush()
+
+
+def cmd_serve(args) -> int:
+    """Serves the HTTP API (see http_api.py) until interrupted."""
+    import asyncio
+
+    from http_api import HotelAPI, HTTPServer
+
+    objects, log = _open_state(args.state)
+    with log:
+        api = HotelAPI(_of_kind(objects, "Room"), _of_kind(objects, "Booking"),
+                       _of_kind(objects, "Invoice"), _of_kind(objects, "Feedback"),
+                       on_create=log.track, ids=_open_ids(args.state, objects))
+        server = HTTPServer(api, args.host, args.port)
+
+        async def serve() -> None:
+            import signal
+
+            print(f"Serving on http://{args.host}:{await server.start()}", flush=True)
+            task = asyncio.current_task()
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+            # Write buffered changes at least once per SERVE_FLUSH_SECONDS.
+            flusher = asyncio.create_task(_flush_every(log, SERVE_FLUSH_SECONDS))
+            try:
+                await server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+            finally:
+                flusher.cancel()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def cmd_export(args) -> int:
+    """Writes bookings, invoices, feedback and services as column files."""
+    try:
+        from columnar_export import TABLES, ColumnarExporter
+
+        exporter = ColumnarExporter(args.output_dir)
+    except ImportError as error:
+        raise ValueError(str(error))
+    kinds = {"bookings": "Booking", "invoices": "Invoice", "feedback": "Feedback",
+             "services": "GuestService"}
+    objects, log = _open_state(args.state)
+    with log:
+        for table in args.tables or list(TABLES):
+            rows = _of_kind(objects, kinds[table])
+            if args.parquet:
+                try:
+                    exporter.export_parquet(table, rows)
+                except ImportError as error:
+                    raise ValueError(str(error))
+            else:
+                exporter.export(table, rows)
+            print(f"{table}: {len(rows)} rows")
+    return 0
+
+
+def cmd_bench(args) -> int:
+    """Runs the micro-benchmarks."""
+    import benchmarks
+
+    benchmarks.main()
+    return 0
+
+
+def cmd_profile(args) -> int:
+    """Summarizes one profiled run or compares two."""
+    import profiling
+
+    if args.action == "summary":
+        if len(args.runs) != 1:
+            raise ValueError("summary takes one profile")
+        lines = profiling.summarize(profiling.load_run(args.runs[0]), args.limit)
+    else:
+        if len(args.runs) != 2:
+            raise ValueError("diff takes two profiles")
+        old, new = (profiling.load_run(path) for path in args.runs)
+        lines = profiling.diff(old, new, args.limit)
+    print("\n".join(lines))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser for all subcommands."""
+    parser = argparse.ArgumentParser(prog="royalstay", description="Royal Stay hotel operations")
+    parser.add_argument("--state", default=DEFAULT_STATE_DIR,
+                        help="directory holding the event log and snapshot")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="time the command and write Prometheus metrics to FILE")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="find free rooms")
+    search.add_argument("room_type")
+    search.add_argument("check_in", help="YYYY-MM-DD")
+    search.add_argument("check_out", help="YYYY-MM-DD")
+    search.set_defaults(handler=cmd_search)
+
+    book = commands.add_parser("book", help="book a room")
+    book.add_argument("guest_id", type=int)
+    book.add_argument("room_number", type=int)
+    book.add_argument("check_in", help="YYYY-MM-DD")
+    book.add_argument("check_out", help="YYYY-MM-DD")
+    book.set_defaults(handler=cmd_book)
+
+    cancel = commands.add_parser("cancel", help="cancel a booking")
+    cancel.add_argument("booking_id", type=int)
+    cancel.set_defaults(handler=cmd_cancel)
+
+    report = commands.add_parser("report", help="write the property report")
+    report.add_argument("--output", help="text report file (default: stdout)")
+    report.add_argument("--sections", nargs="+", help="sections to include")
+    report.add_argument("--page-size", type=int, help="text lines per page")
+    report.add_argument("--csv-dir", help="also write one CSV file per section here")
+    report.add_argument("--jsonl", help="also write JSON lines to this file")
+    report.set_defaults(handler=cmd_report)
+
+    serve = commands.add_parser("serve", help="serve the HTTP API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.set_defaults(handler=cmd_serve)
+
+    export = commands.add_parser("export", help="write column files for analysis")
+    export.add_argument("output_dir")
+    export.add_argument("--tables", nargs="+",
+                        choices=("bookings", "invoices", "feedback", "services"))
+    export.add_argument("--parquet", action="store_true",
+                        help="write Parquet files (needs pyarrow) instead of .npy columns")
+    export.set_defaults(handler=cmd_export)
+
+    bench = commands.add_parser("bench", help="run the micro-benchmarks")
+    bench.set_defaults(handler=cmd_bench)
+
+    profile = commands.add_parser("profile", help="summarize or compare profiled runs")
+    profile.add_argument("action", choices=("summary", "diff"))
+    profile.add_argument("runs", nargs="+", help="JSON artifacts written by profiling.py")
+    profile.add_argument("--limit", type=int, default=10, help="rows per table")
+    profile.set_defaults(handler=cmd_profile)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the command-line interface."""
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        from metrics import REGISTRY
+
+        REGISTRY.enable()
+    try:
+        return args.handler(args)
+    except ValueError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        if args.metrics:
+            REGISTRY.disable()
+            REGISTRY.write_prometheus(args.metrics)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""Module for assigning hotel staff to open premium service requests."""
+
+from typing import Dict, List, Optional, Tuple
+
+from premium_service import PremiumService
+from profiling import profiled
+
+# The exact solver takes about requests^2 x slots steps in pure Python, some
+# 0.4 s for a 150 x 150 matrix. Batches needing more work than a square of
+# this side use the greedy pass instead, so a solve stays under a second.
+HUNGARIAN_MAX_SIDE = 150
+
+INFEASIBLE = float("inf")
+
+
+class Staff:
+    """
+    Represents a staff member who can fulfil premium service requests.
+    """
+
+    def __init__(self, staff_id: int, name: str, skills: List[str],
+                 shift_start: int, shift_end: int, max_load: int = 4,
+                 specialized: bool = False):
+        """
+        Initializes a Staff member with:
+        - staff_id: Unique identifier for the staff member.
+        - name: Full name of the staff member.
+        - skills: Service types the staff member can handle (e.g., "Spa Treatment").
+        - shift_start: Hour of day the shift starts (0-23).
+        - shift_end: Hour of day the shift ends (1-24); may wrap past midnight.
+        - max_load: Maximum number of requests assigned at the same time.
+        - specialized: Whether the staff member counts as specialized staff.
+        """
+        self._staff_id = staff_id
+        self._name = name
+        self._skills = {skill.lower() for skill in skills}
+        self._shift_start = shift_start
+        self._shift_end = shift_end
+        self._max_load = max_load
+        self._specialized = specialized
+
+    def get_staff_id(self) -> int:
+        """Returns the staff member's unique ID."""
+        return self._staff_id
+
+    def get_name(self) -> str:
+        """Returns the staff member's name."""
+        return self._name
+
+    def get_skills(self) -> List[str]:
+        """Returns the staff member's skills."""
+        return sorted(self._skills)
+
+    def get_max_load(self) -> int:
+        """Returns the maximum number of concurrent requests."""
+        return self._max_load
+
+    def is_specialized(self) -> bool:
+        """Returns whether the staff member is specialized staff."""
+        return self._specialized
+
+    def has_skill(self, service_type: str) -> bool:
+        """Checks if the staff member can handle the given service type."""
+        return service_type.lower() in self._skills
+
+    def is_on_shift(self, hour: int) -> bool:
+        """Checks if the given hour of day falls inside the shift window."""
+        if self._shift_start <= self._shift_end:
+            return self._shift_start <= hour < self._shift_end
+        # Overnight shift, e.g. 22 -> 6.
+        return hour >= self._shift_start or hour < self._shift_end
+
+    def __str__(self) -> str:
+        """Returns a string representation of the Staff object."""
+        return (f"Staff {self._staff_id}: {self._name} "
+                f"(Shift: {self._shift_start:02d}-{self._shift_end:02d}, "
+                f"Max Load: {self._max_load})")
+
+
+def _hungarian(costs: List[List[float]]) -> List[int]:
+    """
+    Solves the rectangular assignment problem (rows <= columns) with the
+    shortest augmenting path variant of the Hungarian algorithm.
+    Returns the assigned column for each row, or -1 if the row is infeasible.
+    """
+    n = len(costs)
+    m = len(costs[0]) if n else 0
+    finite = [c for row in costs for c in row if c != INFEASIBLE]
+    # A finite stand-in for forbidden cells that no feasible matching can beat,
+    # kept small enough that the dual potentials stay exact.
+    penalty = (max(finite, default=0) + 1) * (n + 1)
+    big = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)  # p[j]: row (1-based) matched to column j
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [big] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = costs[i0 - 1]
+            ui0 = u[i0]
+            delta = big
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    c = row[j - 1]
+                    cur = (penalty if c == INFEASIBLE else c) - ui0 - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    result = [-1] * n
+    for j in range(1, m + 1):
+        if p[j] and costs[p[j] - 1][j - 1] != INFEASIBLE:
+            result[p[j] - 1] = j - 1
+    return result
+
+
+class StaffAssignmentEngine:
+    """
+    Matches open premium service requests to available staff.
+
+    Each staff member is expanded into one slot per unit of spare capacity;
+    slot k costs k, so the optimal matching spreads work evenly. Batches
+    that are small enough are solved exactly as a min-cost bipartite
+    matching, larger ones fall back to a most-constrained-first greedy pass.
+    Existing assignments are kept, so adding requests only solves the delta.
+    """
+
+    def __init__(self, staff: Optional[List[Staff]] = None,
+                 max_side: int = HUNGARIAN_MAX_SIDE):
+        """
+        Initializes the engine with an optional list of staff members.
+        - max_side: Side of the largest square request x slot matrix solved
+          exactly; rectangular ones may be solved up to the same work.
+        """
+        self._staff: Dict[int, Staff] = {}
+        self._load: Dict[int, int] = {}
+        self._assignments: Dict[int, int] = {}  # service_id -> staff_id
+        self._pending: Dict[int, PremiumService] = {}
+        self._max_side = max_side
+        for member in staff or []:
+            self.add_staff(member)
+
+    def add_staff(self, staff: Staff) -> None:
+        """Adds a staff member to the pool."""
+        self._staff[staff.get_staff_id()] = staff
+        self._load.setdefault(staff.get_staff_id(), 0)
+
+    def add_request(self, service: PremiumService) -> None:
+        """Queues an open premium request for the next solve."""
+        if not isinstance(service, PremiumService):
+            raise ValueError("Only premium service requests are assigned to staff")
+        if service.get_status() == "Completed":
+            raise ValueError("Cannot assign a completed service")
+        if service.get_service_id() in self._assignments:
+            raise ValueError("Service already assigned")
+        self._pending[service.get_service_id()] = service
+
+    def release(self, service_id: int) -> None:
+        """Frees the staff capacity held by a finished or cancelled request."""
+        staff_id = self._assignments.pop(service_id, None)
+        if staff_id is None:
+            self._pending.pop(service_id, None)
+            return
+        self._load[staff_id] -= 1
+
+    def get_assignments(self) -> Dict[int, int]:
+        """Returns the current mapping of service IDs to staff IDs."""
+        return dict(self._assignments)
+
+    def get_assigned_staff(self, service_id: int) -> Optional[Staff]:
+        """Returns the staff member assigned to a service, if any."""
+        staff_id = self._assignments.get(service_id)
+        return self._staff.get(staff_id) if staff_id is not None else None
+
+    def get_unassigned(self) -> List[int]:
+        """Returns IDs of requests still waiting for staff."""
+        return list(self._pending)
+
+    def get_load(self, staff_id: int) -> int:
+        """Returns the number of requests assigned to a staff member."""
+        return self._load[staff_id]
+
+    def _eligible(self, service: PremiumService) -> List[Staff]:
+        """Returns staff members who may take the given request."""
+        hour = service.get_request_timestamp().get_hour()
+        needs_specialist = service.get_specialized_staff()
+        return [s for s in self._staff.values()
+                if s.has_skill(service.get_service_type())
+                and s.is_on_shift(hour)
+                and (s.is_specialized() or not needs_specialist)
+                and self._load[s.get_staff_id()] < s.get_max_load()]
+
+    @staticmethod
+    def _slot_cost(service: PremiumService, load: int) -> float:
+        """Returns the cost of giving a staff member one more request."""
+        # Exclusive-access requests strongly prefer a staff member with no other work.
+        return load * (10 if service.get_exclusive_access() else 1)
+
+    @profiled("staff_assignment")
+    def solve(self) -> Dict[int, int]:
+        """
+        Assigns all pending requests that can be served.
+        Returns the mapping of newly assigned service IDs to staff IDs.
+        """
+        requests = list(self._pending.values())
+        candidates = [self._eligible(service) for service in requests]
+        slots: List[Tuple[int, int]] = []  # (staff_id, load if taken)
+        for staff in self._staff.values():
+            sid = staff.get_staff_id()
+            for load in range(self._load[sid], staff.get_max_load()):
+                slots.append((sid, load))
+
+        if (requests and len(requests) <= len(slots)
+                and len(requests) ** 2 * len(slots) <= self._max_side ** 3):
+            new = self._solve_exact(requests, candidates, slots)
+        else:
+            new = self._solve_greedy(requests, candidates)
+
+        for service_id, staff_id in new.items():
+            self._assignments[service_id] = staff_id
+            self._load[staff_id] += 1
+            del self._pending[service_id]
+        return new
+
+    def _solve_exact(self, requests: List[PremiumService],
+                     candidates: List[List[Staff]],
+                     slots: List[Tuple[int, int]]) -> Dict[int, int]:
+        """Solves the batch as a min-cost bipartite matching."""
+        costs = []
+        for service, eligible in zip(requests, candidates):
+            allowed = {s.get_staff_id() for s in eligible}
+            costs.append([self._slot_cost(service, load) if sid in allowed else INFEASIBLE
+                          for sid, load in slots])
+        result = {}
+        for service, column in zip(requests, _hungarian(costs)):
+            if column >= 0:
+                result[service.get_service_id()] = slots[column][0]
+        return result
+
+    def _solve_greedy(self, requests: List[PremiumService],
+                      candidates: List[List[Staff]]) -> Dict[int, int]:
+        """Assigns the most constrained requests first to the least loaded staff."""
+        load = dict(self._load)
+        result = {}
+        order = sorted(range(len(requests)), key=lambda i: len(candidates[i]))
+        for i in order:
+            service = requests[i]
+            best = None
+            best_cost = INFEASIBLE
+            for staff in candidates[i]:
+                sid = staff.get_staff_id()
+                if load[sid] >= staff.get_max_load():
+                    continue
+                cost = self._slot_cost(service, load[sid])
+                if cost < best_cost:
+                    best, best_cost = sid, cost
+            if best is not None:
+                load[best] += 1
+                result[service.get_service_id()] = best
+        return result
@@ -8,19 +8,51 @@ Each test case includes at least two examples and handles relevant exceptions.
 import unittest
 from datetime import datetime, timedelta
 from io import StringIO
+import asyncio
+import json
+import os
+import subprocess
 import sys
+import tempfile
+import urllib.request
 
 # Import all modules from the hotel management system
 from room import Room
+from room_assignment import RoomAssignmentOptimizer
+from room_inventory import RoomTypeInventory
 from deluxe_room import DeluxeRoom
 from guest import Guest
 from vip_guest import VIPGuest
 from booking import Booking
+from booking_modification import BookingChange, BookingModifier
 from invoice import Invoice
 from loyalty_program import LoyaltyProgram
+from main import demonstrate_system, initialize_sample_data
+from metrics import MetricsRegistry
 from guest_service import GuestService
+from http_api import HotelAPI, HTTPServer
+from load_generator import fetch, run_load
 from premium_service import PremiumService
 from feedback import Feedback
+from availability_cache import AvailabilityCache
+from availability_refresh import AvailabilityRefresher
+from availability_snapshot import SnapshotPublisher
+from change_log import EventLog, open_log, recover
+import columnar_export
+import dynamic_pricing
+from dynamic_pricing import DynamicPricingEngine, PricingRules
+from guest_deduplication import GuestDeduplicator
+from guest_directory import GuestDirectory
+from night_audit import NightAudit
+from observable import batch_notifications
+import profiling
+from property_router import PropertyRouter, PropertyShard
+from rate_calendar import PREFIX_REBUILD_QUERIES, RateCalendar
+from render_cache import RenderCache
+from report_writer import ReportWriter
+import royalstay
+from staff_assignment import Staff, StaffAssignmentEngine
+from waitlist import Waitlist, WaitlistEntry
 
 
 class HotelSystemTests(unittest.TestCase):
@@ -785,7 +817,1391 @@ class HotelSystemTests(unittest.TestCase):
                 datetime.now().strftime("%Y-%m-%d")
             ).validate_rating()
 
+    def test_staff_assignment(self):
+        """
+        Test Case 12: Staff Assignment for Premium Services
+
+        Test matching premium service requests to skilled, on-shift staff.
+        """
+        morning = self.tomorrow + " 10:00:00"
+        therapist = Staff(1, "Salma Al-Harthi", ["Spa Treatment"], 8, 16, max_load=1,
+                          specialized=True)
+        butler = Staff(2, "Faisal Al-Rumaithi", ["Butler", "Spa Treatment"], 8, 16, max_load=2)
+        night_butler = Staff(3, "Hessa Al-Marri", ["Butler"], 22, 6, max_load=2)
+        engine = StaffAssignmentEngine([therapist, butler, night_butler])
+
+        # Example 1: A specialist request must go to the specialized therapist,
+        # which leaves the plain spa request for the butler
+        spa_specialist = PremiumService(1, "Spa Treatment", "Pending", 1, morning,
+                                        "Platinum", True, False)
+        spa_plain = PremiumService(2, "Spa Treatment", "Pending", 2, morning,
+                                   "Gold", False, False)
+        engine.add_request(spa_specialist)
+        engine.add_request(spa_plain)
+        self.assertEqual(engine.solve(), {1: 1, 2: 2})
+
+        # Example 2: Incremental solve respects shift windows and remaining load
+        late_butler = PremiumService(3, "Butler", "Pending", 3, self.tomorrow + " 23:30:00",
+                                     "Gold", False, False)
+        engine.add_request(late_butler)
+        self.assertEqual(engine.solve(), {3: 3})
+        self.assertEqual(engine.get_load(2), 1)
+
+        # A request nobody can serve stays pending until capacity frees up
+        spa_extra = PremiumService(4, "Spa Treatment", "Pending", 4, morning,
+                                   "Platinum", True, False)
+        engine.add_request(spa_extra)
+        self.assertEqual(engine.solve(), {})
+        self.assertEqual(engine.get_unassigned(), [4])
+        engine.release(1)
+        self.assertEqual(engine.solve(), {4: 1})
+
+        # Greedy fallback gives the same answer on this batch
+        greedy = StaffAssignmentEngine([therapist, butler], max_side=0)
+        greedy.add_request(spa_specialist)
+        greedy.add_request(spa_plain)
+        self.assertEqual(greedy.solve(), {1: 1, 2: 2})
+
+        # Exception test: Completed and non-premium services cannot be assigned
+        with self.assertRaises(ValueError):
+            done = GuestService(5, "Butler", "Completed", 5, morning)
+            engine.add_request(done)
+        with self.assertRaises(ValueError):
+            engine.add_request(GuestService(6, "Butler", "Pending", 6, morning))
+
+    def test_guest_directory(self):
+        """
+        Test Case 13: Guest Directory Lookup
+
+        Test finding guests by ID, contact and partial name.
+        """
+        guest1 = Guest(1, "Ali AlKhaldi", "Ali@Email.com", "Silver", [])
+        guest2 = Guest(2, "José Núñez", "+971 50-123-4567", "Basic", [])
+        guest3 = Guest(3, "Khalid Al-Blooshi", "khalid@email.com", "Gold", [])
+        directory = GuestDirectory([guest1, guest2])
+        directory.add(guest3)
+
+        # Example 1: ID and normalized contact lookups
+        self.assertEqual(len(directory), 3)
+        self.assertIs(directory.get(2), guest2)
+        self.assertEqual(directory.find_by_contact("ali@email.COM"), [guest1])
+        self.assertEqual(directory.find_by_contact("971501234567"), [guest2])
+
+        # Example 2: Type-ahead ignores case and diacritics and matches any word
+        self.assertEqual(directory.search_name("jose nu"), [guest2])
+        self.assertEqual(directory.search_name("NUNEZ"), [guest2])
+        self.assertEqual(directory.search_name("khal"), [guest3])
+        self.assertEqual(directory.search_name("blo"), [guest3])
+        self.assertEqual([g.get_guest_id() for g in directory.search_name("al")], [3, 1])
+        self.assertEqual(directory.search_name("al", limit=1), [guest3])
+
+        # The directory follows setter changes
+        guest1.set_name("Ali Al-Hosani")
+        guest1.set_contact_info("ali.hosani@email.com")
+        self.assertEqual(directory.search_name("alkhaldi"), [])
+        self.assertEqual(directory.search_name("al-hos"), [guest1])
+        self.assertEqual(directory.find_by_contact("Ali@Email.com"), [])
+        self.assertEqual(directory.find_by_contact("ALI.HOSANI@email.com"), [guest1])
+
+        directory.remove(3)
+        self.assertNotIn(3, directory)
+        self.assertEqual(directory.search_name("khal"), [])
+
+        # Exception test: Guest IDs must be unique
+        with self.assertRaises(ValueError):
+            directory.add(Guest(2, "Duplicate", "dup@email.com", "Basic", []))
+        with self.assertRaises(ValueError):
+            guest1.set_guest_id(2)
+        self.assertEqual(guest1.get_guest_id(), 1)
+        self.assertIs(directory.get(1), guest1)
+        self.assertIs(directory.get(2), guest2)
+
+    def test_guest_deduplication(self):
+        """
+        Test Case 14: Duplicate Guest Detection
+
+        Test proposing merges for guest records of the same person.
+        """
+        booking = Booking(1, 2, 101, self.tomorrow, self.day_after_tomorrow)
+        original = Guest(1, "Mohammed Al-Zaabi", "mohammed@email.com", "Gold", [])
+        respelled = Guest(2, "Mohamed Al Zaabi", "MOHAMMED@email.com", "Basic", [booking])
+        phone1 = Guest(3, "Aisha Al-Nuaimi", "+971 50 555 0101", "Basic", [])
+        phone2 = Guest(4, "Aisha Nuaimi", "971505550101", "Basic", [])
+        other = Guest(5, "Sultan Al-Qasimi", "sultan@email.com", "Basic", [])
+        job = GuestDeduplicator(threshold=0.6, workers=1)
+
+        proposals = job.find_duplicates([original, respelled, phone1, phone2, other])
+        pairs = {(p.get_primary_id(), p.get_duplicate_id()) for p in proposals}
+
+        # Example 1: Respelled name with the same email; the guest holding
+        # the reservation history is kept as the primary record
+        self.assertIn((2, 1), pairs)
+
+        # Example 2: Phone numbers in different formats block together
+        self.assertIn((3, 4), pairs)
+        self.assertEqual(len(pairs), 2)
+        for proposal in proposals:
+            self.assertGreaterEqual(proposal.get_score(), 0.6)
+            self.assertEqual(proposal.get_contact_similarity(), 1.0)
+
+        # Unrelated guests never become candidates
+        candidates = job.candidate_pairs([(1, "ali alkhaldi", "ali@email.com"),
+                                          (2, "reem al-shamsi", "reem@email.com")])
+        self.assertEqual(candidates, set())
+        shared = job.candidate_pairs([(1, "ali alkhaldi", "ali@email.com"),
+                                      (2, "sara hassan", "ali@email.com")])
+        self.assertEqual(shared, {(1, 2)})
+
+        # Example 3: A process pool proposes the same merges as a single worker
+        pooled = GuestDeduplicator(threshold=0.6, workers=2, chunk_size=2)
+        self.assertEqual([str(p) for p in pooled.find_duplicates([original, respelled, phone1,
+                                                                    phone2, other])],
+                         [str(p) for p in proposals])
+
+        # Exception test: Missing contacts do not count as matching ones
+        unreachable = [Guest(6, "Omar Al-Mansoori", "", "Basic", []),
+                       Guest(7, "Omar Al-Mansoori", "", "Basic", [])]
+        proposals = job.find_duplicates(unreachable)
+        self.assertEqual([p.get_contact_similarity() for p in proposals], [0.0])
+        self.assertEqual(proposals[0].get_score(), 0.6)
+
+    def test_change_log_recovery(self):
+        """
+        Test Case 15: Change Log with Snapshot and Replay
+
+        Test recovering model state from a snapshot plus the logged tail.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            log_path = os.path.join(folder, "changes.log")
+            snapshot_path = os.path.join(folder, "state.snapshot")
+
+            # Example 1: Setter and mutator calls are captured and replayed
+            with EventLog(log_path, snapshot_path, batch_size=2, snapshot_every=4) as log:
+                booking = Booking(1, 1, 101, self.tomorrow, self.next_week)
+                invoice = Invoice(1, 699.93, 0.0, "Credit Card", 1, "Pending")
+                log.track(booking)
+                log.track(invoice)
+                log.track(self.standard_room1)
+                booking.set_invoice(invoice)
+                invoice.set_payment_status("Paid")
+                self.standard_room1.set_availability(False)
+                booking.cancel_booking()
+                self.standard_room1.add_amenity("Balcony")
+
+            restored = recover(log_path, snapshot_path)
+            self.assertTrue(os.path.exists(snapshot_path))
+            restored_booking = restored[("Booking", 1)]
+            restored_room = restored[("Room", 101)]
+            self.assertTrue(restored_booking.is_cancelled())
+            self.assertIs(restored_booking.get_invoice(), restored[("Invoice", 1)])
+            self.assertEqual(restored_booking.get_invoice().get_payment_status(), "Paid")
+            self.assertFalse(restored_room.is_available())
+            self.assertEqual(restored_room.get_amenities(), ["Wi-Fi", "TV", "Balcony"])
+
+            # Example 2: Reopening the log continues the sequence
+            with EventLog(log_path, snapshot_path) as log:
+                last = log.get_sequence()
+                room = restored_room
+                log.track(room)
+                room.set_price_per_night(89.99)
+                self.assertEqual(log.get_sequence(), last + 2)
+            self.assertEqual(recover(log_path, snapshot_path)[("Room", 101)].get_price_per_night(), 89.99)
+
+            # Example 3: A snapshot of a partial session keeps the untracked entities,
+            # and a torn tail is dropped before new batches are appended
+            with EventLog(log_path, snapshot_path) as log:
+                log.track(Room(102, "Standard", 79.99))
+                log.snapshot()
+            with open(log_path, "ab") as handle:
+                handle.write(b"\x80\x05\x95\xff\xff\xff\xff\xff\xff\xff\x7f")
+            with EventLog(log_path, snapshot_path) as log:
+                log.track(Room(202, "Deluxe", 199.99))
+            restored = recover(log_path, snapshot_path)
+            self.assertTrue({("Booking", 1), ("Invoice", 1), ("Room", 101), ("Room", 102),
+                             ("Room", 202)} <= set(restored))
+
+            # Example 4: open_log restores and tracks in one pass and snapshots when due
+            objects, log = open_log(log_path, snapshot_path, snapshot_every=1)
+            with log:
+                last = log.get_sequence()
+                objects[("Room", 202)].set_price_per_night(209.99)
+                self.assertEqual(log.get_sequence(), last + 1)
+            os.remove(log_path)
+            self.assertEqual(recover(log_path, snapshot_path)[("Room", 202)].get_price_per_night(), 209.99)
+
+            # Example 5: Recovery seeks past the history a snapshot covers
+            long_path = os.path.join(folder, "long.log")
+            long_snapshot = long_path + ".snapshot"
+            long_room = Room(301, "Standard", 99.99)
+            with EventLog(long_path, long_snapshot, batch_size=10) as log:
+                log.track(long_room)
+                for price in range(100):
+                    long_room.set_price_per_night(float(price))
+                log.snapshot()
+                long_room.set_price_per_night(150.0)
+            with open(long_path, "r+b") as handle:
+                handle.write(b"\x00" * 64)  # unreadable history
+            restored = recover(long_path, long_snapshot)
+            self.assertEqual(restored[("Room", 301)].get_price_per_night(), 150.0)
+
+            # Example 6: Dates logged as text by older versions are restored as Days
+            old_path = os.path.join(folder, "old.log")
+            old_booking = Booking(7, 1, 101, "2025-03-01", "2025-03-04")
+            old_booking.__dict__.update(_check_in_date="2025-03-01", _check_out_date="2025-03-04")
+            with EventLog(old_path, old_path + ".snapshot") as log:
+                log.track(old_booking)
+            restored_booking = recover(old_path, old_path + ".snapshot")[("Booking", 7)]
+            self.assertEqual(restored_booking.get_check_in_date(), "2025-03-01")
+            self.assertEqual(restored_booking.calculate_booking_duration(), 3)
+
+            # Exception test: An object can only be tracked once per log
+            with self.assertRaises(ValueError):
+                with EventLog(log_path, snapshot_path) as log:
+                    log.track(booking)
+                    log.track(booking)
+
+    def test_change_notification(self):
+        """
+        Test Case 16: Change Notification on Model Setters
+
+        Test that subscribers receive field-level deltas from setters.
+        """
+        received = []
+        booking = Booking(1, 1, 101, self.tomorrow, self.next_week)
+        booking.subscribe(received.extend)
+
+        # Example 1: Each setter call delivers one delta immediately
+        booking.set_check_out_date(self.two_weeks_later)
+        booking.cancel_booking()
+        self.assertEqual(received, [
+            (booking, "check_out_date", self.next_week, self.two_weeks_later),
+            (booking, "is_cancelled", False, True),
+        ])
+
+        # Example 2: A batch coalesces repeated changes into one delivery
+        deliveries = []
+        self.standard_room1.subscribe(deliveries.append)
+        with batch_notifications():
+            self.standard_room1.set_price_per_night(120.0)
+            self.standard_room1.set_price_per_night(130.0)
+            self.standard_room1.set_availability(False)
+            self.standard_room1.set_availability(True)
+            self.standard_room1.add_amenity("Balcony")
+            self.assertEqual(deliveries, [])
+        self.assertEqual(len(deliveries), 1)
+        fields = {field: (old, new) for _, field, old, new in deliveries[0]}
+        self.assertEqual(fields["price_per_night"], (99.99, 130.0))
+        self.assertEqual(fields["amenities"][0], ["Wi-Fi", "TV"])
+        self.assertNotIn("availability", fields)
+
+        # Unsubscribed objects stop notifying
+        booking.unsubscribe(received.extend)
+        booking.set_room_number(102)
+        self.assertEqual(len(received), 2)
+
+        # Exception test: Unsubscribing an unknown callback fails
+        with self.assertRaises(ValueError):
+            self.standard_room1.unsubscribe(received.append)
+        with self.assertRaises(ValueError):
+            booking.unsubscribe(received.extend)
+
+    def test_render_cache(self):
+        """
+        Test Case 17: Cached Rendering of Summaries
+
+        Test that cached renderings are reused until a contributing setter runs.
+        """
+        cache = RenderCache(max_objects=2)
+        invoice = Invoice(1, 199.98, 0.0, "Credit Card", 1, "Pending")
+        feedback = Feedback(1, 4.5, "Great stay!", 1, self.tomorrow)
+
+        # Example 1: Repeated renders are served from the cache
+        self.assertEqual(cache.render(invoice), str(invoice))
+        self.assertEqual(cache.render(invoice), str(invoice))
+        self.assertEqual(cache.get_hits(), 1)
+        self.assertEqual(cache.get_misses(), 1)
+
+        # A contributing setter invalidates, a non-contributing one does not
+        summary = cache.render(feedback, "generate_feedback_summary")
+        feedback.set_comments("Updated comment")
+        self.assertIs(cache.render(feedback, "generate_feedback_summary"), summary)
+        invoice.set_payment_status("Paid")
+        self.assertIn("Status: Paid", cache.render(invoice))
+
+        # Example 2: Subclass renderings use their own dependencies
+        cache.render(self.deluxe_room1)
+        self.assertEqual(len(cache), 2)  # the invoice was evicted
+        self.deluxe_room1.set_view("Garden")
+        self.assertIn("View: Garden", cache.render(self.deluxe_room1))
+
+        # Evicted objects are unsubscribed and render fresh next time
+        invoice.set_discounts(20.0)
+        self.assertIn("Discounts: $20.00", cache.render(invoice))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+        # Exception test: Unknown render methods fail like the model would
+        with self.assertRaises(AttributeError):
+            cache.render(invoice, "generate_booking_summary")
+
+    def test_report_writer(self):
+        """
+        Test Case 18: Streaming Report Writer
+
+        Test writing report sections to text, CSV and JSONL in one pass.
+        """
+        bookings = [Booking(i, i, 101, self.tomorrow, self.next_week) for i in range(1, 4)]
+        invoices = [Invoice(1, 199.98, 0.0, "Credit Card", 1, "Paid")]
+
+        # Example 1: Section filter and pagination on the text output
+        text = StringIO()
+        with ReportWriter(text, sections=["bookings"], page_size=4) as writer:
+            written = writer.write_section("bookings", iter(bookings))
+            self.assertEqual(writer.write_section("invoices", invoices), 0)
+        lines = text.getvalue().splitlines()
+        self.assertEqual(written, 3)
+        self.assertEqual(lines[0], "--- Page 1 ---")
+        self.assertEqual(lines[2], "=== BOOKINGS ===")
+        self.assertIn("--- Page 2 ---", lines)
+        self.assertNotIn("=== INVOICES ===", lines)
+
+        # Example 2: Text, CSV and JSONL outputs from the same iterators
+        with tempfile.TemporaryDirectory() as folder:
+            text = StringIO()
+            jsonl = StringIO()
+            with ReportWriter(text, csv_dir=folder, jsonl_out=jsonl) as writer:
+                writer.write_report({"rooms": self.all_rooms, "invoices": iter(invoices)})
+            with open(os.path.join(folder, "rooms.csv"), encoding="utf-8") as handle:
+                rows = handle.read().splitlines()
+            self.assertEqual(len(rows), 5)
+            self.assertTrue(rows[0].startswith("room_number,room_type"))
+            self.assertIn("Wi-Fi|TV", rows[1])
+            records = [json.loads(line) for line in jsonl.getvalue().splitlines()]
+            self.assertEqual(len(records), 5)
+            self.assertEqual(records[-1]["section"], "invoices")
+            self.assertEqual(records[2]["view"], "Ocean")
+            self.assertIn("    - View: Ocean", text.getvalue())
+
+        # Exception test: Unknown sections are rejected
+        with self.assertRaises(ValueError):
+            ReportWriter(StringIO(), sections=["spa"])
+
+    def test_command_line_interface(self):
+        """
+        Test Case 19: Command-Line Interface
+
+        Test the royalstay commands, lazy imports and the startup-time budget.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            def run(*argv):
+                out = StringIO()
+                err = StringIO()
+                original = sys.stdout, sys.stderr
+                sys.stdout, sys.stderr = out, err
+                try:
+                    code = royalstay.main(["--state", folder, *argv])
+                finally:
+                    sys.stdout, sys.stderr = original
+                return code, out.getvalue() + err.getvalue()
+
+            # Example 1: Book, search and cancel persist through the event log
+            code, output = run("search", "Standard", "2030-01-01", "2030-01-05")
+            self.assertEqual(code, 0)
+            self.assertIn("Room 101", output)
+            code, output = run("book", "1", "101", "2030-01-01", "2030-01-05")
+            self.assertEqual(code, 0)
+            self.assertIn("Room 101, Dates: 2030-01-01 to 2030-01-05", output)
+            self.assertIn("No rooms available", run("search", "standard", "2030-01-03", "2030-01-04")[1])
+            self.assertEqual(run("book", "2", "101", "2030-01-04", "2030-01-06")[0], 1)
+            booking_id = output.split("#")[1].split(":")[0]
+            self.assertIn("(Cancelled)", run("cancel", booking_id)[1])
+            self.assertIn("Room 101", run("search", "Standard", "2030-01-03", "2030-01-04")[1])
+
+            # Example 2: A search in a fresh interpreter runs within budget and skips heavy modules
+            script = (
+                "import sys, time\n"
+                "start = time.perf_counter()\n"
+                "import royalstay\n"
+                f"code = royalstay.main(['--state', {folder!r}, 'search', 'Standard', "
+                "'2030-01-01', '2030-01-05'])\n"
+                "elapsed = time.perf_counter() - start\n"
+                "assert code == 0\n"
+                "heavy = [name for name in ('report_writer', 'benchmarks', 'main', 'numpy') "
+                "if name in sys.modules]\n"
+                "print(elapsed, ','.join(heavy))\n"
+            )
+            here = os.path.dirname(os.path.abspath(__file__))
+
+            def fastest_search():
+                timings = []
+                for _ in range(3):
+                    result = subprocess.run([sys.executable, "-c", script], cwd=here,
+                                            capture_output=True, text=True, check=True)
+                    elapsed, heavy = (result.stdout.splitlines()[-1].split(" ") + [""])[:2]
+                    self.assertEqual(heavy, "")
+                    timings.append(float(elapsed))
+                return min(timings)
+
+            self.assertLess(fastest_search(), royalstay.STARTUP_BUDGET_SECONDS)
+
+            # Example 3: The budget holds however long the logged history grows
+            objects, log = royalstay._open_state(folder)
+            with log:
+                room = objects[("Room", 101)]
+                for change in range(400_000):
+                    room.set_price_per_night(100.0 + change % 50)
+            self.assertGreater(os.path.getsize(os.path.join(folder, "changes.log")), 10 << 20)
+            self.assertLess(fastest_search(), royalstay.STARTUP_BUDGET_SECONDS)
+
+        # Exception test: Invalid dates are reported and return a failure code
+        with tempfile.TemporaryDirectory() as folder:
+            self.assertEqual(royalstay.main(["--state", folder, "search", "Standard",
+                                             "2030-01-05", "2030-01-01"]), 1)
+            self.assertFalse(os.listdir(folder))
+
+    def test_night_audit(self):
+        """
+        Test Case 20: Night Audit
+
+        Test no-shows, room status, room charges and service close-out across shards.
+        """
+        def property_state():
+            rooms = [Room(101, "Standard", 100.0), Room(102, "Standard", 120.0),
+                     DeluxeRoom(201, 200.0, "Ocean", True, True)]
+            bookings = [Booking(1, 1, 101, "2030-01-01", "2030-01-03"),  # in house
+                        Booking(2, 2, 102, "2030-01-02", "2030-01-04"),  # no-show
+                        Booking(3, 3, 201, "2030-01-02", "2030-01-05")]  # arrived
+            invoices = [Invoice(1, 0.0, 0.0, "Credit Card", 1, "Pending"),
+                        Invoice(3, 50.0, 0.0, "Cash", 3, "Pending")]
+            bookings[0].set_invoice(invoices[0])
+            services = [GuestService(1, "Room Cleaning", "Pending", 1, "2030-01-02 09:00:00"),
+                        GuestService(2, "Spa", "Pending", 3, "2030-01-03 09:00:00"),
+                        GuestService(3, "Laundry", "Completed", 3, "2030-01-01 09:00:00")]
+            return rooms, bookings, invoices, services
+
+        # Example 1: Audit in-process, one room per shard
+        rooms, bookings, invoices, services = property_state()
+        changes = []
+        bookings[1].subscribe(changes.append)
+        result = NightAudit(shard_size=1, workers=1).run(
+            "2030-01-02", rooms, bookings, services, invoices[1:], arrived=[3])
+        self.assertEqual(result.get_no_shows(), [2])
+        self.assertTrue(bookings[1].is_cancelled())
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(result.get_rooms_changed(), {101: False, 201: False})
+        self.assertTrue(rooms[1].is_available())
+        self.assertEqual(result.get_charges(), {1: 100.0, 3: 200.0})
+        self.assertEqual(invoices[0].get_total_amount(), 100.0)
+        self.assertEqual(invoices[1].get_total_amount(), 250.0)
+        self.assertEqual(result.get_services_closed(), [1])
+        self.assertEqual(services[1].get_status(), "Pending")
+        self.assertTrue(set(result.get_timings()) >= {"no_shows", "room_status",
+                                                      "room_charges", "services", "commit"})
+
+        # Example 2: The process pool gives the same result; bookings without invoices are reported
+        rooms, bookings, invoices, services = property_state()
+        pooled = NightAudit(shard_size=2, workers=2).run(
+            "2030-01-02", rooms, bookings, services, arrived=[3])
+        self.assertEqual(pooled.get_no_shows(), [2])
+        self.assertEqual(pooled.get_charges(), {1: 100.0})
+        self.assertEqual(pooled.get_unbilled(), [3])
+        self.assertFalse(rooms[2].is_available())
+
+        # Exception test: A failing setter rolls back every change
+        rooms, bookings, invoices, services = property_state()
+        rooms[2].set_availability = None
+        with self.assertRaises(TypeError):
+            NightAudit(workers=1).run("2030-01-02", rooms, bookings, services, invoices, arrived=[3])
+        self.assertFalse(bookings[1].is_cancelled())
+        self.assertTrue(rooms[0].is_available())
+        self.assertEqual(invoices[0].get_total_amount(), 0.0)
+        with self.assertRaises(ValueError):
+            NightAudit().run("02/01/2030", rooms, bookings)
+
+    def test_availability_refresh(self):
+        """
+        Test Case 21: Bulk Availability Refresh
+
+        Test setting room availability flags from bookings by date.
+        """
+        bookings = [Booking(1, 1, 101, "2030-01-01", "2030-01-03"),
+                    Booking(2, 2, 102, "2030-01-02", "2030-01-05"),
+                    Booking(3, 3, 201, "2030-01-03", "2030-01-04")]
+        refresher = AvailabilityRefresher(self.all_rooms, bookings)
+
+        # Example 1: Refresh to a date, then roll forward and back day by day
+        self.assertEqual(refresher.refresh("2030-01-02"), 2)
+        self.assertEqual([room.is_available() for room in self.all_rooms],
+                         [False, False, True, True])
+        self.assertEqual(refresher.refresh("2030-01-02"), 0)
+        self.assertEqual(refresher.advance(), 2)  # 101 checks out, 201 checks in
+        self.assertEqual(refresher.get_date(), "2030-01-03")
+        self.assertTrue(self.standard_room1.is_available())
+        self.assertFalse(self.deluxe_room1.is_available())
+        refresher.advance(3)
+        self.assertEqual(refresher.get_occupied_count(), 0)
+        refresher.refresh("2030-01-01")
+        self.assertTrue(refresher.is_occupied(101))
+        self.assertFalse(self.standard_room1.is_available())
+
+        # Example 2: Booking changes and manual flips are picked up
+        bookings[0].cancel_booking()
+        bookings[2].set_check_in_date("2029-12-31")
+        self.assertEqual(refresher.refresh("2030-01-01"), 2)
+        self.assertTrue(self.standard_room1.is_available())
+        self.assertFalse(self.deluxe_room1.is_available())
+        late = Booking(4, 4, 202, "2029-12-30", "2030-01-02")
+        refresher.add_booking(late)
+        self.deluxe_room1.set_availability(True)
+        self.assertEqual(refresher.refresh("2030-01-01"), 1)
+        self.assertEqual(refresher.resync(), 1)
+        self.assertFalse(self.deluxe_room1.is_available())
+        refresher.remove_booking(late)
+        self.assertEqual(refresher.refresh("2030-01-01"), 1)
+        self.assertTrue(self.deluxe_room2.is_available())
+
+        # Exception test: Invalid dates and duplicates are rejected
+        with self.assertRaises(ValueError):
+            refresher.refresh("01/01/2030")
+        with self.assertRaises(ValueError):
+            refresher.add_booking(bookings[1])
+        with self.assertRaises(ValueError):
+            AvailabilityRefresher().advance()
+
+    def test_dynamic_pricing(self):
+        """
+        Test Case 22: Dynamic Pricing
+
+        Test the price matrix over room types and days and applying it to rooms.
+        """
+        rules = PricingRules(occupancy_curve=((0.0, 0.8), (1.0, 1.6)),
+                             lead_time_curve=((0, 1.0), (10, 0.5)),
+                             view_premiums={"Ocean": 1.5}, jacuzzi_premium=1.2,
+                             breakfast_premium=1.0, min_factor=0.5, max_factor=3.0)
+        engine = DynamicPricingEngine(rules, horizon_days=3)
+        twin = Room(103, "Standard", 99.99)
+        engine.add_rooms(self.all_rooms + [twin])
+
+        # Example 1: One row per room type with occupancy, lead time and deluxe premiums
+        self.assertEqual(len(engine.get_room_types()), 4)  # 101 and 103 share a type
+        matrix = engine.price_matrix([0.5, 1.0, 0.0])
+        self.assertAlmostEqual(matrix[0][0], 119.99)  # 99.99 * occupancy 1.2
+        self.assertAlmostEqual(matrix[0][1], 151.98)  # 99.99 * occupancy 1.6 * lead 0.95
+        self.assertAlmostEqual(matrix[2][2], 259.19)  # 199.99 * ocean 1.5 * jacuzzi 1.2 * 0.8 * 0.9
+        self.assertAlmostEqual(matrix[3][0], 331.19)  # 229.99 * jacuzzi 1.2 * 1.2, view not listed
+        if dynamic_pricing.np is not None:
+            self.assertEqual(matrix.shape, (4, 3))
+            self.assertEqual(matrix.tolist(), engine._price_matrix_python([0.5, 1.0, 0.0]))
+
+        # Example 2: Prices are applied in bulk from the captured base prices
+        changes = []
+        twin.subscribe(changes.append)
+        self.assertEqual(engine.apply_prices(matrix, day=1), 5)
+        self.assertAlmostEqual(twin.get_price_per_night(), 151.98)
+        self.assertEqual(len(changes), 1)
+        per_type = engine.price_matrix([[0.5] * 3, [0.0] * 3, [1.0] * 3, [0.5] * 3])
+        self.assertEqual(engine.apply_prices(per_type, day=0), 5)
+        self.assertAlmostEqual(self.standard_room1.get_price_per_night(), 119.99)
+        self.assertEqual(engine.apply_prices(per_type, day=0), 0)
+
+        # Exception test: Bad shapes, days, curves and duplicate rooms are rejected
+        with self.assertRaises(ValueError):
+            engine.price_matrix([0.5, 0.5])
+        with self.assertRaises(ValueError):
+            engine.apply_prices(matrix, day=3)
+        with self.assertRaises(ValueError):
+            PricingRules(occupancy_curve=((1.0, 1.0), (0.0, 1.0)))
+        with self.assertRaises(ValueError):
+            engine.add_rooms([twin])
+
+    def test_rate_calendar(self):
+        """
+        Test Case 23: Per-Night Rate Calendar
+
+        Test stay costs across rate changes and invoices generated from them.
+        """
+        calendar = RateCalendar(101, "2030-01-01", 100.0, days=60)  # 2030-01-01 is a Tuesday
+
+        # Example 1: Weekend and seasonal rates are summed per night
+        calendar.set_rates("2030-01-01", "2030-03-02", 150.0, weekdays=(4, 5))
+        calendar.adjust_rates("2030-01-10", "2030-01-20", -20.0)
+        self.assertEqual(calendar.get_rates("2030-01-03", "2030-01-06"), [100.0, 150.0, 150.0])
+        self.assertEqual(calendar.get_rate("2030-01-11"), 130.0)
+        self.assertEqual(calendar.stay_cost("2030-01-03", "2030-01-06"), 400.0)
+        self.assertEqual(calendar.stay_cost("2030-01-09", "2030-01-13"), 100.0 + 80.0 + 130.0 + 130.0)
+        for _ in range(PREFIX_REBUILD_QUERIES):  # switches from summing nights to the prefix array
+            self.assertEqual(calendar.stay_cost("2030-01-01", "2030-01-08"), 800.0)
+        self.assertEqual(calendar.stay_cost("2030-01-09", "2030-01-13"), 440.0)
+        self.assertEqual(calendar.get_end_date(), "2030-03-02")
+
+        # Example 2: Bookings are invoiced from the calendar
+        booking = Booking(1, 1, 101, "2030-01-03", "2030-01-06")
+        self.assertEqual(booking.calculate_stay_cost(calendar), 400.0)
+        invoice = booking.generate_invoice(7, calendar, discounts=40.0)
+        self.assertIs(booking.get_invoice(), invoice)
+        self.assertEqual(invoice.calculate_total(), 360.0)
+        self.assertEqual(invoice.get_payment_status(), "Pending")
+
+        # Exception test: Stays outside the calendar, other rooms and bad rates are rejected
+        with self.assertRaises(ValueError):
+            calendar.stay_cost("2029-12-31", "2030-01-02")
+        with self.assertRaises(ValueError):
+            calendar.stay_cost("2030-01-05", "2030-01-05")
+        with self.assertRaises(ValueError):
+            Booking(2, 1, 102, "2030-01-03", "2030-01-06").calculate_stay_cost(calendar)
+        with self.assertRaises(ValueError):
+            calendar.adjust_rates("2030-01-01", "2030-01-03", -500.0)
+
+    def test_waitlist(self):
+        """
+        Test Case 24: Waitlist Fulfillment
+
+        Test that cancellations book the best waitlisted request that fits.
+        """
+        rooms = [Room(101, "Standard", 99.99), Room(102, "Standard", 109.99)]
+        bookings = [Booking(1, 1, 101, "2030-01-01", "2030-01-06"),
+                    Booking(2, 2, 102, "2030-01-01", "2030-01-04"),
+                    Booking(3, 3, 102, "2030-01-04", "2030-01-08")]
+        fulfilled = []
+        waitlist = Waitlist(rooms, bookings,
+                            on_fulfil=lambda entry, booking: fulfilled.append(entry.get_entry_id()))
+        requests = [WaitlistEntry(1, 10, "Standard", "2030-01-02", "2030-01-04", "Silver", "2029-12-01 09:00:00"),
+                    WaitlistEntry(2, 11, "Standard", "2030-01-03", "2030-01-05", "Gold", "2029-12-02 09:00:00"),
+                    WaitlistEntry(3, 12, "Standard", "2030-01-01", "2030-01-03", "Silver", "2029-11-30 09:00:00"),
+                    WaitlistEntry(4, 13, "Standard", "2030-01-06", "2030-01-09", "VIP", "2029-12-03 09:00:00")]
+
+        # Example 1: Sold-out requests wait; free ones are booked at once
+        self.assertIsNone(waitlist.add_request(requests[0]))
+        self.assertIsNone(waitlist.add_request(requests[1]))
+        self.assertIsNone(waitlist.add_request(requests[2]))
+        instant = waitlist.add_request(requests[3])
+        self.assertEqual((instant.get_booking_id(), instant.get_room_number()), (4, 101))
+        self.assertEqual([entry.get_entry_id() for entry in waitlist.get_entries("standard")],
+                         [2, 3, 1])
+
+        # Example 2: A cancellation books the Gold request, then the earliest Silver one that still fits
+        bookings[0].cancel_booking()
+        self.assertEqual(fulfilled, [4, 2, 3])
+        created = dict(waitlist.get_fulfilled())
+        self.assertEqual(created[2].get_room_number(), 101)
+        self.assertEqual(created[2].get_booking_id(), 5)
+        self.assertEqual(created[3].get_check_out_date(), "2030-01-03")
+        self.assertEqual(len(waitlist), 1)
+        # Moving a booking frees its old nights too
+        bookings[1].set_room_number(999)
+        self.assertEqual(fulfilled[-1], 1)
+        self.assertEqual(created.get(1), None)
+        self.assertEqual(dict(waitlist.get_fulfilled())[1].get_room_number(), 102)
+        self.assertEqual(len(waitlist), 0)
+
+        # Exception test: Unknown room types, duplicates and bad stays are rejected
+        with self.assertRaises(ValueError):
+            waitlist.add_request(WaitlistEntry(9, 1, "Suite", "2030-01-01", "2030-01-02", "Gold", ""))
+        with self.assertRaises(ValueError):
+            WaitlistEntry(9, 1, "Standard", "2030-01-02", "2030-01-02", "Gold", "")
+        with self.assertRaises(ValueError):
+            waitlist.remove_request(1)
+
+    def test_room_type_inventory(self):
+        """
+        Test Case 25: Room-Type Inventory
+
+        Test free-room counts per type and night with range queries and updates.
+        """
+        bookings = [Booking(1, 1, 201, "2030-01-02", "2030-01-05"),
+                    Booking(2, 2, 202, "2030-01-04", "2030-01-06"),
+                    Booking(3, 3, 101, "2029-12-30", "2030-01-03")]
+        inventory = RoomTypeInventory(self.all_rooms, bookings, "2030-01-01", days=30)
+
+        # Example 1: Range minimum over the nights of a stay
+        self.assertEqual(inventory.get_capacity("Deluxe"), 2)
+        self.assertEqual(inventory.free_rooms("Deluxe", "2030-01-01", "2030-01-03"), 1)
+        self.assertEqual(inventory.free_rooms("deluxe", "2030-01-04", "2030-01-05"), 0)
+        self.assertTrue(inventory.can_sell("Standard", "2030-01-03", "2030-01-10", 2))
+        self.assertFalse(inventory.can_sell("Standard", "2030-01-01", "2030-01-10", 2))
+
+        # Example 2: Cancellations, moves and allotments update the counts
+        bookings[1].cancel_booking()
+        self.assertEqual(inventory.free_rooms("Deluxe", "2030-01-04", "2030-01-06"), 1)
+        bookings[0].set_check_out_date("2030-01-03")
+        self.assertEqual(inventory.free_rooms("Deluxe", "2030-01-03", "2030-01-06"), 2)
+        inventory.reserve("Deluxe", "2030-01-03", "2030-01-08", 2)
+        self.assertEqual(inventory.free_rooms("Deluxe", "2030-01-01", "2030-01-10"), 0)
+        inventory.release("Deluxe", "2030-01-03", "2030-01-08", 1)
+        self.assertEqual(inventory.free_rooms("Deluxe", "2030-01-03", "2030-01-08"), 1)
+        inventory.add_booking(Booking(4, 4, 102, "2030-01-05", "2030-01-07"))
+        self.assertEqual(inventory.free_rooms("Standard", "2030-01-06", "2030-01-07"), 1)
+        inventory.rebuild([])
+        self.assertEqual(inventory.free_rooms("Deluxe", "2030-01-01", "2030-01-31"), 2)
+
+        # Exception test: Oversold, unknown types and out-of-window stays are rejected
+        with self.assertRaises(ValueError):
+            inventory.reserve("Deluxe", "2030-01-01", "2030-01-02", 3)
+        with self.assertRaises(ValueError):
+            inventory.free_rooms("Suite", "2030-01-01", "2030-01-02")
+        with self.assertRaises(ValueError):
+            inventory.free_rooms("Deluxe", "2030-01-30", "2030-02-02")
+
+    def test_room_assignment(self):
+        """
+        Test Case 26: Room Assignment Optimizer
+
+        Test assigning room numbers without leaving one-night gaps.
+        """
+        rooms = [Room(101, "Standard", 99.99), Room(102, "Standard", 99.99),
+                 Room(103, "Standard", 99.99)]
+
+        def stay(booking_id, first, last):
+            return Booking(booking_id, booking_id, 0, f"2030-01-{first:02d}", f"2030-01-{last:02d}")
+
+        bookings = [stay(1, 1, 3), stay(2, 1, 4), stay(3, 1, 2), stay(4, 4, 6), stay(5, 5, 8)]
+        optimizer = RoomAssignmentOptimizer(rooms)
+
+        # Example 1: Exact fits first, then the shortest gap that can still be sold
+        self.assertEqual(optimizer.assign(bookings), 5)
+        self.assertEqual([b.get_room_number() for b in bookings], [102, 101, 103, 101, 102])
+        self.assertEqual(optimizer.count_orphan_nights(), 0)  # 5 avoids the one-night gap in 103
+        self.assertEqual(optimizer.assign(bookings, from_date="2030-01-03"), 0)
+
+        # Example 2: Pinned and required rooms, then incremental placement
+        optimizer.pin(6, 103)
+        optimizer.require(7, [101, 102])
+        bookings += [stay(6, 2, 4), stay(7, 8, 10)]
+        optimizer.assign(bookings)
+        self.assertEqual(bookings[5].get_room_number(), 103)
+        self.assertIn(bookings[6].get_room_number(), (101, 102))
+        self.assertEqual(optimizer.get_unassigned(), [])
+        self.assertEqual(optimizer.add_booking(stay(8, 6, 8)), 101)  # right after booking 4
+
+        # Exception test: Overbooked stays are reported; full rooms and bad pins raise
+        bookings.append(stay(9, 2, 9))
+        optimizer.assign(bookings)
+        self.assertEqual(optimizer.get_unassigned(), [9])
+        self.assertEqual(bookings[-1].get_room_number(), 0)
+        with self.assertRaises(ValueError):
+            optimizer.add_booking(stay(10, 1, 3))
+        with self.assertRaises(ValueError):
+            optimizer.pin(11, 999)
+
+    def test_booking_modification(self):
+        """
+        Test Case 27: Conflict-Checked Booking Modification
+
+        Test changing dates and rooms without double-booking, all or nothing.
+        """
+        rooms = [Room(101, "Standard", 100.0), Room(102, "Standard", 120.0)]
+        first = Booking(1, 1, 101, "2030-01-01", "2030-01-04")
+        second = Booking(2, 2, 101, "2030-01-05", "2030-01-07")
+        third = Booking(3, 3, 102, "2030-01-01", "2030-01-03")
+        first.set_invoice(Invoice(1, 300.0, 20.0, "Cash", 1, "Pending"))
+        modifier = BookingModifier(rooms, [first, second, third])
+
+        # Example 1: Single changes re-index the stay and re-price the invoice
+        self.assertFalse(modifier.is_available(101, "2030-01-03", "2030-01-06"))
+        modifier.extend_stay(1, 1)
+        self.assertEqual(first.get_check_out_date(), "2030-01-05")
+        self.assertEqual(first.get_invoice().get_total_amount(), 400.0)
+        with self.assertRaises(ValueError):
+            modifier.change_room(1, 102)  # booking 3 holds 102 on 1-3 January
+        third.set_cancelled(True)  # followed through notification
+        modifier.change_room(1, 102)
+        modifier.change_dates(2, "2030-01-06", "2030-01-08")
+        self.assertEqual(first.get_invoice().get_total_amount(), 480.0)
+
+        # Example 2: Group swaps and splits
+        modifier.modify_many([BookingChange(1, room_number=101),
+                              BookingChange(2, room_number=102)])
+        self.assertEqual((first.get_room_number(), second.get_room_number()), (101, 102))
+        rest = modifier.split_stay(1, "2030-01-03", 4, room_number=102, invoice_id=2)
+        self.assertEqual(first.get_check_out_date(), "2030-01-03")
+        self.assertEqual((rest.get_room_number(), rest.get_check_in_date()), (102, "2030-01-03"))
+        self.assertEqual(first.get_invoice().get_total_amount(), 200.0)
+        self.assertEqual(rest.get_invoice().get_total_amount(), 240.0)
+
+        # Exception test: A conflicting group leaves every booking unchanged
+        with self.assertRaises(ValueError):
+            modifier.modify_many([BookingChange(1, "2030-01-02", "2030-01-04"),
+                                  BookingChange(2, "2030-01-04", "2030-01-07")])
+        self.assertEqual(first.get_check_in_date(), "2030-01-01")
+        self.assertEqual(second.get_check_in_date(), "2030-01-06")
+        self.assertTrue(modifier.is_available(101, "2030-01-03", "2030-01-08"))
+        with self.assertRaises(ValueError):
+            modifier.change_room(1, 999)
+        with self.assertRaises(ValueError):
+            modifier.split_stay(4, "2030-01-04", 5)  # has an invoice but no invoice ID
+
+        # Exception test: Overlapping stays are honoured and unpriceable changes are refused
+        long_stay = Booking(6, 1, 101, "2030-02-03", "2030-02-08")
+        short_stay = Booking(7, 2, 101, "2030-02-04", "2030-02-05")
+        priced = Booking(8, 3, 102, "2030-02-01", "2030-02-03")
+        priced.set_invoice(Invoice(3, 200.0, 0.0, "Cash", 8, "Pending"))
+        calendar = RateCalendar(102, "2030-02-01", 100.0, days=10)
+        checked = BookingModifier(rooms, [long_stay, short_stay, priced], {102: calendar})
+        self.assertFalse(checked.is_available(101, "2030-02-05", "2030-02-06"))
+        with self.assertRaises(ValueError):
+            checked.change_dates(8, "2030-02-09", "2030-02-14")  # past the rate calendar
+        self.assertEqual(priced.get_check_out_date(), "2030-02-03")
+        self.assertTrue(checked.is_available(102, "2030-02-09", "2030-02-14"))
+
+    def test_property_router(self):
+        """
+        Test Case 28: Multi-Property Search
+
+        Test searching the properties of a region and ranking their matches.
+        """
+        def shard(property_id, region, prices):
+            rooms = [Room(100 + i, "Deluxe", price) for i, price in enumerate(prices)]
+            return PropertyShard(property_id, f"Royal Stay {property_id}", region, rooms)
+
+        shards = [shard(1, "Coast", [200.0, 180.0]), shard(2, "Coast", [150.0]),
+                  shard(3, "City", [90.0, 95.0]), shard(4, "Coast", [170.0, 170.0])]
+        # Room numbers repeat across properties; each shard owns its own.
+        shards[0].add_booking(Booking(1, 1, 101, "2030-06-01", "2030-06-05"))
+
+        # Example 1: Fan-out search in one region, ranked by stay price
+        with PropertyRouter(shards, workers=1) as router:
+            matches = router.search("deluxe", "2030-06-02", "2030-06-04", region="coast")
+            self.assertEqual([m.get_property_id() for m in matches], [2, 4, 1])
+            self.assertEqual((matches[1].get_free_rooms(), matches[1].get_stay_price()), (2, 340.0))
+            self.assertEqual(matches[2].get_room_number(), 100)  # 101 is booked
+            self.assertEqual(len(router.search("Deluxe", "2030-06-02", "2030-06-04", min_rooms=2)), 2)
+
+            # Example 2: Routed bookings and setter changes show up in the next search
+            router.add_booking(2, Booking(1, 2, 100, "2030-06-03", "2030-06-06"))
+            shards[3].get_room(100).set_price_per_night(120.0)
+            matches = router.search("Deluxe", "2030-06-02", "2030-06-04", limit=2)
+            self.assertEqual([m.get_property_id() for m in matches], [3, 4])
+            self.assertEqual(matches[1].get_stay_price(), 240.0)
+
+        # Pooled search returns the same ranking
+        with PropertyRouter(shards, workers=2) as router:
+            pooled = router.search("Deluxe", "2030-06-02", "2030-06-04")
+            self.assertEqual([m.get_property_id() for m in pooled], [3, 4, 1])
+
+        # Exception test: Overlapping bookings, unknown properties and bad dates
+        with self.assertRaises(ValueError):
+            shards[0].add_booking(Booking(2, 3, 101, "2030-06-04", "2030-06-07"))
+        with self.assertRaises(ValueError):
+            PropertyRouter(shards, workers=1).route(99)
+        with self.assertRaises(ValueError):
+            PropertyRouter(shards, workers=1).search("Deluxe", "2030-06-04", "2030-06-02")
+
+    def test_availability_snapshots(self):
+        """
+        Test Case 29: Copy-On-Write Availability Snapshots
+
+        Test that readers keep a consistent version while writers publish new ones.
+        """
+        rooms = [Room(101, "Standard", 99.99), Room(102, "Standard", 99.99),
+                 Room(201, "Suite", 299.99)]
+        bookings = [Booking(1, 1, 101, "2030-01-01", "2030-01-04"),
+                    Booking(2, 2, 201, "2030-01-02", "2030-01-03")]
+        publisher = SnapshotPublisher(rooms, bookings)
+        before = publisher.snapshot()
+
+        # Example 1: Reads from a snapshot
+        self.assertEqual(before.get_version(), 1)
+        self.assertEqual(before.free_rooms("standard", "2030-01-02", "2030-01-05"), [102])
+        self.assertFalse(before.is_free(201, "2030-01-01", "2030-01-03"))
+        self.assertEqual(before.occupied_rooms("2030-01-02"), 2)
+
+        # Example 2: Writes publish new versions and leave held snapshots alone
+        bookings[0].set_cancelled(True)
+        rooms[1].set_room_type("Suite")
+        after = publisher.snapshot()
+        self.assertEqual(after.get_version(), 3)
+        self.assertEqual(after.free_rooms("Standard", "2030-01-02", "2030-01-05"), [101])
+        self.assertEqual(after.free_rooms("Suite", "2030-01-02", "2030-01-05"), [102])
+        self.assertEqual(before.free_rooms("Standard", "2030-01-02", "2030-01-05"), [102])
+        self.assertEqual(before.get_stays(101), [(1, "2030-01-01", "2030-01-04")])
+        with publisher.batch():
+            for booking_id in range(3, 6):
+                publisher.add_booking(Booking(booking_id, 3, 102, f"2030-02-0{booking_id}",
+                                              f"2030-02-0{booking_id + 1}"))
+            rooms[0].set_price_per_night(89.99)
+        self.assertEqual(publisher.snapshot().get_version(), 4)
+        self.assertEqual(len(publisher.snapshot().get_stays(102)), 3)
+        self.assertEqual(publisher.snapshot().get_price(101), 89.99)
+
+        # Exception test: Unknown rooms, duplicate rooms and bad dates
+        with self.assertRaises(ValueError):
+            after.is_free(999, "2030-01-01", "2030-01-02")
+        with self.assertRaises(ValueError):
+            publisher.add_room(Room(101, "Standard", 99.99))
+        with self.assertRaises(ValueError):
+            after.free_rooms("Suite", "2030-01-05", "2030-01-05")
+
+        # Exception test: A short stay inside a longer one does not free the room
+        publisher.add_booking(Booking(6, 1, 101, "2030-02-03", "2030-02-08"))
+        publisher.add_booking(Booking(7, 2, 101, "2030-02-04", "2030-02-05"))
+        self.assertFalse(publisher.snapshot().is_free(101, "2030-02-05", "2030-02-06"))
+        self.assertEqual(publisher.snapshot().occupied_rooms("2030-02-06"), 1)
+
+    def test_metrics(self):
+        """
+        Test Case 30: Operation Metrics
+
+        Test timing instrumented operations and exporting them for Prometheus.
+        """
+        registry = MetricsRegistry()
+        original_init = Booking.__init__
+
+        # Example 1: Enabled registries time calls and count errors
+        registry.enable()
+        try:
+            booking = Booking(1, 1, 101, "2030-01-01", "2030-01-03")
+            with self.assertRaises(ValueError):
+                booking.validate_dates("2030-01-03", "2030-01-01")
+            LoyaltyProgram(500, [], 1, "Gold", "2031-01-01").redeem_points(100)
+            GuestService(1, "Spa", "Pending", 1, "2030-01-01 10:00:00").mark_as_completed()
+        finally:
+            registry.disable()
+        self.assertIs(Booking.__init__, original_init)  # no wrapper left behind
+        Booking(2, 1, 101, "2030-01-01", "2030-01-03")
+        self.assertEqual(registry.operation("booking_create").get_count(), 1)
+        self.assertEqual(registry.operation("service_mark_completed").get_count(), 1)
+        self.assertEqual(registry.counter("royalstay_operation_errors_total",
+                                          operation="booking_validate_dates").get_value(), 1)
+        quantiles = registry.operation("booking_create").quantiles()
+        self.assertTrue(0 < quantiles[0.5] <= quantiles[0.99] < 1)
+        text = registry.render()
+        self.assertIn("# TYPE royalstay_operation_duration_seconds summary", text)
+        self.assertIn('royalstay_operation_duration_seconds_count{operation="loyalty_redeem_points"} 1',
+                      text)
+        self.assertIn('{operation="booking_create",quantile="0.99"}', text)
+
+        # Example 2: Counters, gauges, file export and the HTTP endpoint
+        registry.gauge("royalstay_rooms_occupied", "Rooms occupied tonight").set(42)
+        registry.counter("royalstay_bookings_total", "Bookings made", channel="web").inc(3)
+        server = registry.serve(port=0)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+                body = response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn("royalstay_rooms_occupied 42.0", body)
+        self.assertIn('royalstay_bookings_total{channel="web"} 3.0', body)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "royalstay.prom")
+            registry.write_prometheus(path)
+            with open(path, encoding="utf-8") as exported:
+                self.assertEqual(exported.read(), registry.render())
+            original = sys.stdout
+            sys.stdout = StringIO()
+            try:
+                code = royalstay.main(["--state", folder, "--metrics", path,
+                                       "search", "Standard", "2030-01-01", "2030-01-05"])
+            finally:
+                sys.stdout = original
+            self.assertEqual(code, 0)
+            with open(path, encoding="utf-8") as exported:
+                self.assertIn('_count{operation="availability_search"} 1', exported.read())
+
+        # Example 3: Finished threads are folded into one cell per metric
+        import threading
+        latency = registry.histogram("royalstay_thread_seconds", "Per-thread test timings")
+        for _ in range(50):
+            worker = threading.Thread(target=latency.observe, args=(0.001,))
+            worker.start()
+            worker.join()
+        self.assertEqual(latency.get_count(), 50)
+        self.assertEqual(len(latency._cells.cells()), 1)
+
+        # Exception test: Negative counts and mismatched metric types
+        with self.assertRaises(ValueError):
+            registry.counter("royalstay_bookings_total", channel="web").inc(-1)
+        with self.assertRaises(ValueError):
+            registry.gauge("royalstay_bookings_total", channel="web")
+        with self.assertRaises(ValueError):
+            registry.operation("booking_create").quantiles([1.5])
+
+    def test_profiling(self):
+        """
+        Test Case 31: Sampled Operation Profiling
+
+        Test profiling entry points into artifacts and summarizing and diffing runs.
+        """
+        guest = Guest(1, "Ali AlKhaldi", "ali@email.com")
+        guest.add_reservation(Booking(1, 1, 101, "2030-01-01", "2030-01-04"))
+        with tempfile.TemporaryDirectory() as folder:
+            try:
+                # Example 1: Sampled runs write .prof and .json artifacts
+                profiling.PROFILER.configure(folder, sample_rate=0.0)
+                self.assertEqual(guest.get_total_spent({101: 100.0}), 300.0)
+                self.assertEqual(os.listdir(folder), [])
+                profiling.PROFILER.configure(folder)
+                data = initialize_sample_data()
+                demonstrate_system(data, out=StringIO())  # nested write_report is not profiled again
+                self.assertEqual(guest.get_total_spent({101: 100.0}), 300.0)
+                names = sorted(os.listdir(folder))
+                self.assertEqual(len(names), 6)
+                self.assertEqual([name.split("-")[0] for name in names[::2]],
+                                 ["demonstrate_system", "guest_total_spent", "initialize_sample_data"])
+            finally:
+                profiling.PROFILER.configure(None)
+
+            # Example 2: Summaries and diffs, in Python and on the command line
+            runs = [os.path.join(folder, name) for name in names if name.endswith(".json")]
+            report = profiling.load_run(runs[0])
+            self.assertEqual(report["operation"], "demonstrate_system")
+            self.assertTrue(any("write_report" in entry["function"] for entry in report["functions"]))
+            self.assertGreater(report["peak_bytes"], 0)
+            self.assertIn("Top allocation sites", "\n".join(profiling.summarize(report)))
+            original = sys.stdout
+            sys.stdout = StringIO()
+            try:
+                code = royalstay.main(["profile", "diff", runs[2], runs[0], "--limit", "3"])
+                output = sys.stdout.getvalue()
+            finally:
+                sys.stdout = original
+            self.assertEqual(code, 0)
+            self.assertIn("initialize_sample_data vs demonstrate_system", output)
+            self.assertIn("wall seconds:", output)
+
+            # Exception test: Bad settings and files that are not profiles
+            with self.assertRaises(ValueError):
+                profiling.Profiler(folder, sample_rate=1.5)
+            # ...but a malformed environment variable only warns, so models still import
+            result = subprocess.run([sys.executable, "-c", "import guest"],
+                                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    env=dict(os.environ, ROYALSTAY_PROFILE_RATE="ten percent"),
+                                    capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0)
+            self.assertIn("Ignoring ROYALSTAY_PROFILE_RATE", result.stderr)
+            with self.assertRaises(ValueError):
+                profiling.load_run(os.path.join(folder, names[1]))  # the binary .prof file
+            original = sys.stderr
+            sys.stderr = StringIO()
+            try:
+                self.assertEqual(royalstay.main(["profile", "summary", runs[0], runs[1]]), 1)
+            finally:
+                sys.stderr = original
+
+            # Exception test: One run at a time, and unwritable artifacts are only logged
+            import threading
+            profiler = profiling.Profiler(folder)
+            inside, done, paths = threading.Event(), threading.Event(), []
+
+            def first_run():
+                with profiler.profile("first") as path:
+                    paths.append(path)
+                    inside.set()
+                    done.wait(5)
+
+            thread = threading.Thread(target=first_run)
+            thread.start()
+            inside.wait(5)
+            with profiler.profile("second") as path:
+                paths.append(path)
+            done.set()
+            thread.join()
+            self.assertIsNotNone(paths[0])
+            self.assertIsNone(paths[1])
+            profiler.configure(os.path.join(folder, names[1], "below-a-file"))
+            with self.assertLogs("profiling", "ERROR"):
+                with profiler.profile("unwritable") as path:
+                    self.assertIsNotNone(path)
+
+    def test_http_api(self):
+        """
+        Test Case 32: HTTP API and Load Generator
+
+        Verifies booking, conflicts, cancelling, invoices and feedback over
+        keep-alive HTTP, pipelined requests answered in order, and a load run.
+        """
+        rooms = [Room(101, "Single", 100.0), Room(102, "Single", 120.0), Room(201, "Suite", 300.0)]
+        created = []
+
+        async def exercise():
+            server = HTTPServer(HotelAPI(rooms, on_create=created.append), port=0)
+            port = await server.start()
+            try:
+                # Example 1: Book, conflict, invoice, feedback, cancel
+                stay = {"guest_id": 7, "room_number": 101,
+                        "check_in_date": "2030-01-01", "check_out_date": "2030-01-03"}
+                status, booking = await fetch("127.0.0.1", port, "POST", "/bookings", stay)
+                self.assertEqual((status, booking["booking_id"]), (201, 1))
+                status, _ = await fetch("127.0.0.1", port, "POST", "/bookings", stay)
+                self.assertEqual(status, 409)
+                _, found = await fetch("127.0.0.1", port, "GET",
+                                       "/rooms?room_type=single&check_in=2030-01-02"
+                                       "&check_out=2030-01-04")
+                self.assertEqual([room["room_number"] for room in found["rooms"]], [102])
+                status, invoice = await fetch("127.0.0.1", port, "POST", "/bookings/1/invoice")
+                self.assertEqual((status, invoice["total_amount"]), (201, 200.0))
+                status, _ = await fetch("127.0.0.1", port, "POST", "/feedback",
+                                        {"guest_id": 7, "rating": 5, "comments": "Great"})
+                self.assertEqual(status, 201)
+                status, cancelled = await fetch("127.0.0.1", port, "DELETE", "/bookings/1")
+                self.assertTrue(cancelled["cancelled"])
+                self.assertEqual([type(obj).__name__ for obj in created],
+                                 ["Booking", "Invoice", "Feedback"])
+
+                # Example 2: Pipelined requests on one keep-alive connection
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(b"GET /bookings/1 HTTP/1.1\r\nHost: x\r\n\r\n"
+                             b"GET /bookings/9 HTTP/1.1\r\nHost: x\r\n\r\n"
+                             b"GET /rooms HTTP/1.1\r\nConnection: close\r\n\r\n")
+                replies = (await reader.read()).split(b"HTTP/1.1 ")[1:]
+                writer.close()
+                self.assertEqual([reply[:3] for reply in replies], [b"200", b"404", b"200"])
+                self.assertIn(b"Connection: close", replies[2])
+                report = await run_load("127.0.0.1", port, requests=200, connections=4,
+                                        pipeline=4, seed=1)
+                self.assertEqual(report.get_requests(), 200)
+                self.assertLessEqual(report.get_percentile(50), report.get_percentile(99))
+
+                # Exception test: Bad bodies, unknown routes and methods
+                status, error = await fetch("127.0.0.1", port, "POST", "/bookings",
+                                            {"room_number": "101"})
+                self.assertEqual(status, 400)
+                self.assertIn("room_number", error["error"])
+                self.assertEqual((await fetch("127.0.0.1", port, "GET", "/guests"))[0], 404)
+                self.assertEqual((await fetch("127.0.0.1", port, "PUT", "/rooms"))[0], 405)
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(b"GARBAGE\r\n\r\n")
+                reply = await reader.read()
+                writer.close()
+                self.assertTrue(reply.startswith(b"HTTP/1.1 400 "))
+                with self.assertRaises(ValueError):
+                    await run_load("127.0.0.1", port, scenario="browse")
+            finally:
+                await server.stop()
+
+        asyncio.run(exercise())
+
+        # Exception test: Rejected requests take no IDs, ratings follow Feedback
+        # and unexpected errors are answered with a 500
+        api = HotelAPI(rooms, [Booking(5, 1, 999, "2030-01-01", "2030-01-02")])
+        stay = {"guest_id": 7, "room_number": 101,
+                "check_in_date": "2030-01-01", "check_out_date": "2030-01-03"}
+        for bad in ({"check_out_date": "2029-12-31"}, {"check_in_date": "01/01/2030"},
+                    {"room_number": 404}):
+            self.assertIn(api.handle("POST", "/bookings", json.dumps({**stay, **bad}).encode())[0],
+                          (400, 404))
+        status, booking = api.handle("POST", "/bookings", json.dumps(stay).encode())
+        self.assertEqual((status, booking["booking_id"]), (201, 6))
+        status, error = api.handle("POST", "/feedback", json.dumps(
+            {"guest_id": 7, "rating": 0.5, "comments": "Poor"}).encode())
+        self.assertEqual(status, 400)
+        self.assertIn("1.0 and 5.0", error["error"])
+        with self.assertLogs("http_api", "ERROR"):
+            self.assertEqual(api.handle("POST", "/bookings/5/invoice")[0], 500)
+
+    def test_availability_cache(self):
+        """
+        Test Case 33: Availability Search Cache
+
+        Verifies cached searches, invalidation limited to the room type and
+        nights a booking change touches, LRU eviction and the hit-rate metrics.
+        """
+        rooms = [Room(101, "Single", 100.0), Room(102, "Single", 150.0),
+                 Room(201, "Suite", 300.0)]
+        rooms[1].add_amenity("Balcony")
+        booking = Booking(1, 1, 101, "2025-07-01", "2025-07-03")
+        cache = AvailabilityCache(rooms, [booking], max_entries=3)
+
+        # Example 1: Repeated searches are hits; only overlapping ones are invalidated
+        self.assertEqual(cache.search("Single", "2025-07-02", "2025-07-04"), (102,))
+        self.assertEqual(cache.search("single", "2025-07-02", "2025-07-04"), (102,))
+        self.assertEqual(cache.search("Single", "2025-07-05", "2025-07-06", max_price=120.0),
+                         (101,))
+        self.assertEqual(cache.search("Suite", "2025-07-02", "2025-07-04"), (201,))
+        self.assertEqual((cache.get_hits(), cache.get_misses()), (1, 3))
+        cache.add_booking(Booking(2, 2, 102, "2025-07-03", "2025-07-05"))
+        self.assertEqual(cache.get_invalidations(), 1)  # the 07-05 and Suite searches stay
+        self.assertEqual(cache.search("Single", "2025-07-02", "2025-07-04"), ())
+        self.assertEqual(cache.search("Suite", "2025-07-02", "2025-07-04"), (201,))
+        booking.cancel_booking()
+        self.assertEqual(cache.search("Single", "2025-07-02", "2025-07-04"), (101,))
+        booking.set_dates("2025-07-05", "2025-07-07")  # cancelled, so invalidates nothing
+        self.assertEqual(cache.search("Single", "2025-07-02", "2025-07-04"), (101,))
+        self.assertEqual(cache.get_hits(), 3)
+        self.assertAlmostEqual(cache.get_hit_rate(), 3 / 8)
+
+        # Example 2: Room changes, filters, eviction and exported metrics
+        rooms[0].set_price_per_night(90.0)
+        self.assertEqual(cache.search("Single", "2025-07-10", "2025-07-12", 120.0,
+                                      ["Balcony"]), ())
+        self.assertEqual(cache.search("Single", "2025-07-10", "2025-07-12",
+                                      amenities=["Balcony"]), (102,))
+        for day in range(20, 24):
+            cache.search("Suite", f"2025-07-{day}", f"2025-07-{day + 1}")
+        self.assertEqual(cache.get_size(), 3)
+        self.assertEqual(cache.get_evictions(), 4)
+        registry = MetricsRegistry()
+        cache.publish_metrics(registry)
+        cache.search("Single", "2025-07-10", "2025-07-12", amenities=["Balcony"])
+        cache.publish_metrics(registry)
+        rendered = registry.render()
+        self.assertIn(f"royalstay_availability_cache_hits_total {cache.get_hits()}", rendered)
+        self.assertIn("royalstay_availability_cache_entries", rendered)
+
+        # Exception test: Invalid dates and limits
+        with self.assertRaises(ValueError):
+            cache.search("Single", "2025-07-04", "2025-07-02")
+        with self.assertRaises(ValueError):
+            cache.search("Single", "July 4", "2025-07-06")
+        with self.assertRaises(ValueError):
+            AvailabilityCache(rooms, max_entries=0)
+
+    @unittest.skipUnless(columnar_export.np is not None, "needs NumPy")
+    def test_columnar_export(self):
+        """
+        Test Case 34: Columnar Export
+
+        Verifies typed, dictionary-encoded column files written in chunks
+        and memory-mapped back, and the optional Parquet writer.
+        """
+        bookings = [Booking(index, 10 + index % 3, 101 + index % 2, f"2025-07-{index + 1:02d}",
+                            f"2025-07-{index + 3:02d}") for index in range(7)]
+        bookings[4].cancel_booking()
+        invoices = [Invoice(1, 200.0, 10.0, "Credit Card", 1, "Paid"),
+                    Invoice(2, 90.0, 0.0, "Cash", 2, "Pending"),
+                    Invoice(3, 300.0, 0.0, "Credit Card", 3, "Pending")]
+        services = [GuestService(1, "Room Cleaning", "Pending", 10, "2025-07-01 09:30:00")]
+        with tempfile.TemporaryDirectory() as folder:
+            exporter = columnar_export.ColumnarExporter(folder, chunk_rows=3)
+
+            # Example 1: Bookings in chunks, read back memory-mapped
+            self.assertEqual(exporter.export("bookings", bookings), 7)
+            table = columnar_export.load_table(folder, "bookings")
+            self.assertEqual(table.get_row_count(), 7)
+            self.assertIsInstance(table.column("booking_id"), columnar_export.np.memmap)
+            self.assertEqual(table.column("room_number").tolist(), [101, 102] * 3 + [101])
+            nights = table.column("check_out_date") - table.column("check_in_date")
+            self.assertEqual(nights.astype(int).tolist(), [2] * 7)
+            self.assertEqual(str(table.column("check_in_date")[6]), "2025-07-07")
+            self.assertEqual(int(table.column("is_cancelled").sum()), 1)
+
+            # Example 2: Dictionary-encoded strings, times and Parquet
+            exporter.export("invoices", invoices)
+            exporter.export("services", services)
+            table = columnar_export.load_table(folder, "invoices", mmap=False)
+            self.assertEqual(table.dictionary("payment_method"), ["Credit Card", "Cash"])
+            self.assertEqual(table.column("payment_method").tolist(), [0, 1, 0])
+            self.assertEqual(table.strings("payment_status").tolist(),
+                             ["Paid", "Pending", "Pending"])
+            self.assertEqual(table.column("total_amount").sum(), 590.0)
+            times = columnar_export.load_table(folder, "services").column("request_time")
+            self.assertEqual(str(times[0]), "2025-07-01T09:30:00")
+            if columnar_export.pa is not None:
+                self.assertEqual(exporter.export_parquet("bookings", bookings), 7)
+                parquet = columnar_export.pq.read_table(os.path.join(folder, "bookings.parquet"))
+                self.assertEqual(parquet.num_rows, 7)
+
+            # Exception test: Unknown tables and columns
+            with self.assertRaises(ValueError):
+                exporter.export("guests", [])
+            with self.assertRaises(ValueError):
+                table.column("amount")
+
+    def test_compact_dates(self):
+        """
+        Test Case 35: Compact Date Type
+
+        Tests that Day and Timestamp parse, order and print like the date text
+        they came from, and that the models keep returning date strings.
+        """
+        from compact_date import Day, Timestamp
+
+        # Example 1: Days are interned ints that order, subtract and print as dates
+        day = Day.parse("2025-07-01")
+        self.assertIs(Day.parse("2025-07-01"), day)
+        self.assertEqual(str(day), "2025-07-01")
+        self.assertEqual(f"{day:%d/%m/%Y}", "01/07/2025")
+        self.assertEqual(Day.parse("2025-07-04") - day, 3)
+        self.assertEqual(day.shift(31), Day.parse("2025-08-01"))
+        self.assertLess(day, Day.parse("2025-12-31"))
+        self.assertEqual(Day.of(day.to_date()), day)
+        moment = Timestamp.parse("2025-07-01 14:30:05")
+        self.assertEqual(str(moment), "2025-07-01 14:30:05")
+        self.assertEqual((moment.get_day(), moment.get_hour()), (day, 14))
+        self.assertEqual(int(Timestamp.parse("1970-01-02 00:00:00")), 86400)
+
+        # Example 2: Models store Days but their getters and notifications stay strings
+        booking = Booking(1, 1, 101, "2025-07-01", "2025-07-04")
+        self.assertIs(booking.get_check_in_day(), day)
+        self.assertEqual(booking.get_check_in_date(), "2025-07-01")
+        self.assertEqual(booking.calculate_booking_duration(), 3)
+        changes = []
+        booking.subscribe(changes.extend)
+        booking.set_check_out_date("2025-07-05")
+        self.assertEqual(changes[-1][1:], ("check_out_date", "2025-07-04", "2025-07-05"))
+        with tempfile.TemporaryDirectory() as folder:
+            log_path = os.path.join(folder, "events.log")
+            snapshot_path = os.path.join(folder, "state.snapshot")
+            with EventLog(log_path, snapshot_path) as log:
+                log.track(booking)
+                booking.set_check_in_date("2025-07-02")
+            restored = recover(log_path, snapshot_path)[("Booking", 1)]
+        self.assertEqual(restored.get_check_in_day(), Day.parse("2025-07-02"))
+        self.assertEqual(restored.get_check_out_date(), "2025-07-05")
+
+        # Exception test: Malformed dates and times
+        for text in ("2025-7-1", "07/01/2025", "2025-02-30", None):
+            with self.assertRaises(ValueError):
+                Day.parse(text)
+        with self.assertRaises(ValueError):
+            Timestamp.parse("2025-07-01 24:00:00")
+        with self.assertRaises(ValueError):
+            Booking(2, 1, 101, "2025-07-01T00:00", "2025-07-04")
+
+    def test_id_allocator(self):
+        """
+        Test Case 36: ID Allocator
+
+        Tests that IDs handed out in per-thread blocks are unique across
+        threads and restarts, and that time-ordered IDs grow with time.
+        """
+        import threading
+        import time
+        from id_allocator import IdAllocator, time_of
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "ids.json")
+
+            # Example 1: Threads draw unique IDs above the existing ones
+            ids = IdAllocator(path, first_block=4, max_block=64)
+            ids.advance("Booking", 2)
+            bookings = ids.sequence("Booking")
+            drawn = []
+
+            def draw():
+                drawn.append([bookings.next_id() for _ in range(1000)])
+
+            threads = [threading.Thread(target=draw) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            flat = [value for values in drawn for value in values]
+            self.assertEqual(len(set(flat)), 4000)
+            self.assertGreater(min(flat), 2)
+            self.assertTrue(all(values == sorted(values) for values in drawn))
+            self.assertGreaterEqual(ids.get_mark("Booking"), max(flat))
+            self.assertEqual(ids.next_id("Invoice"), 1)
+
+            # Example 2: A restart continues above the mark; time-ordered IDs follow the clock
+            restarted = IdAllocator(path)
+            self.assertGreater(restarted.next_id("Booking"), max(flat))
+            timed = restarted.sequence("Feedback", time_ordered=True)
+            first = timed.next_id()
+            self.assertAlmostEqual(time_of(first), time.time(), delta=5)
+            later = [timed() for _ in range(100)]
+            self.assertEqual(later, sorted(later))
+            self.assertGreater(later[0], first)
+
+            # Exception test: Bad block sizes and mixed sequence modes
+            with self.assertRaises(ValueError):
+                IdAllocator(path, first_block=0)
+            with self.assertRaises(ValueError):
+                IdAllocator(path, first_block=64, max_block=16)
+            with self.assertRaises(ValueError):
+                restarted.sequence("Booking", time_ordered=True)
+
 
 if __name__ == "__main__":
     # Run all tests
-    unittest.main()
\ No newline at end of file
+    unittest.main()
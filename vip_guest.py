@@ -28,7 +28,10 @@ class VIPGuest(Guest):
 
     def set_personal_assistant(self, has_assistant: bool) -> None:
         """Sets whether the guest has a personal assistant."""
+        old = self._personal_assistant
         self._personal_assistant = has_assistant
+        if self._observers:
+            self._notify("personal_assistant", old, has_assistant)
 
     def get_private_transportation(self) -> bool:
         """Returns whether the guest has private transportation."""
@@ -36,7 +39,10 @@ class VIPGuest(Guest):
 
     def set_private_transportation(self, has_transport: bool) -> None:
         """Sets whether the guest has private transportation."""
+        old = self._private_transportation
         self._private_transportation = has_transport
+        if self._observers:
+            self._notify("private_transportation", old, has_transport)
 
     def get_dedicated_concierge(self) -> bool:
         """Returns whether the guest has a dedicated concierge."""
@@ -44,7 +50,10 @@ class VIPGuest(Guest):
 
     def set_dedicated_concierge(self, has_concierge: bool) -> None:
         """Sets whether the guest has a dedicated concierge."""
+        old = self._dedicated_concierge
         self._dedicated_concierge = has_concierge
+        if self._observers:
+            self._notify("dedicated_concierge", old, has_concierge)
 
     def __str__(self) -> str:
         """Returns a string representation of the VIP guest."""
@@ -0,0 +1,280 @@
+"""Module for waitlisting sold-out stays and booking them when rooms are freed."""
+
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from availability_refresh import CALENDAR_FIELDS
+from booking import Booking
+from compact_date import Day
+from room import Room
+
+# Lower rank is served first; unknown tiers come last.
+TIER_PRIORITY = {"vip": 0, "platinum": 1, "gold": 2, "silver": 3, "basic": 4}
+
+
+class WaitlistEntry:
+    """
+    Represents a guest's request for a room type that is sold out for their dates.
+    """
+
+    def __init__(self, entry_id: int, guest_id: int, room_type: str, check_in_date: str,
+                 check_out_date: str, loyalty_tier: str, request_time: str):
+        """
+        Initializes a WaitlistEntry with:
+        - entry_id: Unique identifier for the entry.
+        - guest_id: Guest waiting for the room.
+        - room_type: Room type requested (e.g., "Deluxe").
+        - check_in_date, check_out_date: Requested stay (YYYY-MM-DD).
+        - loyalty_tier: Guest's loyalty tier, used for priority.
+        - request_time: When the guest joined the waitlist (YYYY-MM-DD HH:MM:SS).
+        """
+        if Day.parse(check_out_date) <= Day.parse(check_in_date):
+            raise ValueError("Check-out date must be after check-in date")
+        self._entry_id = entry_id
+        self._guest_id = guest_id
+        self._room_type = room_type
+        self._check_in_date = check_in_date
+        self._check_out_date = check_out_date
+        self._loyalty_tier = loyalty_tier
+        self._request_time = request_time
+
+    def get_entry_id(self) -> int:
+        """Returns the entry ID."""
+        return self._entry_id
+
+    def get_guest_id(self) -> int:
+        """Returns the waiting guest's ID."""
+        return self._guest_id
+
+    def get_room_type(self) -> str:
+        """Returns the requested room type."""
+        return self._room_type
+
+    def get_check_in_date(self) -> str:
+        """Returns the requested check-in date."""
+        return self._check_in_date
+
+    def get_check_out_date(self) -> str:
+        """Returns the requested check-out date."""
+        return self._check_out_date
+
+    def get_loyalty_tier(self) -> str:
+        """Returns the guest's loyalty tier."""
+        return self._loyalty_tier
+
+    def get_request_time(self) -> str:
+        """Returns when the guest joined the waitlist."""
+        return self._request_time
+
+    def priority(self) -> Tuple[int, str, int]:
+        """Returns the sort key: loyalty tier first, then request time."""
+        return (TIER_PRIORITY.get(self._loyalty_tier.lower(), len(TIER_PRIORITY)),
+                self._request_time, self._entry_id)
+
+    def __str__(self) -> str:
+        """Returns a string representation of the WaitlistEntry object."""
+        return (f"Waitlist #{self._entry_id}: Guest {self._guest_id}, {self._room_type}, "
+                f"Dates: {self._check_in_date} to {self._check_out_date} "
+                f"({self._loyalty_tier})")
+
+
+class Waitlist:
+    """
+    Holds waitlisted requests and turns them into bookings as rooms free up.
+
+    Entries are indexed per room type by check-in day. A freed stay
+    [in, out) can only help entries that overlap it, which all start in
+    [in - longest waitlisted stay, out), so a cancellation looks at that
+    slice of the index instead of every entry. The candidates are tried
+    in priority order against the freed room's bookings, kept sorted by
+    check-in so each fit test is a binary search. Every entry that fits
+    is booked, so a long cancellation can serve several short requests.
+
+    Bookings are followed through change notification: cancelling one,
+    or moving its dates or room, triggers fulfillment automatically.
+    Requests that fit a room when they are added are booked right away;
+    nightly booked-room counts per type skip the room scan when any night
+    of the request is sold out.
+    """
+
+    def __init__(self, rooms: Iterable[Room], bookings: Iterable[Booking] = (),
+                 next_booking_id: Optional[Callable[[], int]] = None,
+                 on_fulfil: Optional[Callable[[WaitlistEntry, Booking], None]] = None):
+        """
+        Initializes the waitlist.
+        - rooms: Rooms whose freed nights can be offered.
+        - bookings: Existing bookings for those rooms.
+        - next_booking_id: Returns the ID for each new booking
+          (default: one more than the highest booking ID seen).
+        - on_fulfil: Called with the entry and its new booking.
+        """
+        self._room_types: Dict[int, str] = {}
+        self._rooms_of_type: Dict[str, List[int]] = {}
+        for room in rooms:
+            number = room.get_room_number()
+            self._room_types[number] = room.get_room_type().lower()
+            self._rooms_of_type.setdefault(room.get_room_type().lower(), []).append(number)
+        self._calendar: Dict[int, List[Tuple[int, int, int]]] = {}  # room -> sorted (in, out, id)
+        self._booked: Dict[str, Dict[int, int]] = {}  # type -> {day: rooms booked that night}
+        self._indexed: Dict[int, Optional[Tuple[int, int, int]]] = {}  # id(booking) -> (room, in, out)
+        self._bookings: Dict[int, Booking] = {}
+        self._entries: Dict[int, WaitlistEntry] = {}
+        self._by_type: Dict[str, List[Tuple[int, int]]] = {}  # type -> sorted (check-in, entry ID)
+        self._longest_stay: Dict[str, int] = {}
+        self._fulfilled: List[Tuple[int, Booking]] = []
+        self._last_booking_id = 0
+        self._next_booking_id = next_booking_id or self._default_booking_id
+        self._on_fulfil = on_fulfil
+        for booking in bookings:
+            self.add_booking(booking)
+
+    def _default_booking_id(self) -> int:
+        """Returns one more than the highest booking ID seen."""
+        return self._last_booking_id + 1
+
+    # Bookings
+    def add_booking(self, booking: Booking) -> None:
+        """Follows a booking so that its cancellation frees its nights."""
+        key = id(booking)
+        if key in self._bookings:
+            raise ValueError(f"Booking {booking.get_booking_id()} already added")
+        self._bookings[key] = booking
+        self._last_booking_id = max(self._last_booking_id, booking.get_booking_id())
+        self._index_booking(booking)
+        booking.subscribe(self._on_booking_change)
+
+    def _index_booking(self, booking: Booking) -> None:
+        """Records an active booking in its room's calendar."""
+        key = id(booking)
+        room = booking.get_room_number()
+        if booking.is_cancelled() or room not in self._room_types:
+            self._indexed[key] = None
+            return
+        stay = (booking.get_check_in_day(), booking.get_check_out_day())
+        self._indexed[key] = (room, *stay)
+        insort(self._calendar.setdefault(room, []), (*stay, key))
+        booked = self._booked.setdefault(self._room_types[room], {})
+        for day in range(*stay):
+            booked[day] = booked.get(day, 0) + 1
+
+    def _unindex_booking(self, key: int) -> Optional[Tuple[int, int, int]]:
+        """Removes a booking from its room's calendar; returns (room, in, out) if it was there."""
+        entry = self._indexed.pop(key)
+        if entry is not None:
+            room, check_in, check_out = entry
+            stays = self._calendar[room]
+            del stays[bisect_left(stays, (check_in, check_out, key))]
+            booked = self._booked[self._room_types[room]]
+            for day in range(check_in, check_out):
+                booked[day] -= 1
+        return entry
+
+    def _on_booking_change(self, changes: list) -> None:
+        """Offers the nights a booking gave up to the waitlist."""
+        if any(field in CALENDAR_FIELDS for _, field, _, _ in changes):
+            booking = changes[0][0]
+            freed = self._unindex_booking(id(booking))
+            self._index_booking(booking)
+            if freed is not None:
+                self._fill(*freed)
+
+    def process_cancellation(self, booking: Booking) -> List[Booking]:
+        """
+        Offers a followed booking's nights to the waitlist after it was
+        cancelled without notifications (e.g. restored from storage).
+        Returns the bookings created.
+        """
+        freed = self._unindex_booking(id(booking))
+        self._index_booking(booking)
+        return self._fill(*freed) if freed is not None else []
+
+    # Requests
+    def add_request(self, entry: WaitlistEntry) -> Optional[Booking]:
+        """
+        Adds a request to the waitlist, or books it at once if a room of
+        its type is free for its dates.
+        Returns the booking if one was made.
+        """
+        if entry.get_entry_id() in self._entries:
+            raise ValueError(f"Waitlist entry {entry.get_entry_id()} already exists")
+        room_type = entry.get_room_type().lower()
+        if room_type not in self._rooms_of_type:
+            raise ValueError(f"No rooms of type {entry.get_room_type()}")
+        check_in = Day.parse(entry.get_check_in_date())
+        check_out = Day.parse(entry.get_check_out_date())
+        rooms = self._rooms_of_type[room_type]
+        booked = self._booked.get(room_type, {})
+        if all(booked.get(day, 0) < len(rooms) for day in range(check_in, check_out)):
+            for room in rooms:
+                if self._is_free(room, check_in, check_out):
+                    return self._book(entry, room)
+        self._entries[entry.get_entry_id()] = entry
+        insort(self._by_type.setdefault(room_type, []), (check_in, entry.get_entry_id()))
+        self._longest_stay[room_type] = max(self._longest_stay.get(room_type, 0),
+                                            check_out - check_in)
+        return None
+
+    def remove_request(self, entry_id: int) -> None:
+        """Removes a request from the waitlist."""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            raise ValueError(f"Waitlist entry {entry_id} not found")
+        index = self._by_type[entry.get_room_type().lower()]
+        del index[bisect_left(index, (Day.parse(entry.get_check_in_date()), entry_id))]
+
+    def _is_free(self, room: int, check_in: int, check_out: int) -> bool:
+        """Checks if no active booking on a room overlaps [check_in, check_out)."""
+        stays = self._calendar.get(room)
+        if not stays:
+            return True
+        # Stays on one room do not overlap, so only the stays around check_in matter.
+        position = bisect_left(stays, (check_in,))
+        if position < len(stays) and stays[position][0] < check_out:
+            return False
+        return position == 0 or stays[position - 1][1] <= check_in
+
+    def _fill(self, room: int, freed_in: int, freed_out: int) -> List[Booking]:
+        """Books waitlisted requests into nights freed on a room, best priority first."""
+        room_type = self._room_types[room]
+        index = self._by_type.get(room_type)
+        if not index:
+            return []
+        start = bisect_left(index, (freed_in - self._longest_stay[room_type],))
+        stop = bisect_left(index, (freed_out,))
+        candidates = []
+        for check_in, entry_id in index[start:stop]:
+            entry = self._entries[entry_id]
+            check_out = Day.parse(entry.get_check_out_date())
+            if check_out > freed_in:
+                candidates.append((entry.priority(), entry, check_in, check_out))
+        candidates.sort(key=lambda candidate: candidate[0])
+        booked = []
+        for _, entry, check_in, check_out in candidates:
+            if self._is_free(room, check_in, check_out):
+                self.remove_request(entry.get_entry_id())
+                booked.append(self._book(entry, room))
+        return booked
+
+    def _book(self, entry: WaitlistEntry, room: int) -> Booking:
+        """Creates and follows the booking for a request."""
+        booking = Booking(self._next_booking_id(), entry.get_guest_id(), room,
+                          entry.get_check_in_date(), entry.get_check_out_date())
+        self.add_booking(booking)
+        self._fulfilled.append((entry.get_entry_id(), booking))
+        if self._on_fulfil is not None:
+            self._on_fulfil(entry, booking)
+        return booking
+
+    def get_entries(self, room_type: str) -> List[WaitlistEntry]:
+        """Returns the waiting requests for a room type in priority order."""
+        index = self._by_type.get(room_type.lower(), [])
+        return sorted((self._entries[entry_id] for _, entry_id in index),
+                      key=WaitlistEntry.priority)
+
+    def get_fulfilled(self) -> List[Tuple[int, Booking]]:
+        """Returns (entry ID, booking) for every request booked so far."""
+        return list(self._fulfilled)
+
+    def __len__(self) -> int:
+        """Returns the number of waiting requests."""
+        return len(self._entries)